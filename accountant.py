@@ -1,10 +1,17 @@
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import portfolio_risk
+import trade_archive
+import execution_analytics
 import time
 import datetime
 import requests
 import pandas as pd
 from alpaca.trading.client import TradingClient
 from alpaca.trading.enums import AssetClass
+from alpaca.data.historical import StockHistoricalDataClient, OptionHistoricalDataClient
 
 # --- CONFIGURATION ---
 # We verify these against the specific bot scripts to ensure correct attribution
@@ -27,8 +34,11 @@ INFLUX_DB_NAME = config.INFLUX_DB_NAME
 DB_QUERY_URL = f"http://{INFLUX_HOST}:{INFLUX_PORT}/query"
 
 # --- CLIENT ---
-trading_client = TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(API_KEY, SECRET_KEY, paper=PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(API_KEY, SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
+option_data_client = instrument.wrap_client(rate_limiter.govern(OptionHistoricalDataClient(API_KEY, SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "option_data")
 
+@instrument.timed("influx_query")
 def query_influx_trades(days=30):
     """Fetches trade history from InfluxDB to calculate Realized P&L."""
     try:
@@ -54,6 +64,19 @@ def query_influx_trades(days=30):
         print(f"[!] History Fetch Error: {e}")
         return pd.DataFrame()
 
+@instrument.timed("trade_archive")
+def load_trade_history(days=30):
+    """Trade history from the Parquet archive (synced from Influx first); falls back to querying Influx."""
+    try:
+        trade_archive.sync_from_influx()
+        start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+        df = trade_archive.read_trades(start=start, bots=["trend_bot", "crypto_grid", "survivor_bot", "wheel_bot", "condor_bot"],
+                                       columns=["time", "measurement", "symbol", "action", "price", "qty"])
+        return df.rename(columns={"measurement": "bot_type"})
+    except Exception as e:
+        print(f"[!] Trade Archive Error: {e} (falling back to Influx)")
+        return query_influx_trades(days)
+
 def calculate_realized_pl(df):
     """
     Calculates Closed Trade P&L.
@@ -92,6 +115,7 @@ def calculate_realized_pl(df):
 
     return scores
 
+@instrument.timed("influx_write")
 def log_metric(measurement, tags, fields):
     try:
         tag_str = ",".join([f"{k}={v}" for k, v in tags.items()])
@@ -143,13 +167,33 @@ def get_bot_owner(symbol, asset_class):
     # Trend Bot takes the rest (NVDA, TSLA shares, etc.)
     return "trend_bot"
 
+@instrument.timed("risk")
+def report_risk(positions):
+    """Greeks + scenario P&L per bot and for the whole book -> `bot_risk`."""
+    try:
+        risk = portfolio_risk.run_risk(positions, get_bot_owner, data_client, option_data_client)
+    except Exception as e:
+        print(f"[!] Risk Engine Error: {e}")
+        return
+
+    for bot, r in risk.items():
+        fields = {k: v for k, v in r.items() if k != "scenarios"}
+        fields.update({f"pnl_{label}": pnl for label, pnl in r["scenarios"].items()})
+        log_metric("bot_risk", {"bot": bot}, fields)
+
+    if "portfolio" in risk:
+        p = risk["portfolio"]
+        print(f"  RISK | Δ {p['delta']:+.0f} sh (${p['dollar_delta']:+,.0f}) | Γ {p['gamma']:+.1f} | Vega ${p['vega']:+.0f} | Θ ${p['theta']:+.0f}/day | Worst ±20%: ${p['max_loss']:,.0f}")
+
 def run_accountant():
     print("--- 🧾 SMART ACCOUNTANT (Condor Aware) STARTED ---")
 
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("accountant", budget=300)
         try:
             # 1. FETCH REALIZED P&L (HISTORY)
-            history_df = query_influx_trades()
+            history_df = load_trade_history()
             realized_scores = calculate_realized_pl(history_df)
             
             # 2. FETCH UNREALIZED P&L (LIVE)
@@ -190,6 +234,9 @@ def run_accountant():
                     }
                 )
             
+            # 4. OPTIONS RISK
+            report_risk(positions)
+
             # Log Global Stats
             log_metric("account_stats", {"type": "global"}, {
                 "equity": float(account.equity),
@@ -197,11 +244,16 @@ def run_accountant():
                 "buying_power": float(account.buying_power)
             })
 
-            time.sleep(300) # 5 minutes
+            # 5. EXECUTION QUALITY (fill latency + slippage)
+            execution_analytics.collect(trading_client)
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("accountant")
+            heartbeat.sleep("accountant", 300) # 5 minutes
 
         except Exception as e:
             print(f"[!] Accountant Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("accountant", 60)
 
 if __name__ == "__main__":
     run_accountant()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Fixed-size per-symbol bar history in plain NumPy arrays.
+
+Every bar is written twice, at slot i and slot i + capacity, so the newest
+`n` bars are always one contiguous slice of each array. Readers get views
+(no copies), appends are in place, and memory never grows:
+6 arrays x 2 x capacity x 8 bytes (~19 KB per symbol at 200 bars).
+"""
+import copy
+import threading
+import datetime
+import numpy as np
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+class BarBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype=np.int64)    # Bar open time, epoch seconds (UTC)
+        self.data = {f: np.zeros(2 * capacity, dtype=np.float64) for f in FIELDS}
+        self.count = 0      # Bars ever written
+        self.size = 0       # Bars currently held (<= capacity)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_ts(self):
+        return int(self._view(self.ts)[-1]) if self.size else None
+
+    def _slot(self):
+        return (self.count - 1) % self.capacity
+
+    def _write(self, slot, ts, o, h, l, c, v):
+        for s in (slot, slot + self.capacity):
+            self.ts[s] = ts
+            self.data["open"][s], self.data["high"][s], self.data["low"][s] = o, h, l
+            self.data["close"][s], self.data["volume"][s] = c, v
+
+    def append(self, ts, o, h, l, c, v):
+        """Adds a bar. A bar with the latest timestamp replaces it (it was still forming); older bars are ignored."""
+        last = self.last_ts
+        if last is not None and ts < last: return
+        if last is not None and ts == last:
+            self._write(self._slot(), ts, o, h, l, c, v)
+            return
+        self.count += 1
+        self.size = min(self.size + 1, self.capacity)
+        self._write(self._slot(), ts, o, h, l, c, v)
+
+    def extend(self, ts, o, h, l, c, v):
+        """Bulk append of time-ordered arrays (same overwrite / ignore rules as append)."""
+        ts = np.asarray(ts, dtype=np.int64)
+        cols = [np.asarray(a, dtype=np.float64) for a in (o, h, l, c, v)]
+        last = self.last_ts
+        if last is not None:
+            keep = ts >= last
+            ts, cols = ts[keep], [a[keep] for a in cols]
+            if len(ts) and ts[0] == last:
+                self._write(self._slot(), ts[0], *(a[0] for a in cols))
+                ts, cols = ts[1:], [a[1:] for a in cols]
+        if not len(ts): return
+        ts, cols = ts[-self.capacity:], [a[-self.capacity:] for a in cols]
+        slots = (self.count + np.arange(len(ts))) % self.capacity
+        for s in (slots, slots + self.capacity):
+            self.ts[s] = ts
+            for f, a in zip(FIELDS, cols): self.data[f][s] = a
+        self.count += len(ts)
+        self.size = min(self.size + len(ts), self.capacity)
+
+    def extend_bars(self, bars):
+        """Appends Alpaca Bar objects (anything with timestamp/open/high/low/close/volume), oldest first."""
+        last = self.last_ts
+        rows = []
+        for b in reversed(bars):   # Only the tail at/after our newest bar is new
+            ts = int(b.timestamp.timestamp())
+            if last is not None and ts < last: break
+            rows.append((ts, b.open, b.high, b.low, b.close, b.volume))
+        if not rows: return
+        rows.reverse()
+        self.extend(*zip(*rows))
+
+    def _view(self, arr, n=None):
+        n = self.size if n is None else min(n, self.size)
+        end = self._slot() + self.capacity + 1
+        return arr[end - n:end]
+
+    # --- Read-only views, oldest -> newest ---
+    def timestamps(self, n=None): return self._view(self.ts, n)
+    def open(self, n=None): return self._view(self.data["open"], n)
+    def high(self, n=None): return self._view(self.data["high"], n)
+    def low(self, n=None): return self._view(self.data["low"], n)
+    def close(self, n=None): return self._view(self.data["close"], n)
+    def volume(self, n=None): return self._view(self.data["volume"], n)
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + sum(a.nbytes for a in self.data.values())
+
+class BufferStore:
+    """
+    BarBuffers by symbol, with the same gap-fetch contract as checkpoint.BarCache:
+    ask for gap_start(), fetch from there, ingest() the bars. Picklable for checkpoints.
+    """
+    def __init__(self, capacity, buffers=None):
+        self.capacity = capacity
+        self.buffers = dict(buffers or {})
+        self.lock = threading.Lock()
+
+    def get(self, symbol):
+        return self.buffers.get(symbol)
+
+    def gap_start(self, symbol):
+        buf = self.buffers.get(symbol)
+        if buf is None or not len(buf): return None
+        return datetime.datetime.fromtimestamp(buf.last_ts, tz=datetime.timezone.utc)
+
+    def _buffer(self, symbol):
+        buf = self.buffers.get(symbol)
+        if buf is None:
+            buf = self.buffers[symbol] = BarBuffer(self.capacity)
+        return buf
+
+    def ingest(self, symbol, bars):
+        with self.lock:   # A scan worker past its deadline may still land here during state()
+            buf = self._buffer(symbol)
+            buf.extend_bars(bars or [])
+            return buf
+
+    def seed(self, symbol, src):
+        """Copies another buffer's bars in (only those newer than what we hold)."""
+        with self.lock:
+            buf = self._buffer(symbol)
+            buf.extend(src.timestamps(), src.open(), src.high(), src.low(), src.close(), src.volume())
+            return buf
+
+    def retain(self, symbols):
+        with self.lock:
+            keep = set(symbols)
+            self.buffers = {s: b for s, b in self.buffers.items() if s in keep}
+
+    def state(self):
+        """A copy for checkpointing (late writers can't tear it while it is pickled)."""
+        with self.lock:
+            return {"capacity": self.capacity, "buffers": copy.deepcopy(self.buffers)}
+
+    @classmethod
+    def restore(cls, state, capacity):
+        if not state or state.get("capacity") != capacity: return cls(capacity)
+        return cls(capacity, state.get("buffers"))
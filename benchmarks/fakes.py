@@ -0,0 +1,181 @@
+"""
+Offline stand-ins for the Alpaca clients and the `requests` module.
+They serve the recorded fixtures and never touch the network.
+"""
+import types
+import zlib
+import datetime
+import pandas as pd
+from alpaca.trading.enums import AssetClass
+from benchmarks import fixtures
+
+def _ns(**kwargs):
+    return types.SimpleNamespace(**kwargs)
+
+def _symbols_of(req):
+    symbols = req.symbol_or_symbols
+    return [symbols] if isinstance(symbols, str) else list(symbols)
+
+class FakeBarSet:
+    """Mimics alpaca's BarSet: `.data` {symbol: [Bar]} and a (symbol, timestamp) MultiIndex `.df`."""
+    def __init__(self, frames, bar_lists):
+        self.data = bar_lists
+        self._frames = frames
+
+    @property
+    def df(self):
+        if not self._frames: return pd.DataFrame()
+        return pd.concat(self._frames.values())
+
+class FakeBarStore:
+    """Turns fixture series into cached per-symbol DataFrames and Bar lists."""
+    def __init__(self, series_by_symbol):
+        self.series = series_by_symbol
+        self._cache = {}
+        self._bars = {}
+
+    def frame(self, symbol):
+        if symbol not in self._cache:
+            # Unknown symbols (large synthetic watchlists) reuse a recorded series
+            keys = sorted(self.series.keys())
+            src = self.series.get(symbol) or self.series[keys[zlib.crc32(symbol.encode()) % len(keys)]]
+            index = pd.MultiIndex.from_arrays(
+                [[symbol] * len(src["t"]), pd.to_datetime(src["t"], unit='s', utc=True)],
+                names=["symbol", "timestamp"]
+            )
+            self._cache[symbol] = pd.DataFrame({
+                "open": src["o"], "high": src["h"], "low": src["l"], "close": src["c"],
+                "volume": src["v"], "trade_count": src.get("n", [0] * len(src["t"])), "vwap": src["c"]
+            }, index=index)
+        return self._cache[symbol]
+
+    def bar_list(self, symbol):
+        if symbol not in self._bars:
+            df = self.frame(symbol)
+            self._bars[symbol] = [
+                _ns(timestamp=ts.to_pydatetime(), open=o, high=h, low=l, close=c, volume=v)
+                for ts, o, h, l, c, v in zip(df.index.get_level_values(1), df["open"], df["high"], df["low"], df["close"], df["volume"])
+            ]
+        return self._bars[symbol]
+
+    def bars(self, req):
+        limit = getattr(req, 'limit', None)
+        frames, bar_lists = {}, {}
+        for symbol in _symbols_of(req):
+            df, bars = self.frame(symbol), self.bar_list(symbol)
+            frames[symbol] = df.iloc[-limit:] if limit else df
+            bar_lists[symbol] = bars[-limit:] if limit else bars
+        return FakeBarSet(frames, bar_lists)
+
+def _is_daily(req):
+    return "day" in str(getattr(req.timeframe, 'unit', req.timeframe)).lower()
+
+class FakeStockDataClient:
+    def __init__(self, fixtures):
+        self.intraday = FakeBarStore(fixtures["bars_15m"])
+        self.daily = FakeBarStore(fixtures["bars_1d"])
+        self.prices = fixtures["latest_prices"]
+
+    def get_stock_bars(self, req):
+        return (self.daily if _is_daily(req) else self.intraday).bars(req)
+
+    def get_stock_latest_trade(self, req):
+        return {s: _ns(price=self.prices.get(s, 100.0)) for s in _symbols_of(req)}
+
+class FakeCryptoDataClient:
+    def __init__(self, fixtures):
+        self.daily = FakeBarStore(fixtures["bars_1d"])
+        self.prices = fixtures["latest_prices"]
+
+    def get_crypto_bars(self, req):
+        return self.daily.bars(req)
+
+    def get_crypto_latest_trade(self, req):
+        return {s: _ns(price=self.prices.get(s, 100.0)) for s in _symbols_of(req)}
+
+class FakeOptionDataClient:
+    def __init__(self, fixtures):
+        self.quotes = fixtures["option_quotes"]
+
+    def get_option_latest_quote(self, req):
+        out = {}
+        for s in _symbols_of(req):
+            bid, ask = self.quotes.get(s, (0.50, 0.60))
+            out[s] = _ns(bid_price=bid, ask_price=ask)
+        return out
+
+class FakeTradingClient:
+    def __init__(self, fixtures, positions=None):
+        self.fixtures = fixtures
+        self.account = _ns(**fixtures["account"])
+        self.positions = [self._position(p) for p in (positions if positions is not None else fixtures["positions"])]
+        self.submitted = []
+
+    @staticmethod
+    def _position(p):
+        p = dict(p)
+        p["asset_class"] = AssetClass(p["asset_class"])
+        return _ns(**p)
+
+    def get_clock(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return _ns(is_open=True, timestamp=now, next_open=now, next_close=now + datetime.timedelta(hours=6))
+
+    def get_calendar(self, filters=None):
+        # Every day is one all-day session, matching get_clock's "always open"
+        today = datetime.date.today()
+        days = [today + datetime.timedelta(days=i) for i in range(-3, 31)]
+        return [_ns(date=d, open=datetime.datetime.combine(d, datetime.time(0, 0)),
+                    close=datetime.datetime.combine(d, datetime.time(23, 59))) for d in days]
+
+    def get_account(self):
+        return self.account
+
+    def get_all_positions(self):
+        return list(self.positions)
+
+    def get_open_position(self, symbol):
+        for p in self.positions:
+            if p.symbol.replace("/", "") == symbol: return p
+        raise LookupError(f"position does not exist: {symbol}")
+
+    def get_option_contracts(self, req):
+        root = req.underlying_symbols[0]
+        kind = getattr(req.type, 'value', req.type)
+        chain = self.fixtures["option_chains"].get(root)
+        if chain is None:
+            # Underlyings without a recorded chain get a synthetic one around their fixture price
+            spot = self.fixtures["latest_prices"].get(root, 100.0)
+            chain = fixtures.synthesize_chain(self.fixtures, root, spot, datetime.date.today())
+        contracts = [_ns(**c) for c in chain if c["type"] == kind]
+        return _ns(option_contracts=contracts, next_page_token=None)
+
+    def get_orders(self, filter=None):
+        return []   # Fills are instant here, so nothing is ever left open
+
+    def submit_order(self, order_data=None, **kwargs):
+        self.submitted.append(order_data)
+        return _ns(id=f"fake-{len(self.submitted)}", status="filled", symbol=order_data.symbol, side=order_data.side,
+                   qty=order_data.qty, notional=getattr(order_data, "notional", None),
+                   limit_price=getattr(order_data, "limit_price", None), asset_class=None)
+
+class FakeResponse:
+    def __init__(self, payload=None):
+        self._payload = payload or {}
+        self.status_code = 204 if payload is None else 200
+
+    def json(self):
+        return self._payload
+
+class FakeRequests:
+    """Replaces a bot module's `requests` import: swallows posts, serves Influx queries."""
+    def __init__(self, fixtures):
+        self.influx_results = fixtures["influx_trades"]
+        self.posts = 0
+
+    def post(self, url, *args, **kwargs):
+        self.posts += 1
+        return FakeResponse()
+
+    def get(self, url, *args, **kwargs):
+        return FakeResponse(self.influx_results)
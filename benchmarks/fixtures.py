@@ -0,0 +1,200 @@
+"""
+Recorded market fixtures for the benchmark suite.
+
+    python -m benchmarks.fixtures record     # Pull a fresh snapshot from Alpaca/Influx (needs config.py + network)
+    python -m benchmarks.fixtures generate   # Write a deterministic synthetic set (no network)
+
+load_fixtures() prefers the recorded file and falls back to the synthetic set,
+so the benchmarks always run offline.
+"""
+import os
+import sys
+import gzip
+import json
+import math
+import random
+import datetime
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RECORDED_FILE = os.path.join(FIXTURE_DIR, "recorded.json.gz")
+SYNTHETIC_FILE = os.path.join(FIXTURE_DIR, "synthetic.json.gz")
+
+# Symbols captured when recording (the fleet's static lists)
+STOCK_SYMBOLS = ["TQQQ", "SQQQ", "SOXL", "SOXS", "FNGU", "UPRO", "NVDA", "TSLA", "COIN", "DIS", "F", "PLTR", "SPY"]
+CRYPTO_SYMBOLS = ["BTC/USD", "ETH/USD", "SOL/USD"]
+OPTION_UNDERLYINGS = ["COIN", "TSLA", "DIS", "PLTR"]
+INTRADAY_BARS = 500
+DAILY_BARS = 400
+
+# --- SYNTHETIC SET ---
+def _random_walk(rng, start_price, count, step_seconds, end_ts):
+    t, o, h, l, c, v = [], [], [], [], [], []
+    price = start_price
+    for i in range(count):
+        open_ = price
+        price = max(0.5, price * math.exp(rng.gauss(0, 0.01)))
+        t.append(end_ts - (count - i) * step_seconds)
+        o.append(round(open_, 4))
+        h.append(round(max(open_, price) * (1 + abs(rng.gauss(0, 0.003))), 4))
+        l.append(round(min(open_, price) * (1 - abs(rng.gauss(0, 0.003))), 4))
+        c.append(round(price, 4))
+        v.append(rng.randint(1000, 500000))
+    return {"t": t, "o": o, "h": h, "l": l, "c": c, "v": v}
+
+def _occ_symbol(root, expiry, kind, strike):
+    return f"{root}{expiry.strftime('%y%m%d')}{'C' if kind == 'call' else 'P'}{int(round(strike * 1000)):08d}"
+
+def synthesize_chain(fixtures, root, spot, today):
+    """Adds a 3-expiry, +/-25% strike chain (and quotes) for one underlying to the fixture set."""
+    chain = []
+    for dte in (28, 35, 42):
+        expiry = today + datetime.timedelta(days=dte)
+        for k in range(-25, 26):
+            strike = round(spot * (1 + k * 0.01), 0 if spot > 50 else 1)
+            for kind in ("put", "call"):
+                symbol = _occ_symbol(root, expiry, kind, strike)
+                chain.append({"symbol": symbol, "strike_price": strike, "type": kind,
+                              "expiration_date": expiry.isoformat(), "underlying_symbol": root})
+                intrinsic = max(0.0, (strike - spot) if kind == "put" else (spot - strike))
+                mid = intrinsic + spot * 0.04 * math.exp(-abs(k) / 8)
+                fixtures["option_quotes"][symbol] = (round(mid * 0.97, 2), round(mid * 1.03, 2))
+    fixtures["option_chains"][root] = chain
+    return chain
+
+def generate_synthetic(seed=42):
+    rng = random.Random(seed)
+    end_ts = int(datetime.datetime(2026, 1, 2, 21, 0, tzinfo=datetime.timezone.utc).timestamp())
+    today = datetime.date(2026, 1, 2)
+
+    fixtures = {"source": "synthetic", "bars_15m": {}, "bars_1d": {}, "latest_prices": {},
+                "option_chains": {}, "option_quotes": {}}
+
+    for symbol in STOCK_SYMBOLS + CRYPTO_SYMBOLS:
+        start = 40000.0 if symbol.startswith("BTC") else rng.uniform(10, 400)
+        fixtures["bars_15m"][symbol] = _random_walk(rng, start, INTRADAY_BARS, 900, end_ts)
+        fixtures["bars_1d"][symbol] = _random_walk(rng, start, DAILY_BARS, 86400, end_ts)
+        fixtures["latest_prices"][symbol] = fixtures["bars_15m"][symbol]["c"][-1]
+
+    for root in OPTION_UNDERLYINGS:
+        synthesize_chain(fixtures, root, fixtures["latest_prices"][root], today)
+
+    put = next(c for c in fixtures["option_chains"]["COIN"] if c["type"] == "put")
+    fixtures["positions"] = [
+        make_position("TQQQ", "us_equity", 50, fixtures["latest_prices"]["TQQQ"] * 0.97),
+        make_position("NVDA", "us_equity", 20, fixtures["latest_prices"]["NVDA"] * 1.01),
+        make_position("BTCUSD", "crypto", 0.01, 40000.0),
+        make_position(put["symbol"], "us_option", -1, 2.50),
+    ]
+    fixtures["account"] = {"equity": "100000", "portfolio_value": "100000",
+                           "buying_power": "200000", "cash": "50000"}
+    fixtures["influx_trades"] = _influx_trades(rng, end_ts)
+    return fixtures
+
+def make_position(symbol, asset_class, qty, entry):
+    current = entry * 1.02
+    return {"symbol": symbol, "asset_class": asset_class, "qty": str(qty), "side": "long" if qty > 0 else "short",
+            "avg_entry_price": str(entry), "current_price": str(current),
+            "market_value": str(current * qty), "unrealized_pl": str((current - entry) * qty)}
+
+def _influx_trades(rng, end_ts):
+    series = []
+    for name in ("trades", "crypto_trades", "survivor_trades", "wheel_trades", "condor_trades"):
+        values = []
+        for i in range(200):
+            action = "buy" if i % 2 == 0 else "sell"
+            values.append([end_ts - i * 3600, action, round(rng.uniform(10, 400), 2), rng.randint(1, 20), "SYM"])
+        series.append({"name": name, "columns": ["time", "action", "price", "qty", "symbol"], "values": values})
+    return {"results": [{"statement_id": 0, "series": series}]}
+
+# --- RECORDING (LIVE) ---
+def record():
+    """Captures bars, quotes, chains, positions and trade history from the live accounts."""
+    import requests
+    import config
+    from alpaca.trading.client import TradingClient
+    from alpaca.trading.requests import GetOptionContractsRequest
+    from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDataClient, OptionHistoricalDataClient
+    from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest, OptionLatestQuoteRequest
+    from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+    trading = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
+    stocks = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+    crypto = CryptoHistoricalDataClient()
+    options = OptionHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    def series(df):
+        return {"t": [int(ts.timestamp()) for ts in df.index], "o": df['open'].tolist(), "h": df['high'].tolist(),
+                "l": df['low'].tolist(), "c": df['close'].tolist(), "v": df['volume'].tolist()}
+
+    fixtures = {"source": f"recorded {now.isoformat()}", "bars_15m": {}, "bars_1d": {}, "latest_prices": {},
+                "option_chains": {}, "option_quotes": {}}
+
+    intraday = stocks.get_stock_bars(StockBarsRequest(symbol_or_symbols=STOCK_SYMBOLS, timeframe=TimeFrame(15, TimeFrameUnit.Minute),
+                                                      start=now - datetime.timedelta(days=20))).df
+    daily = stocks.get_stock_bars(StockBarsRequest(symbol_or_symbols=STOCK_SYMBOLS, timeframe=TimeFrame.Day,
+                                                   start=now - datetime.timedelta(days=600))).df
+    crypto_daily = crypto.get_crypto_bars(CryptoBarsRequest(symbol_or_symbols=CRYPTO_SYMBOLS, timeframe=TimeFrame.Day,
+                                                            start=now - datetime.timedelta(days=DAILY_BARS))).df
+    for symbol in STOCK_SYMBOLS:
+        fixtures["bars_15m"][symbol] = series(intraday.xs(symbol).tail(INTRADAY_BARS))
+        fixtures["bars_1d"][symbol] = series(daily.xs(symbol).tail(DAILY_BARS))
+        fixtures["latest_prices"][symbol] = fixtures["bars_15m"][symbol]["c"][-1]
+    for symbol in CRYPTO_SYMBOLS:
+        fixtures["bars_1d"][symbol] = series(crypto_daily.xs(symbol))
+        fixtures["bars_15m"][symbol] = fixtures["bars_1d"][symbol]
+        fixtures["latest_prices"][symbol] = fixtures["bars_1d"][symbol]["c"][-1]
+
+    for root in OPTION_UNDERLYINGS:
+        req = GetOptionContractsRequest(underlying_symbols=[root], status="active",
+                                        expiration_date_gte=now.date() + datetime.timedelta(days=25),
+                                        expiration_date_lte=now.date() + datetime.timedelta(days=45), limit=1000)
+        contracts = trading.get_option_contracts(req).option_contracts
+        fixtures["option_chains"][root] = [
+            {"symbol": c.symbol, "strike_price": float(c.strike_price), "type": getattr(c.type, 'value', str(c.type)),
+             "expiration_date": str(c.expiration_date), "underlying_symbol": root} for c in contracts
+        ]
+        symbols = [c.symbol for c in contracts]
+        for i in range(0, len(symbols), 100):
+            quotes = options.get_option_latest_quote(OptionLatestQuoteRequest(symbol_or_symbols=symbols[i:i + 100]))
+            for sym, q in quotes.items():
+                fixtures["option_quotes"][sym] = (float(q.bid_price), float(q.ask_price))
+
+    fixtures["positions"] = [
+        {"symbol": p.symbol, "asset_class": getattr(p.asset_class, 'value', str(p.asset_class)), "qty": p.qty,
+         "side": getattr(p.side, 'value', str(p.side)), "avg_entry_price": p.avg_entry_price,
+         "current_price": p.current_price, "market_value": p.market_value, "unrealized_pl": p.unrealized_pl}
+        for p in trading.get_all_positions()
+    ]
+    account = trading.get_account()
+    fixtures["account"] = {"equity": account.equity, "portfolio_value": account.portfolio_value,
+                           "buying_power": account.buying_power, "cash": account.cash}
+
+    query = "SELECT * FROM trades, crypto_trades, survivor_trades, wheel_trades, condor_trades WHERE time > now() - 30d"
+    fixtures["influx_trades"] = requests.get(f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/query",
+                                             params={'db': config.INFLUX_DB_NAME, 'q': query, 'epoch': 's'}, timeout=30).json()
+    save(fixtures, RECORDED_FILE)
+    return fixtures
+
+# --- STORAGE ---
+def save(fixtures, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt') as f:
+        json.dump(fixtures, f)
+    print(f"  -> Saved fixtures to {path}")
+
+def load_fixtures():
+    for path in (RECORDED_FILE, SYNTHETIC_FILE):
+        if os.path.exists(path):
+            with gzip.open(path, 'rt') as f:
+                fixtures = json.load(f)
+            fixtures["option_quotes"] = {k: tuple(v) for k, v in fixtures["option_quotes"].items()}
+            return fixtures
+    return generate_synthetic()
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "generate"
+    if command == "record":
+        record()
+    else:
+        save(generate_synthetic(), SYNTHETIC_FILE)
@@ -0,0 +1,227 @@
+"""
+Offline benchmark suite: one scan-loop iteration per bot against fake clients.
+
+    python -m benchmarks.run_benchmarks                       # All bots, default sizes
+    python -m benchmarks.run_benchmarks --bots trend_bot --sizes 6 50 500
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/A.json benchmarks/results/B.json
+
+Each run is saved to benchmarks/results/<timestamp>-<git sha>.json.
+"""
+import os
+import io
+import sys
+import json
+import time
+import types
+import shutil
+import argparse
+import datetime
+import tempfile
+import importlib
+import contextlib
+import statistics
+import subprocess
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [6, 25, 100, 500]
+LOOP_SLEEP_THRESHOLD = 5   # sleeps shorter than this (order legging) are skipped, longer ones end the cycle
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+def _install_offline_config():
+    """The bots import config.py at module level; give them inert values if it is absent."""
+    try:
+        import config  # noqa: F401
+        return
+    except ImportError:
+        pass
+    stub = types.ModuleType("config")
+    stub.API_KEY = stub.SECRET_KEY = "BENCHMARK"
+    stub.PAPER = True
+    stub.INFLUX_HOST, stub.INFLUX_PORT, stub.INFLUX_DB_NAME = "localhost", 8086, "benchmark"
+    for hook in ("WEBHOOK_URL", "WEBHOOK_TREND", "WEBHOOK_WHEEL", "WEBHOOK_CONDOR",
+                 "WEBHOOK_CRYPTO", "WEBHOOK_MOONBAG", "WEBHOOK_OVERSEER"):
+        setattr(stub, hook, "YOUR_WEBHOOK_HERE")
+    sys.modules["config"] = stub
+
+_install_offline_config()
+
+from benchmarks import fakes, fixtures as fixture_store  # noqa: E402
+
+class CycleComplete(BaseException):
+    """Raised from the patched time.sleep to end a bot loop (not caught by `except Exception`)."""
+
+def _fake_sleep(seconds):
+    if seconds >= LOOP_SLEEP_THRESHOLD:
+        raise CycleComplete()
+
+# --- PER-BOT SETUP ---
+def _stock_universe(fx, n):
+    base = [s for s in fx["bars_15m"] if "/" not in s]
+    return (base + [f"SYN{i:03d}" for i in range(max(0, n - len(base)))])[:n]
+
+def _crypto_universe(fx, n):
+    base = [s for s in fx["bars_1d"] if "/" in s]
+    return (base + [f"C{i:03d}/USD" for i in range(max(0, n - len(base)))])[:n]
+
+def _wire(module, fx, positions=None):
+    module.trading_client = fakes.FakeTradingClient(fx, positions)
+    if hasattr(module, "data_client"):
+        crypto = module.__name__.startswith("crypto")
+        module.data_client = fakes.FakeCryptoDataClient(fx) if crypto else fakes.FakeStockDataClient(fx)
+    if hasattr(module, "option_data_client"):
+        module.option_data_client = fakes.FakeOptionDataClient(fx)
+    module.requests = fakes.FakeRequests(fx)
+
+def setup_survivor(module, fx, n):
+    _wire(module, fx)
+    module.CORE_WATCHLIST = _stock_universe(fx, n)
+    module.get_dynamic_targets = lambda: []
+
+def setup_trend(module, fx, n):
+    _wire(module, fx)
+    symbols = _stock_universe(fx, n)
+    module.get_targets = lambda: symbols
+    module.get_market_regime = lambda: "BULL_TREND"
+
+def setup_grid(module, fx, n):
+    _wire(module, fx)
+
+def setup_breakout(module, fx, n):
+    _wire(module, fx)
+    module.SYMBOLS = _crypto_universe(fx, n)
+    module.STREAMING = False   # Poll the fake client instead of opening a websocket
+
+def setup_wheel(module, fx, n):
+    _wire(module, fx)
+    module.WATCHLIST = _stock_universe(fx, n)
+
+def setup_condor(module, fx, n):
+    _wire(module, fx)
+    module.TARGETS = _stock_universe(fx, n)
+
+def setup_accountant(module, fx, n):
+    symbols = _stock_universe(fx, n)
+    positions = [fixture_store.make_position(s, "us_equity", 10, fx["latest_prices"].get(s, 100.0)) for s in symbols]
+    _wire(module, fx, positions)
+
+def setup_analyst(module, fx, n):
+    _wire(module, fx)
+
+# (module, loop entry point, setup, scales with watchlist size)
+CASES = {
+    "survivor_bot": ("survivor_bot", "run_survivor_bot", setup_survivor, True),
+    "trend_bot": ("trend_bot", "run_trend_bot", setup_trend, True),
+    "crypto_grid": ("crypto_grid", "run_grid_bot", setup_grid, False),
+    "crypto_breakout": ("crypto_breakout", "run_breakout_bot", setup_breakout, True),
+    "wheel_bot": ("wheel_bot", "run_wheel_bot", setup_wheel, True),
+    "condor_bot": ("condor_bot", "run_condor_bot", setup_condor, True),
+    "accountant": ("accountant", "run_accountant", setup_accountant, True),
+    "market_analyst": ("market_analyst", "run_analyst", setup_analyst, False),
+}
+
+# --- EXECUTION ---
+def run_one_cycle(entry):
+    """Runs a bot's `while True` loop until it reaches its first long sleep."""
+    real_sleep = time.sleep
+    time.sleep = _fake_sleep
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            entry()
+    except CycleComplete:
+        pass
+    finally:
+        time.sleep = real_sleep
+
+def benchmark_case(name, fx, size, repeat):
+    module_name, entry_name, setup, _ = CASES[name]
+    module = importlib.import_module(module_name)
+    setup(module, fx, size)
+    entry = getattr(module, entry_name)
+
+    run_one_cycle(entry)   # Warm-up (imports, fixture frame cache)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_one_cycle(entry)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run_one_cycle(entry)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "bot": name, "size": size,
+        "wall_ms_median": statistics.median(timings) * 1000,
+        "wall_ms_min": min(timings) * 1000,
+        "peak_alloc_kb": peak / 1024,
+        "orders": len(module.trading_client.submitted),
+    }
+
+def _git_sha():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return out.stdout.strip() or "nogit"
+    except Exception:
+        return "nogit"
+
+def run_suite(bots, sizes, repeat):
+    fx = fixture_store.load_fixtures()
+    workdir = tempfile.mkdtemp(prefix="fleet_bench_")
+    shutil.copy(os.path.join(REPO_ROOT, "bot_config.template.json"), os.path.join(workdir, "bot_config.json"))
+    cwd = os.getcwd()
+    os.chdir(workdir)   # Bots read/write their JSON state relative to cwd
+    results = []
+    try:
+        print(f"--- ⏱️ FLEET BENCHMARKS (fixtures: {fx.get('source')}) ---")
+        for name in bots:
+            scaled = CASES[name][3]
+            for size in (sizes if scaled else [1]):
+                res = benchmark_case(name, fx, size, repeat)
+                results.append(res)
+                print(f"  {name:<16} n={size:<4} | {res['wall_ms_median']:>9.1f} ms (min {res['wall_ms_min']:.1f}) | peak {res['peak_alloc_kb']:>9.0f} KB")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    sha = _git_sha()
+    path = os.path.join(RESULTS_DIR, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{sha}.json")
+    with open(path, 'w') as f:
+        json.dump({"commit": sha, "created": str(datetime.datetime.now()), "results": results}, f, indent=2)
+    print(f"  -> Saved results to {path}")
+    return path
+
+def compare(base_path, new_path):
+    with open(base_path) as f: base = {(r["bot"], r["size"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f: new = json.load(f)
+
+    print(f"--- COMPARE {os.path.basename(base_path)} -> {os.path.basename(new_path)} ---")
+    for r in new["results"]:
+        old = base.get((r["bot"], r["size"]))
+        if not old: continue
+        dt = (r["wall_ms_median"] - old["wall_ms_median"]) / old["wall_ms_median"] * 100 if old["wall_ms_median"] else 0
+        dm = (r["peak_alloc_kb"] - old["peak_alloc_kb"]) / old["peak_alloc_kb"] * 100 if old["peak_alloc_kb"] else 0
+        print(f"  {r['bot']:<16} n={r['size']:<4} | time {dt:>+7.1f}% | peak alloc {dm:>+7.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline fleet benchmarks")
+    parser.add_argument("--bots", nargs="+", default=list(CASES.keys()), choices=list(CASES.keys()))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        save_results(run_suite(args.bots, args.sizes, args.repeat))
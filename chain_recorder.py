@@ -0,0 +1,371 @@
+"""
+Option chain + quote recorder, and a client that replays the recordings.
+
+wheel_bot and condor_bot wrap their clients with recording(). Every chain,
+option quote and underlying price they fetch is noted, and flush() at the
+end of the cycle appends one snapshot per underlying to SNAPSHOT_DIR/<root>/:
+
+    contracts.bin   symbol, strike, expiry, call   each contract once, ever
+    chains.bin      int32 contract ids             only when the chain changed
+    quotes.bin      contract id, bid, ask          only quotes that changed
+                                                   (all of them every KEYFRAME_EVERY)
+    snapshots.bin   ts, spot, offsets into the above
+
+Files are append-only, and the snapshot row is written last, so a reader
+never sees half a snapshot. They are read through np.memmap.
+ReplayClient.seek(ts) serves the latest snapshot at or before `ts` through
+the calls the bots make (get_option_contracts, get_option_latest_quote,
+get_stock_latest_trade).
+
+    python chain_recorder.py stats
+    python chain_recorder.py replay wheel_bot
+"""
+import os
+import time
+import fcntl
+import argparse
+import datetime
+import threading
+import importlib
+import contextlib
+from types import SimpleNamespace
+import numpy as np
+import pytz
+from alpaca.trading.enums import ContractType
+import config
+import options_math
+
+# --- CONFIGURATION ---
+ENABLED = getattr(config, 'CHAIN_RECORDER_ENABLED', True)
+SNAPSHOT_DIR = "chain_snapshots"
+KEYFRAME_EVERY = 50       # Full quote set every N snapshots bounds the deltas a read has to apply
+TIMEZONE = pytz.timezone('US/Eastern')
+EPOCH = datetime.date(1970, 1, 1)
+
+CONTRACT_DTYPE = np.dtype([("symbol", "S24"), ("strike", "f8"), ("expiry", "i4"), ("call", "?")])
+QUOTE_DTYPE = np.dtype([("contract", "i4"), ("bid", "f4"), ("ask", "f4")])
+SNAPSHOT_DTYPE = np.dtype([("ts", "f8"), ("spot", "f8"), ("chain_start", "i8"), ("chain_len", "i4"),
+                           ("quote_start", "i8"), ("quote_len", "i4"), ("keyframe", "?")])
+FILES = {"contracts": CONTRACT_DTYPE, "chains": np.dtype("i4"), "quotes": QUOTE_DTYPE, "snapshots": SNAPSHOT_DTYPE}
+
+def _root_of(symbol):
+    occ = options_math.parse_occ(symbol)
+    return occ[0] if occ else symbol
+
+def _expiry_days(value):
+    if isinstance(value, str): value = datetime.date.fromisoformat(value)
+    return (value - EPOCH).days
+
+# --- STORAGE ---
+class ChainStore:
+    """One underlying's recordings as read-only memory maps (call refresh() to see newer appends)."""
+    def __init__(self, root, directory=SNAPSHOT_DIR):
+        self.root = root
+        self.path = os.path.join(directory, root)
+        self.refresh()
+
+    def _map(self, name):
+        path = os.path.join(self.path, f"{name}.bin")
+        dtype = FILES[name]
+        count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        if count == 0: return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,))   # Ignores a partly written tail
+
+    def refresh(self):
+        for name in FILES: setattr(self, name, self._map(name))
+        self.snapshots = np.array(self.snapshots)   # Small (one row per snapshot): keep it in memory
+        self._symbols = None
+        self._cursor = None
+        return self
+
+    def symbols(self):
+        if self._symbols is None:
+            self._symbols = {s.decode(): i for i, s in enumerate(self.contracts["symbol"])}
+        return self._symbols
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def index_at(self, ts):
+        """Latest snapshot at or before `ts`, or -1."""
+        return int(np.searchsorted(self.snapshots["ts"], ts, side="right")) - 1
+
+    def chain(self, i):
+        s = self.snapshots[i]
+        return np.asarray(self.chains[s["chain_start"]:s["chain_start"] + s["chain_len"]])
+
+    def quotes_at(self, i):
+        """(bids, asks) over every known contract as of snapshot i (NaN = never quoted)."""
+        if self._cursor is not None and self._cursor[0] <= i:   # Moving forward (replay): only the new deltas
+            first, bids, asks = self._cursor[0] + 1, self._cursor[1], self._cursor[2]
+        else:
+            keyframes = np.flatnonzero(self.snapshots["keyframe"][:i + 1])
+            first = keyframes[-1] if len(keyframes) else 0
+            bids = np.full(len(self.contracts), np.nan, dtype=np.float32)
+            asks = np.full(len(self.contracts), np.nan, dtype=np.float32)
+        starts, lens = self.snapshots["quote_start"], self.snapshots["quote_len"]
+        for j in range(first, i + 1):
+            q = self.quotes[starts[j]:starts[j] + lens[j]]
+            bids[q["contract"]] = q["bid"]
+            asks[q["contract"]] = q["ask"]
+        self._cursor = (i, bids, asks)
+        return bids.copy(), asks.copy()
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in FILES)
+
+@contextlib.contextmanager
+def _locked(path):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "lock"), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try: yield
+        finally: fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _append(path, name, array):
+    with open(os.path.join(path, f"{name}.bin"), 'ab') as f:
+        f.write(np.ascontiguousarray(array, dtype=FILES[name]).tobytes())
+
+_index = {}    # root -> (contracts seen, {symbol: id}) so a write doesn't re-read the whole table
+
+def write_snapshot(root, ts, spot, contracts, quotes, directory=SNAPSHOT_DIR):
+    """
+    Appends one snapshot. `contracts`: {symbol: (strike, expiry days, is_call)} fetched this
+    cycle (empty = chain unchanged); `quotes`: {symbol: (bid, ask)}.
+    """
+    path = os.path.join(directory, root)
+    with _locked(path):
+        store = ChainStore(root, directory)
+        count, index = _index.get(root, (0, {}))
+        if count != len(store.contracts):   # Another process appended (or first write here)
+            index = {s.decode(): i for i, s in enumerate(store.contracts["symbol"])}
+        new = [s for s in contracts if s not in index]
+        if new:
+            rows = np.array([(s.encode(), *contracts[s]) for s in new], dtype=CONTRACT_DTYPE)
+            _append(path, "contracts", rows)
+            for s in new: index[s] = len(index)
+        _index[root] = (len(index), index)
+
+        last = len(store) - 1
+        prev = store.snapshots[last] if last >= 0 else None
+        chain_start, chain_len = (int(prev["chain_start"]), int(prev["chain_len"])) if prev is not None else (len(store.chains), 0)
+        if contracts:
+            ids = np.array(sorted(index[s] for s in contracts), dtype=np.int32)
+            if prev is None or not np.array_equal(ids, store.chain(last)):
+                _append(path, "chains", ids)
+                chain_start, chain_len = len(store.chains), len(ids)
+
+        known = [(index[s], b, a) for s, (b, a) in quotes.items() if s in index]
+        q = np.array(known, dtype=QUOTE_DTYPE) if known else np.zeros(0, dtype=QUOTE_DTYPE)
+        keyframe = len(store) % KEYFRAME_EVERY == 0
+        if last >= 0:
+            bids, asks = store.quotes_at(last)
+            bids = np.concatenate([bids, np.full(len(index) - len(bids), np.nan, dtype=np.float32)])
+            asks = np.concatenate([asks, np.full(len(index) - len(asks), np.nan, dtype=np.float32)])
+            if keyframe:
+                bids[q["contract"]], asks[q["contract"]] = q["bid"], q["ask"]
+                ids = np.flatnonzero(~np.isnan(bids) | ~np.isnan(asks))
+                q = np.zeros(len(ids), dtype=QUOTE_DTYPE)
+                q["contract"], q["bid"], q["ask"] = ids, bids[ids], asks[ids]
+            else:
+                changed = (bids[q["contract"]] != q["bid"]) | (asks[q["contract"]] != q["ask"])
+                q = q[changed]
+        if len(q): _append(path, "quotes", q)
+
+        if spot is None: spot = float(prev["spot"]) if prev is not None else np.nan
+        row = np.array([(ts, spot, chain_start, chain_len, len(store.quotes), len(q), keyframe)], dtype=SNAPSHOT_DTYPE)
+        _append(path, "snapshots", row)
+
+# --- RECORDING (bot side) ---
+_pending = {}
+_pending_lock = threading.Lock()
+
+def _bucket(root):
+    return _pending.setdefault(root, {"contracts": {}, "quotes": {}, "spot": None})
+
+def record_contracts(contracts):
+    with _pending_lock:
+        for c in contracts or []:
+            root = getattr(c, "underlying_symbol", None) or _root_of(c.symbol)
+            is_call = "call" in str(getattr(c.type, "value", c.type)).lower()
+            _bucket(root)["contracts"][c.symbol] = (float(c.strike_price), _expiry_days(c.expiration_date), is_call)
+
+def record_quotes(quotes):
+    with _pending_lock:
+        for symbol, q in (quotes or {}).items():
+            _bucket(_root_of(symbol))["quotes"][symbol] = (float(q.bid_price), float(q.ask_price))
+
+def record_spots(trades):
+    with _pending_lock:
+        for symbol, trade in (trades or {}).items():
+            _bucket(symbol)["spot"] = float(trade.price)
+
+_HOOKS = {
+    "get_option_contracts": lambda result: record_contracts(getattr(result, "option_contracts", None)),
+    "get_option_latest_quote": record_quotes,
+    "get_stock_latest_trade": record_spots,
+}
+
+class RecordingClient:
+    """Proxy that notes the chains, quotes and prices an Alpaca client returns."""
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        hook = _HOOKS.get(name)
+        if hook is None: return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            try: hook(result)
+            except Exception as e: print(f"  [!] Chain recorder: {e}")
+            return result
+        return call
+
+def recording(client):
+    if not ENABLED: return client
+    return RecordingClient(client)
+
+def flush():
+    """Writes this cycle's snapshot for every underlying touched (end of a bot cycle)."""
+    if not ENABLED: return
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    ts = time.time()
+    for root, data in pending.items():
+        if not data["contracts"] and not data["quotes"]: continue   # A bare stock price isn't a chain
+        try:
+            write_snapshot(root, ts, data["spot"], data["contracts"], data["quotes"])
+        except Exception as e:
+            print(f"  [!] Chain snapshot failed for {root}: {e}")
+
+# --- REPLAY ---
+class ReplayClient:
+    """
+    Serves recordings through the option bots' client calls. Expiries are shifted by
+    (today - snapshot date) so bots that size their DTE window from date.today() see
+    each chain exactly as it was on the day it was recorded.
+    """
+    def __init__(self, directory=SNAPSHOT_DIR, roots=None):
+        roots = roots or (sorted(os.listdir(directory)) if os.path.isdir(directory) else [])
+        self.stores = {root: ChainStore(root, directory) for root in roots}
+        self.now = None
+        self._views = {}
+        self._chains = {}   # (root, chain offset, expiry shift) -> contract objects (chains rarely change)
+
+    def timeline(self):
+        """Every recorded snapshot time, across underlyings, in order."""
+        times = [s.snapshots["ts"] for s in self.stores.values() if len(s)]
+        return np.unique(np.concatenate(times)) if times else np.zeros(0)
+
+    def seek(self, ts):
+        self.now = ts
+        self._views = {}
+
+    def _view(self, root):
+        store = self.stores.get(root)
+        if store is None: return None
+        i = store.index_at(self.now if self.now is not None else np.inf)
+        if i < 0: return None
+        if root not in self._views:
+            snap = store.snapshots[i]
+            shift = (datetime.date.today() - datetime.datetime.fromtimestamp(snap["ts"], TIMEZONE).date()).days
+            key = (root, int(snap["chain_start"]), int(snap["chain_len"]), shift)
+            if key not in self._chains:
+                rows = store.contracts[store.chain(i)]
+                self._chains[key] = [SimpleNamespace(symbol=r["symbol"].decode(), underlying_symbol=root, status="active",
+                                                     strike_price=float(r["strike"]),
+                                                     expiration_date=EPOCH + datetime.timedelta(days=int(r["expiry"]) + shift),
+                                                     type=ContractType.CALL if r["call"] else ContractType.PUT) for r in rows]
+            bids, asks = store.quotes_at(i)
+            self._views[root] = {"spot": float(snap["spot"]), "contracts": self._chains[key], "bids": bids, "asks": asks}
+        return self._views[root]
+
+    def _quote(self, symbol):
+        root = _root_of(symbol)
+        view = self._view(root)
+        c = self.stores[root].symbols().get(symbol) if view else None
+        if c is None or c >= len(view["bids"]) or np.isnan(view["bids"][c]): return None
+        return SimpleNamespace(bid_price=float(view["bids"][c]), ask_price=float(view["asks"][c]))
+
+    def get_option_contracts(self, req):
+        out = []
+        for root in req.underlying_symbols or []:
+            view = self._view(root)
+            if view is None: continue
+            for c in view["contracts"]:
+                if req.type is not None and c.type != req.type: continue
+                if req.expiration_date_gte and c.expiration_date < req.expiration_date_gte: continue
+                if req.expiration_date_lte and c.expiration_date > req.expiration_date_lte: continue
+                out.append(c)
+        return SimpleNamespace(option_contracts=out, next_page_token=None)
+
+    def get_option_latest_quote(self, req):
+        symbols = [req.symbol_or_symbols] if isinstance(req.symbol_or_symbols, str) else req.symbol_or_symbols
+        out = {}
+        for s in symbols:
+            quote = self._quote(s)
+            if quote: out[s] = quote
+        return out
+
+    def get_stock_latest_trade(self, req):
+        symbols = [req.symbol_or_symbols] if isinstance(req.symbol_or_symbols, str) else req.symbol_or_symbols
+        out = {}
+        for s in symbols:
+            view = self._view(s)
+            if view and not np.isnan(view["spot"]): out[s] = SimpleNamespace(price=view["spot"])
+        return out
+
+def stats(directory=SNAPSHOT_DIR):
+    replay = ReplayClient(directory)
+    total = 0
+    for root, store in replay.stores.items():
+        if not len(store): continue
+        first, last = (datetime.datetime.fromtimestamp(store.snapshots["ts"][k], TIMEZONE).strftime('%m-%d %H:%M') for k in (0, -1))
+        total += store.nbytes()
+        print(f"  {root:<6} {len(store):>6} snapshots ({first} -> {last}) | {len(store.contracts):>6} contracts | "
+              f"{len(store.quotes):>8} quote rows | {store.nbytes() / 1e6:>7.2f} MB")
+    print(f"  Total: {total / 1e6:.2f} MB")
+
+def replay_bot(bot_name, directory=SNAPSHOT_DIR):
+    """Re-runs the bot's contract selection on every recorded snapshot."""
+    import warmup
+    module = importlib.import_module(bot_name)
+    client = ReplayClient(directory)
+    for attr in ("trading_client", "data_client", "option_data_client"):
+        setattr(module, attr, client)
+    warmup.cached_chain = lambda *args, **kwargs: None   # Chains come from the recording, not today's warm-up
+    roots = [r for r in getattr(module, "WATCHLIST", getattr(module, "TARGETS", [])) if r in client.stores]
+
+    timeline = client.timeline()
+    started = time.perf_counter()
+    for ts in timeline:
+        client.seek(ts)
+        when = datetime.datetime.fromtimestamp(ts, TIMEZONE).strftime('%m-%d %H:%M')
+        for root in roots:
+            spot = module.get_current_price(root)
+            if not spot: continue
+            if bot_name == "wheel_bot":
+                pick = module.find_best_contract(root, "PUT", spot)
+                print(f"  [{when}] {root:<5} ${spot:>8.2f} -> {pick.symbol if pick else '-'}")
+            else:
+                c = module.analyze_underlying(root)
+                pick = f"{c['contracts'][2].symbol} / {c['contracts'][3].symbol} | POP {c['pop']*100:.0f}% | score {c['score']:.3f}" if c else "-"
+                print(f"  [{when}] {root:<5} ${spot:>8.2f} -> {pick}")
+    elapsed = time.perf_counter() - started
+    print(f"  Replayed {len(timeline)} snapshots x {len(roots)} underlyings in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Option chain recordings")
+    parser.add_argument("mode", choices=["stats", "replay"])
+    parser.add_argument("bot", nargs="?", choices=["wheel_bot", "condor_bot"])
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+    if args.mode == "stats":
+        stats(args.dir)
+    elif not args.bot:
+        parser.error("replay needs a bot (wheel_bot or condor_bot)")
+    else:
+        replay_bot(args.bot, args.dir)
@@ -0,0 +1,95 @@
+import os
+import time
+import pickle
+import threading
+import pandas as pd
+
+# --- CONFIGURATION ---
+CHECKPOINT_DIR = "checkpoints"
+FORMAT_VERSION = 1
+
+def _path(bot_name):
+    return os.path.join(CHECKPOINT_DIR, f"{bot_name}.pkl")
+
+# --- SAVE / LOAD ---
+def save(bot_name, state):
+    """Atomically writes a bot's state (write to temp file, then rename over the old one)."""
+    try:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp = _path(bot_name) + ".tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({"version": FORMAT_VERSION, "saved_at": time.time(), "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _path(bot_name))
+    except Exception as e:
+        print(f"  [!] Checkpoint save failed ({bot_name}): {e}")
+
+def load(bot_name, max_age=None):
+    """Returns the saved state, or None if missing, unreadable, from another format, or older than max_age seconds."""
+    path = _path(bot_name)
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        print(f"  [!] Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+    if payload.get("version") != FORMAT_VERSION: return None
+    age = time.time() - payload["saved_at"]
+    if max_age is not None and age > max_age:
+        print(f"  [i] Checkpoint for {bot_name} is {age/3600:.1f}h old - starting cold")
+        return None
+    print(f"  ♻️ Restored {bot_name} checkpoint ({age:.0f}s old)")
+    return payload["state"]
+
+def modified(bot_name):
+    """mtime of the saved state (cheap freshness check before a full load), or None."""
+    try: return os.path.getmtime(_path(bot_name))
+    except OSError: return None
+
+# --- BAR CACHE ---
+class BarCache:
+    """
+    Per-symbol bar history that survives restarts. Bots fetch only the gap since
+    the last cached bar and merge it in; the newest cached bar is re-fetched too,
+    since it may still have been forming when it was saved.
+    """
+    def __init__(self, max_bars, frames=None):
+        self.max_bars = max_bars
+        self.frames = dict(frames or {})
+        self.lock = threading.Lock()
+
+    def gap_start(self, symbol):
+        """Timestamp to fetch from, or None if the symbol has no history (fetch the full lookback)."""
+        df = self.frames.get(symbol)
+        if df is None or df.empty: return None
+        return df.index[-1].to_pydatetime()
+
+    def merge(self, symbol, new_df):
+        """Appends freshly fetched bars (newer rows win) and returns the full trimmed history."""
+        with self.lock:
+            old = self.frames.get(symbol)
+            if old is not None and not old.empty and new_df is not None and not new_df.empty:
+                df = pd.concat([old[old.index < new_df.index[0]], new_df])
+            else:
+                df = new_df if new_df is not None and not new_df.empty else old
+            if df is None: return None
+            df = df.iloc[-self.max_bars:]
+            self.frames[symbol] = df
+            return df.copy()
+
+    def retain(self, symbols):
+        """Drops symbols no longer watched so checkpoints don't grow forever."""
+        with self.lock:
+            keep = set(symbols)
+            self.frames = {s: df for s, df in self.frames.items() if s in keep}
+
+    def state(self):
+        with self.lock:
+            return {"max_bars": self.max_bars, "frames": dict(self.frames)}
+
+    @classmethod
+    def restore(cls, state, max_bars):
+        """Rebuilds a cache from `state()` output (or an empty one if there is none)."""
+        if not state: return cls(max_bars)
+        return cls(max_bars, state.get("frames"))
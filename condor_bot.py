@@ -1,7 +1,19 @@
 import utils
+import order_registry
+import pre_trade_risk
+import market_calendar
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import options_math
+import chain_recorder
+import warmup
+import watchlists
 import time
 import datetime
+import concurrent.futures
+import numpy as np
 import requests
 import math
 from alpaca.trading.client import TradingClient
@@ -11,28 +23,40 @@ from alpaca.data.historical import StockHistoricalDataClient, OptionHistoricalDa
 from alpaca.data.requests import StockLatestTradeRequest, OptionLatestQuoteRequest
 
 # --- CONFIGURATION ---
-TARGETS = ["COIN", "MSTR", "TSLA", "NVDA", "NFLX"] 
-MIN_DTE = 25              # Days to Expiration (Start)
-MAX_DTE = 45              # Days to Expiration (End)
+TARGETS = watchlists.CONDOR_ROOTS
+MIN_DTE, MAX_DTE = watchlists.CONDOR_DTE   # Days to Expiration (window)
 WING_WIDTH_PCT = 0.05     # How wide the spread wings are (Protection)
-SHORT_OTM_PCT = 0.08      # Sell the "Body" 8% away from price (~20 Delta)
+SHORT_OTM_PCT = 0.08      # Fallback: sell the "Body" 8% away from price when quotes are missing
+SHORT_DELTA = 0.20        # Sell the "Body" at ~20 Delta
+DELTA_TOLERANCE = 0.04    # Within this band, prefer the richest premium per day
 TAKE_PROFIT_PCT = 0.50    # Close spread at 50% profit
 MAX_POSITIONS = 3         # Don't overleverage
+MIN_CREDIT_RATIO = 0.15   # Skip condors collecting less than this share of the wing width
+MIN_POP = 0.50            # ...or with less than this probability of expiring between the breakevens
+LEG_DELAY = 0.25          # Seconds between legs (each submit already waits for the broker's ack)
+WING_FILL_TIMEOUT = 30    # Seconds to wait for both wings to fill before the body is sold
+FILL_POLL_INTERVAL = 1
+ANALYSIS_WORKERS = getattr(config, 'CONDOR_ANALYSIS_WORKERS', 5)    # Underlyings analysed at once (requests go through the rate limiter)
+ANALYSIS_DEADLINE = getattr(config, 'CONDOR_ANALYSIS_DEADLINE', 60) # Seconds; late underlyings wait for the next cycle
 
 # --- CLIENTS ---
-trading_client = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
-option_data_client = OptionHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading"))
+data_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data"))
+option_data_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(OptionHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "option_data"))
+
+analysis_pool = concurrent.futures.ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="condor_scan")
 
 # --- WEBHOOK (Reuse Wheel or generic) ---
 WEBHOOK_URL = getattr(config, 'WEBHOOK_CONDOR') 
 
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in WEBHOOK_URL: return
     try:
         requests.post(WEBHOOK_URL, json={"content": msg, "username": "Condor Bot 🦅"})
     except: pass
 
+@instrument.timed("influx_write")
 def log_to_influx(action, symbol, price, detail):
     try:
         data_str = f'condor_trades,symbol={symbol} price={price},action="{action}",detail="{detail}"'
@@ -54,8 +78,11 @@ def get_option_price(symbol, side="bid"):
         return float(res[symbol].bid_price) if side == "bid" else float(res[symbol].ask_price)
     except: return 0.0
 
-def find_strike(symbol, type, expiry_start, expiry_end, target_price, is_buy=False):
-    """Finds the contract closest to the target price."""
+def get_chain(symbol, type, expiry_start, expiry_end):
+    cached = warmup.cached_chain(symbol, type, expiry_start, expiry_end) # Pre-open warm-up, if it covers this window
+    if cached is not None:
+        chain_recorder.record_contracts(cached)
+        return cached
     req = GetOptionContractsRequest(
         underlying_symbols=[symbol],
         status="active",
@@ -65,13 +92,17 @@ def find_strike(symbol, type, expiry_start, expiry_end, target_price, is_buy=Fal
         limit=1000
     )
     try:
-        contracts = trading_client.get_option_contracts(req).option_contracts
-    except: return None
+        return trading_client.get_option_contracts(req).option_contracts
+    except: return []
 
+@instrument.timed("find_strike")
+def find_strike(contracts, target_price, expiration=None):
+    """Finds the contract closest to the target price (optionally on one expiry)."""
     best_contract = None
     best_diff = float('inf')
 
     for c in contracts:
+        if expiration and c.expiration_date != expiration: continue
         strike = float(c.strike_price)
         diff = abs(strike - target_price)
         if diff < best_diff:
@@ -80,22 +111,191 @@ def find_strike(symbol, type, expiry_start, expiry_end, target_price, is_buy=Fal
     
     return best_contract
 
+@instrument.timed("find_short_strike")
+def find_short_strike(contracts, type, price):
+    """Picks the short body by SHORT_DELTA (batched quotes, vectorized Greeks), else by SHORT_OTM_PCT."""
+    otm = [c for c in contracts
+           if (type == "PUT" and float(c.strike_price) < price) or (type == "CALL" and float(c.strike_price) > price)]
+    if otm:
+        bids, asks = options_math.fetch_quotes(option_data_client, [c.symbol for c in otm])
+        chain = options_math.analyze_chain(otm, price, bids, asks)
+        idx = options_math.select_by_delta(chain, SHORT_DELTA, DELTA_TOLERANCE, min_premium=0.05)
+        if idx is not None:
+            print(f"       {type} body Δ {chain['delta'][idx]:.2f} @ {otm[idx].strike_price} (IV {chain['iv'][idx]*100:.0f}%)")
+            return otm[idx]
+
+    target = price * (1 - SHORT_OTM_PCT) if type == "PUT" else price * (1 + SHORT_OTM_PCT)
+    return find_strike(contracts, target)
+
+@instrument.timed("analyze_underlying")
+def analyze_underlying(ticker):
+    """
+    Prices the best condor on one underlying: ~SHORT_DELTA bodies, WING_WIDTH_PCT wings, one
+    batched quote for the four legs. Returns a candidate dict (spot, legs, limits, credit, width,
+    credit_ratio, pop, score) or None.
+    """
+    price = get_current_price(ticker)
+    if price == 0: return None
+    start_date = datetime.date.today() + datetime.timedelta(days=MIN_DTE)
+    end_date = datetime.date.today() + datetime.timedelta(days=MAX_DTE)
+
+    puts = get_chain(ticker, "PUT", start_date, end_date)
+    calls = get_chain(ticker, "CALL", start_date, end_date)
+    # The put body picks the expiry; the call body and both wings are taken from that same expiry
+    put_short = find_short_strike(puts, "PUT", price)
+    call_short = put_long = call_long = None
+    if put_short:
+        expiry = put_short.expiration_date
+        call_short = find_short_strike([c for c in calls if c.expiration_date == expiry], "CALL", price)
+        put_long = find_strike(puts, float(put_short.strike_price) - price * WING_WIDTH_PCT, expiry)
+    if call_short:
+        call_long = find_strike(calls, float(call_short.strike_price) + price * WING_WIDTH_PCT, call_short.expiration_date)
+    if not (put_short and put_long and call_short and call_long):
+        print(f"    {ticker}: failed to find all 4 legs.")
+        return None
+    if not float(put_long.strike_price) < float(put_short.strike_price) < float(call_short.strike_price) < float(call_long.strike_price):
+        print(f"    {ticker}: no strikes beyond the body for the wings.")   # Edge of the chain
+        return None
+
+    # Long wings first (legging order), then the short body
+    contracts = [put_long, call_long, put_short, call_short]
+    bids, asks = options_math.fetch_quotes(option_data_client, [c.symbol for c in contracts])
+    limits = [asks[0], asks[1], bids[2], bids[3]]   # Pay the ask on wings, take the bid on the body
+    credit = limits[2] + limits[3] - limits[0] - limits[1]
+    width = max(float(put_short.strike_price) - float(put_long.strike_price),
+                float(call_long.strike_price) - float(call_short.strike_price))
+    if width <= 0 or not np.all(np.isfinite(limits)) or min(limits) <= 0 or credit <= 0:
+        print(f"    {ticker}: no usable credit at current quotes.")
+        return None
+
+    # POP: lognormal odds of finishing between the breakevens, at the bodies' implied vol
+    chain = options_math.analyze_chain(contracts, price, bids, asks)
+    vol = np.nanmean(chain["iv"][2:])
+    if not np.isfinite(vol): return None
+    years = max(chain["dte"][2] / 365.0, options_math.MIN_YEARS)
+    breakevens = np.array([float(put_short.strike_price) - credit, float(call_short.strike_price) + credit])
+    d2 = (np.log(price / breakevens) + (options_math.RISK_FREE_RATE - 0.5 * vol * vol) * years) / (vol * np.sqrt(years))
+    above = options_math.norm_cdf(d2)
+    pop = float(above[0] - above[1])
+
+    return {
+        "symbol": ticker, "spot": price, "contracts": contracts, "limits": limits,
+        "credit": credit, "width": width, "credit_ratio": credit / width, "pop": pop,
+        "score": credit / width * pop, "decided_at": time.time(),
+    }
+
+def rank_candidates(tickers):
+    """
+    Analyses the underlyings on the worker pool and returns the viable condors, best score first.
+    Underlyings still pending at the deadline are dropped for this cycle.
+    """
+    candidates = []
+    futures = {analysis_pool.submit(analyze_underlying, t): t for t in tickers}
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=ANALYSIS_DEADLINE):
+            try:
+                c = future.result()
+            except Exception as e:
+                print(f"    ⚠️ {futures[future]} analysis failed: {e}")
+                continue
+            if c is None: continue
+            print(f"    {c['symbol']:<5} ${c['spot']:>8.2f} | credit ${c['credit']:.2f} / width ${c['width']:.2f} "
+                  f"({c['credit_ratio']*100:.0f}%) | POP {c['pop']*100:.0f}% | score {c['score']:.3f}")
+            if c["credit_ratio"] >= MIN_CREDIT_RATIO and c["pop"] >= MIN_POP:
+                candidates.append(c)
+    except concurrent.futures.TimeoutError:
+        late = [t for f, t in futures.items() if not f.done()]
+        for f in futures: f.cancel()
+        print(f"    ⏱️ Analysis deadline hit ({ANALYSIS_DEADLINE}s) - skipped {', '.join(late)}")
+    candidates.sort(key=lambda c: -c["score"])
+    return candidates
+
+def submit_leg(contract, side, limit_price, decided_at):
+    """One limit leg through the registry. The order, or None if it was skipped or rejected."""
+    limit_price = round(max(float(limit_price), 0.05), 2) # Safety check for bad data
+    print(f"       {side} {contract.strike_price} ({contract.symbol}) @ ${limit_price}")
+    req = LimitOrderRequest(
+        symbol=contract.symbol, qty=1, side=side,
+        time_in_force=TimeInForce.DAY, limit_price=limit_price
+    )
+    try:
+        return order_registry.submit_order(trading_client, "condor_bot", req, ref_price=limit_price, decided_at=decided_at)
+    except Exception as e:
+        print(f"       [!] {contract.symbol} rejected: {e}")
+        return None
+
+def _filled(order):
+    return float(order.filled_qty or 0) >= float(order.qty or 1)
+
+def wait_for_fills(orders):
+    """True once every order is completely filled; False after WING_FILL_TIMEOUT or if one is cancelled/rejected."""
+    pending = [o.id for o in orders if not _filled(o)]
+    deadline = time.monotonic() + WING_FILL_TIMEOUT
+    while pending:
+        if time.monotonic() > deadline: return False
+        time.sleep(FILL_POLL_INTERVAL)
+        for order_id in list(pending):
+            order = trading_client.get_order_by_id(order_id)
+            if _filled(order): pending.remove(order_id)
+            elif str(getattr(order.status, "value", order.status)) in ("canceled", "expired", "rejected"): return False
+    return True
+
+def unwind(candidate, orders, reason):
+    """Aborts a condor: cancels the legs still resting, alerts about any that already filled. Returns False."""
+    print(f"    [ABORT] {candidate['symbol']}: {reason}")
+    stuck = []
+    for order in filter(None, orders):
+        try:
+            trading_client.cancel_order_by_id(order.id)
+            print(f"       Cancelled {order.symbol}")
+        except Exception as e:
+            print(f"       [!] Could not cancel {order.symbol} (already filled?): {e}")
+            stuck.append(order.symbol)
+    order_registry.refresh(trading_client, force=True)
+    send_discord(f"⚠️ **CONDOR ABORTED {candidate['symbol']}**\n{reason}" +
+                 (f"\nLeft open (filled): {', '.join(stuck)}" if stuck else ""))
+    return False
+
+def open_condor(candidate):
+    """
+    Legs in at the analysed quotes: buy both wings and wait until they have filled, then sell the
+    body, so a short leg is never left uncovered. Returns True only with all four legs in;
+    otherwise unwinds what it placed.
+    """
+    put_long, call_long, put_short, call_short = candidate["contracts"]
+    limits = candidate["limits"]
+    wings = []
+    for contract, limit_price in ((put_long, limits[0]), (call_long, limits[1])):
+        wings.append(submit_leg(contract, OrderSide.BUY, limit_price, candidate["decided_at"]))
+        time.sleep(LEG_DELAY)
+    if not all(wings):
+        return unwind(candidate, wings, "a wing was not accepted - not selling an uncovered body.")
+    if not wait_for_fills(wings):
+        return unwind(candidate, wings, f"wings not filled within {WING_FILL_TIMEOUT}s - not selling an uncovered body.")
+
+    bodies = []
+    for contract, limit_price in ((put_short, limits[2]), (call_short, limits[3])):
+        bodies.append(submit_leg(contract, OrderSide.SELL, limit_price, candidate["decided_at"]))
+        time.sleep(LEG_DELAY)
+    if not all(bodies):
+        return unwind(candidate, bodies + wings, "a body leg was not accepted - condor incomplete.")
+    return True
+
 def run_condor_bot():
     print(f"--- 🦅 IRON CONDOR BOT (Range Eater) STARTED ---")
     send_discord("🦅 **Iron Condor Bot Online**\nFeeding on Theta in choppy markets.")
     
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("condor_bot", budget=240)
         try:
             # 1. Market Check
             try:
-                clock = trading_client.get_clock()
-                if not clock.is_open:
-                    print("Market Closed. Sleeping...", end='\r')
-                    time.sleep(60)
-                    continue
+                if market_calendar.sleep_until_open(trading_client, "condor_bot"): continue
             except: pass
 
             positions = trading_client.get_all_positions()
+            order_registry.refresh(trading_client) # Legs still resting count as taken
   # [FIX] Only count positions that belong to Condor Bot
             condor_positions = 0
             active_tickers = set()
@@ -114,6 +314,9 @@ def run_condor_bot():
                         condor_positions += 1
                         active_tickers.add(root)
 
+            # Condors still legging in (orders resting) count against MAX_POSITIONS too
+            active_tickers |= {o["root"] for o in order_registry.open_orders("condor_bot") if o["option"]}
+
             print(f"\n[{datetime.datetime.now().strftime('%H:%M')}] Scanning (Active Condors: {len(active_tickers)}/{MAX_POSITIONS})...")
             # --- MANAGEMENT: Check Existing Spreads ---
             # Simplified Management: We treat all options for a ticker as one "Unit" for display,
@@ -139,88 +342,40 @@ def run_condor_bot():
                                 symbol=p.symbol, qty=abs(int(qty)), side=OrderSide.BUY,
                                 time_in_force=TimeInForce.DAY, limit_price=limit
                             )
-                            trading_client.submit_order(order_data=req)
-                            send_discord(f"💰 **CONDOR PROFIT**\nClosed {p.symbol} @ {profit_pct*100:.0f}% Gain")
-                            log_to_influx("close_leg", p.symbol, limit, "Take Profit")
+                            if order_registry.submit_order(trading_client, "condor_bot", req, ref_price=limit):
+                                send_discord(f"💰 **CONDOR PROFIT**\nClosed {p.symbol} @ {profit_pct*100:.0f}% Gain")
+                                log_to_influx("close_leg", p.symbol, limit, "Take Profit")
 
-            # --- ENTRY: Find New Condors ---
-            if len(active_tickers) >= MAX_POSITIONS:
+            # --- ENTRY: Rank condors on every free underlying, open the best ---
+            slots = MAX_POSITIONS - len(active_tickers)
+            if slots <= 0:
                 print("    Max positions reached. Skipping entry.")
             else:
-                for ticker in TARGETS:
-                    if ticker in active_tickers: continue
-                    
-                    price = get_current_price(ticker)
-                    if price == 0: continue
-                    
-                    print(f"  Analysing {ticker} (${price:.2f})...")
-                    
-                    # Calculate Strikes
-                    # Short Put (Body): Price - 8%
-                    # Long Put (Wing): Price - 13%
-                    # Short Call (Body): Price + 8%
-                    # Long Call (Wing): Price + 13%
-                    
-                    put_short_price = price * (1 - SHORT_OTM_PCT)
-                    put_long_price = price * (1 - (SHORT_OTM_PCT + WING_WIDTH_PCT))
-                    call_short_price = price * (1 + SHORT_OTM_PCT)
-                    call_long_price = price * (1 + (SHORT_OTM_PCT + WING_WIDTH_PCT))
-                    
-                    start_date = datetime.date.today() + datetime.timedelta(days=MIN_DTE)
-                    end_date = datetime.date.today() + datetime.timedelta(days=MAX_DTE)
-                    
-                    # Fetch Contracts
-                    put_short = find_strike(ticker, "PUT", start_date, end_date, put_short_price)
-                    put_long = find_strike(ticker, "PUT", start_date, end_date, put_long_price)
-                    call_short = find_strike(ticker, "CALL", start_date, end_date, call_short_price)
-                    call_long = find_strike(ticker, "CALL", start_date, end_date, call_long_price)
-                    
-                    if not (put_short and put_long and call_short and call_long):
-                        print("    -> Failed to find all 4 legs.")
-                        continue
-                        
-                    # Execution: "Legging In" (Safest Order: Buy Wings First -> Sell Body)
-                    # This ensures you have the collateral (Buying Power) before selling.
-                    
-                    print(f"    -> 🦅 FOUND CONDOR! Sending Orders...")
+                candidates = rank_candidates([t for t in TARGETS if t not in active_tickers])
 
-                    if not utils.check_budget("condor_bot", trading_client):
-                        print("    [SKIP] Condor Budget Exceeded.")
-                        break # Skip this opportunity
-                    
-                    legs = [
-                        (put_long, "PUT", OrderSide.BUY, "Long Wing"),
-                        (call_long, "CALL", OrderSide.BUY, "Long Wing"),
-                        (put_short, "PUT", OrderSide.SELL, "Short Body"),
-                        (call_short, "CALL", OrderSide.SELL, "Short Body")
-                    ]
-                    
-                    for contract, type, side, desc in legs:
-                        # Get Price
-                        limit_price = get_option_price(contract.symbol, "ask" if side == OrderSide.BUY else "bid")
-                        
-                        # Safety check for bad data
-                        if limit_price <= 0.01: limit_price = 0.05 
-                        
-                        print(f"       {side} {type} {contract.strike_price} @ ${limit_price}")
-                        req = LimitOrderRequest(
-                            symbol=contract.symbol, qty=1, side=side,
-                            time_in_force=TimeInForce.DAY, limit_price=limit_price
-                        )
-                        trading_client.submit_order(order_data=req)
-                        time.sleep(1) # Small delay to ensure sequence
-                    
-                    send_discord(f"🦅 **OPENED CONDOR {ticker}**\nRange: ${put_short.strike_price} - ${call_short.strike_price}")
-                    log_to_influx("open_condor", ticker, price, "4 Legs Executed")
-                    
-                    # Stop after opening one to avoid blasting the API
-                    break 
+                # One risk pass over the ranking: max loss is the wider wing (per share), funded best first
+                proposals = [dict(c, qty=1, price=c["width"], multiplier=100) for c in candidates]
+                approved = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client, positions=positions), "condor_bot", proposals)
+                pre_trade_risk.log_decisions("condor_bot", approved)
+
+                for c in [a for a in approved if a["qty"] >= 1]:
+                    if slots <= 0: break
+                    put_short, call_short = c["contracts"][2], c["contracts"][3]
+                    print(f"    -> 🦅 OPENING CONDOR {c['symbol']} (score {c['score']:.3f})")
+                    if not open_condor(c): continue # Wings refused: the slot goes to the next candidate
+                    slots -= 1
+                    send_discord(f"🦅 **OPENED CONDOR {c['symbol']}**\nRange: ${put_short.strike_price} - ${call_short.strike_price}\n"
+                                 f"Credit: ${c['credit']:.2f} / ${c['width']:.2f} wide | POP {c['pop']*100:.0f}%")
+                    log_to_influx("open_condor", c["symbol"], c["spot"], f"credit {c['credit']:.2f} width {c['width']:.2f} pop {c['pop']:.2f}")
 
-            time.sleep(1800) # Check every 30 mins
+            chain_recorder.flush() # This cycle's chains + quotes, for offline replay
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("condor_bot")
+            heartbeat.sleep("condor_bot", 1800) # Check every 30 mins
 
         except Exception as e:
             print(f"Critical Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("condor_bot", 60)
 
 if __name__ == "__main__":
     run_condor_bot()
\ No newline at end of file
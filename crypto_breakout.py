@@ -1,5 +1,6 @@
 from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoBarsRequest
+from alpaca.data.requests import CryptoBarsRequest, CryptoLatestTradeRequest
+from alpaca.data.live import CryptoDataStream
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
@@ -7,95 +8,192 @@ from alpaca.trading.enums import OrderSide, TimeInForce
 import datetime
 import time  # <--- FIXED: Added missing import
 import requests
+import threading
 import pandas as pd
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import checkpoint
+import order_registry
+import pre_trade_risk
 
 # --- CONFIGURATION ---
 SYMBOLS = ["BTC/USD", "ETH/USD", "SOL/USD"] 
 LOOKBACK_ENTRY = 20  # Buy if we break the 20-day high
 LOOKBACK_EXIT = 10   # Sell if we break the 10-day low
 RISK_PCT = 0.10      # Allocate 10% of equity per trade (Aggressive)
+CHECK_INTERVAL = 5           # Seconds between breakout checks against the live price
+ACCOUNT_REFRESH = 3600       # Re-sync equity/positions hourly (fills are tracked locally in between)
+STREAM_STALE_SECONDS = 60    # Fall back to polling a symbol if the stream is quieter than this
+# The local simulator only speaks HTTP, so stream only when talking to Alpaca itself
+STREAMING = getattr(config, 'BREAKOUT_STREAMING', getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None) is None)
 
 # --- CLIENTS ---
-trading_client = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
-data_client = CryptoHistoricalDataClient()
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(CryptoHistoricalDataClient(url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 
+@instrument.timed("discord")
 def send_discord(msg):
     try:
         # FIXED: Using the specific Moon Bag webhook
         payload = {"content": msg, "username": "MoonBag Bot 🚀"}
         # Checks if the specific key exists, falls back to default if not
         webhook = getattr(config, 'WEBHOOK_MOONBAG')
-        requests.post(webhook, json=payload)
+        requests.post(webhook, json=payload, timeout=5)
     except Exception as e:
         print(f"[!] Discord Error: {e}")
 
+@instrument.timed("influx_write")
 def log_to_influx(symbol, action, price, qty):
     try:
         data_str = f'breakout_trades,symbol={symbol} price={price},action="{action}",qty={qty}'
         url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
-        requests.post(url, data=data_str)
+        requests.post(url, data=data_str, timeout=2)
     except: pass
 
-def get_donchian_levels(symbol):
+# --- CHANNEL LEVELS (once per daily close) ---
+@instrument.timed("donchian_levels")
+def get_donchian_levels(symbols):
     """
-    Calculates the Donchian Channel (20-day High, 10-day Low).
-    Returns (entry_level, exit_level, current_price)
+    Calculates the Donchian Channel (20-day High, 10-day Low) for every symbol
+    from ONE batched daily-bar request. Returns {symbol: (entry_level, exit_level)}.
     """
     # FIX: Explicitly ask for data starting 60 days ago
     # This ensures we get the full 30-day history we need
     start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=60)
+    today_open = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
 
     req = CryptoBarsRequest(
-        symbol_or_symbols=[symbol],
+        symbol_or_symbols=list(symbols),
         timeframe=TimeFrame.Day,
-        start=start_time,  # <--- Critical Addition
-        limit=30
+        start=start_time  # <--- Critical Addition
     )
     bars = data_client.get_crypto_bars(req)
-    df = bars.df.loc[symbol]
-    
-    # We exclude the 'current' unfinished candle for calculation
-    completed_candles = df.iloc[:-1] 
-    
-    # Safety Check: Do we actually have enough data?
-    if len(completed_candles) < LOOKBACK_ENTRY:
-        print(f"    [!] Not enough history for {symbol} (Got {len(completed_candles)} bars)")
-        return float('nan'), float('nan'), df.iloc[-1]['close']
-
-    entry_high = completed_candles['high'].tail(LOOKBACK_ENTRY).max()
-    exit_low = completed_candles['low'].tail(LOOKBACK_EXIT).min()
-    current_price = df.iloc[-1]['close']
+    frame = bars.df
+
+    levels = {}
+    by_symbol = dict(tuple(frame.groupby(level=0))) if not frame.empty else {}
+    for symbol in symbols:
+        if symbol not in by_symbol:
+            print(f"    [!] No daily bars for {symbol}")
+            continue
+        df = by_symbol[symbol].droplevel(0)
+
+        # We exclude the 'current' unfinished candle for calculation
+        completed_candles = df[df.index < today_open] if df.index[-1] >= today_open else df.iloc[:-1]
+        
+        # Safety Check: Do we actually have enough data?
+        if len(completed_candles) < LOOKBACK_ENTRY:
+            print(f"    [!] Not enough history for {symbol} (Got {len(completed_candles)} bars)")
+            continue
+
+        entry_high = float(completed_candles['high'].tail(LOOKBACK_ENTRY).max())
+        exit_low = float(completed_candles['low'].tail(LOOKBACK_EXIT).min())
+        levels[symbol] = (entry_high, exit_low)
     
-    return entry_high, exit_low, current_price
+    return levels
+
+# --- LIVE PRICES ---
+class PriceFeed:
+    """
+    Latest trade price per symbol. A CryptoDataStream thread keeps it current;
+    anything the stream hasn't updated recently is polled in one batched request.
+    """
+    def __init__(self, symbols, streaming):
+        self.symbols = list(symbols)
+        self.streaming = streaming
+        self.prices = {}      # symbol -> (price, monotonic time received)
+        self.lock = threading.Lock()
+        self.stream = None
+
+    def start(self):
+        if not self.streaming: return
+        try:
+            self.stream = CryptoDataStream(config.API_KEY, config.SECRET_KEY)
+            self.stream.subscribe_trades(self._on_trade, *self.symbols)
+            threading.Thread(target=self._run_stream, daemon=True, name="moonbag_stream").start()
+            print(f"  📡 Streaming trades for {', '.join(self.symbols)}")
+        except Exception as e:
+            print(f"  [!] Stream unavailable ({e}), polling instead")
+            self.stream = None
+
+    def _run_stream(self):
+        try: self.stream.run()
+        except Exception as e: print(f"  [!] Stream stopped ({e}), polling instead")
+
+    async def _on_trade(self, trade):
+        with self.lock:
+            self.prices[trade.symbol] = (float(trade.price), time.monotonic())
+
+    def latest(self):
+        now = time.monotonic()
+        with self.lock:
+            stale = [s for s in self.symbols if s not in self.prices or now - self.prices[s][1] > STREAM_STALE_SECONDS]
+        if stale:
+            try:
+                res = data_client.get_crypto_latest_trade(CryptoLatestTradeRequest(symbol_or_symbols=stale))
+                with self.lock:
+                    for sym, trade in res.items():
+                        self.prices[sym] = (float(trade.price), now)
+            except Exception as e:
+                print(f"  [!] Price poll failed: {e}")
+        with self.lock:
+            return {s: p for s, (p, _) in self.prices.items()}
 
 def run_breakout_bot():
     print("--- 🚀 MOON BAG BREAKOUT BOT STARTED ---")
     send_discord("🚀 **Moon Bag Bot Online**\nStrategy: Donchian Breakout (20/10)")
+
+    feed = PriceFeed(SYMBOLS, STREAMING)
+    feed.start()
+    levels, levels_day = {}, None
+
+    # Warm start: today's channel levels survive a restart
+    saved = checkpoint.load("moon_bag", max_age=86400)
+    if saved and saved.get("symbols") == SYMBOLS:
+        levels, levels_day = saved["levels"], saved["levels_day"]
+    last_sync = None
     
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("moon_bag", budget=heartbeat.DEFAULT_BUDGET) # Entry cycles can queue behind the fleet-wide rate limiter
         try:
-            account = trading_client.get_account()
-            equity = float(account.equity)
-            buying_power = float(account.buying_power)
-            
-            # Get current positions
-            positions = trading_client.get_all_positions()
-            pos_dict = {p.symbol: float(p.qty) for p in positions}
+            # 1. Channel levels only move when a daily candle closes (00:00 UTC)
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+            if levels_day != today:
+                levels = get_donchian_levels(SYMBOLS)
+                levels_day = today
+                checkpoint.save("moon_bag", {"symbols": SYMBOLS, "levels": levels, "levels_day": levels_day})
+                print(f"\n[{datetime.datetime.now().strftime('%H:%M')}] Daily Levels Updated:")
+                for symbol, (entry_high, exit_low) in levels.items():
+                    print(f"  {symbol:<8} | Breakout: ${entry_high:,.2f} | Stop: ${exit_low:,.2f}")
+
+            # 2. Account + positions (hourly, or right after we trade)
+            if last_sync is None or time.monotonic() - last_sync > ACCOUNT_REFRESH:
+                account = trading_client.get_account()
+                equity = float(account.equity)
+                buying_power = float(account.buying_power)
+                
+                # Get current positions (Alpaca reports crypto as "BTCUSD")
+                positions = trading_client.get_all_positions()
+                pos_dict = {p.symbol.replace("/", ""): float(p.qty) for p in positions}
+                last_sync = time.monotonic()
 
-            print(f"\n[{datetime.datetime.now().strftime('%H:%M')}] Scanning Markets...")
+            # 3. Breakout checks against the live price
+            prices = feed.latest()
 
             for symbol in SYMBOLS:
                 try:
-                    entry_high, exit_low, current_price = get_donchian_levels(symbol)
-                    qty_held = pos_dict.get(symbol, 0)
-                    
-                    print(f"  {symbol:<8} | Price: ${current_price:,.2f} | Breakout: ${entry_high:,.2f} | Stop: ${exit_low:,.2f}")
+                    if symbol not in levels or symbol not in prices: continue
+                    entry_high, exit_low = levels[symbol]
+                    current_price = prices[symbol]
+                    qty_held = pos_dict.get(symbol.replace("/", ""), 0)
 
                     # --- ENTRY LOGIC ---
                     if qty_held == 0:
                         if current_price > entry_high:
-                            print(f"    [SIGNAL] BREAKOUT! Price ${current_price} > ${entry_high}")
+                            print(f"    [SIGNAL] BREAKOUT! {symbol} ${current_price} > ${entry_high}")
                             
                             # Calculate Size
                             target_val = equity * RISK_PCT
@@ -105,13 +203,21 @@ def run_breakout_bot():
                                 print("    [!] Insufficient Buying Power")
                                 continue
 
+                            # Shared crypto pool with crypto_grid: trimmed or blocked by the risk check
+                            check = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client), "moon_bag",
+                                                            [{"symbol": symbol, "qty": round(qty_to_buy, 4), "price": current_price, "fractional": True}])
+                            pre_trade_risk.log_decisions("moon_bag", check)
+                            qty_to_buy = check[0]["qty"]
+                            if qty_to_buy <= 0: continue
+
                             req = MarketOrderRequest(
                                 symbol=symbol,
-                                qty=round(qty_to_buy, 4),
+                                qty=qty_to_buy,
                                 side=OrderSide.BUY,
                                 time_in_force=TimeInForce.GTC
                             )
-                            trading_client.submit_order(order_data=req)
+                            if not order_registry.submit_order(trading_client, "moon_bag", req, ref_price=current_price): continue
+                            last_sync = None # Re-read the filled qty (fees come out of the coin) and buying power next cycle
                             
                             send_discord(f"🚀 **MOONSHOT ENTRY: {symbol}**\nBreakout Price: ${current_price}\nTargeting trends.")
                             log_to_influx(symbol, "buy_breakout", current_price, qty_to_buy)
@@ -119,7 +225,7 @@ def run_breakout_bot():
                     # --- EXIT LOGIC ---
                     elif qty_held > 0:
                         if current_price < exit_low:
-                            print(f"    [SIGNAL] TRAILING STOP! Price ${current_price} < ${exit_low}")
+                            print(f"    [SIGNAL] TRAILING STOP! {symbol} ${current_price} < ${exit_low}")
                             
                             req = MarketOrderRequest(
                                 symbol=symbol,
@@ -127,22 +233,24 @@ def run_breakout_bot():
                                 side=OrderSide.SELL,
                                 time_in_force=TimeInForce.GTC
                             )
-                            trading_client.submit_order(order_data=req)
+                            if not order_registry.submit_order(trading_client, "moon_bag", req, ref_price=current_price): continue
+                            last_sync = None
                             
                             send_discord(f"🛑 **STOP LOSS: {symbol}**\nPrice: ${current_price}\nTrend broken.")
                             log_to_influx(symbol, "sell_breakout", current_price, qty_held)
-                        else:
-                            print(f"    [HOLD] Riding the trend.")
 
                 except Exception as e:
                     print(f"    [!] Error {symbol}: {e}")
 
-            # Sleep for 1 hour (Crypto markets move 24/7)
-            time.sleep(3600)
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("moon_bag")
+
+            # Crypto markets move 24/7 - check every few seconds
+            heartbeat.sleep("moon_bag", CHECK_INTERVAL)
 
         except Exception as e:
             print(f"Global Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("moon_bag", 60)
 
 if __name__ == "__main__":
-    run_breakout_bot()
\ No newline at end of file
+    run_breakout_bot()
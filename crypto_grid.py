@@ -1,6 +1,13 @@
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import checkpoint
+import order_registry
+import pre_trade_risk
 import time
 import requests
+import numpy as np
 from alpaca.trading.client import TradingClient
 from alpaca.trading.enums import OrderSide, TimeInForce
 from alpaca.trading.requests import MarketOrderRequest
@@ -13,6 +20,8 @@ GRID_TOP = 85000         # The "Ceiling" of your consolidation
 GRID_BOTTOM = 70000      # The "Floor" of your consolidation
 GRID_LEVELS = 6          # How many zones to slice it into
 BUDGET_PER_GRID = 50     # How much $ to buy per level (keep it small for testing)
+POLL_INTERVAL = 30       # Seconds between price checks (grid_replay.py measures what faster is worth)
+STATE_MAX_AGE = 3600     # Older zone memory is discarded (price may have wandered anywhere)
 
 # --- CREDENTIALS ---
 API_KEY = config.API_KEY
@@ -26,22 +35,24 @@ INFLUX_PORT = config.INFLUX_PORT
 INFLUX_DB_NAME = config.INFLUX_DB_NAME
 
 # --- CLIENTS ---
-trading_client = TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
-data_client = CryptoHistoricalDataClient()
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(API_KEY, SECRET_KEY, paper=PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(CryptoHistoricalDataClient(url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in DISCORD_URL: return
     try:
-        requests.post(DISCORD_URL, json={"content": msg})
+        requests.post(DISCORD_URL, json={"content": msg}, timeout=5)
     except: pass
 
+@instrument.timed("influx_write")
 def log_to_influx(symbol, action, price, qty):
     """Writes trade data to InfluxDB with error reporting"""
     try:
         measurement = "crypto_trades"
         data_str = f'{measurement},symbol={symbol} price={price},action="{action}",qty={qty}'
         url = f"http://{INFLUX_HOST}:{INFLUX_PORT}/write?db={INFLUX_DB_NAME}"
-        requests.post(url, data=data_str)
+        requests.post(url, data=data_str, timeout=2)
     except Exception as e:
         print(f"  [!] Failed to log to InfluxDB: {e}")
 
@@ -57,6 +68,30 @@ def get_crypto_price(symbol):
         print(f"  [!] Price Error {symbol}: {e}")
         return None
 
+# --- GRID LOGIC (pure - grid_replay.py replays recorded trades through these) ---
+def zone_of(price, bottom=GRID_BOTTOM, top=GRID_TOP, levels=GRID_LEVELS):
+    """0 is the bottom zone, levels - 1 the top; -1 below the range (Danger!), `levels` above it (Moon!)."""
+    if price < bottom: return -1
+    if price > top: return levels
+    return int((price - bottom) / ((top - bottom) / levels))
+
+def zones(prices, bottom=GRID_BOTTOM, top=GRID_TOP, levels=GRID_LEVELS):
+    """zone_of() over an array of prices."""
+    prices = np.asarray(prices, dtype=float)
+    inside = ((prices - bottom) / ((top - bottom) / levels)).astype(int)
+    return np.where(prices < bottom, -1, np.where(prices > top, levels, inside))
+
+def grid_signal(previous_zone, current_zone):
+    """"buy" on a drop into a lower zone, "sell" on a rise, None otherwise (never out of zone -1 / unknown)."""
+    if current_zone == previous_zone or previous_zone == -1: return None
+    return "buy" if current_zone < previous_zone else "sell"
+
+def grid_signals(zone_series, previous_zone=-1):
+    """grid_signal() for consecutive observations: -1 buy, +1 sell, 0 nothing."""
+    zone_series = np.asarray(zone_series)
+    prev = np.concatenate(([previous_zone], zone_series[:-1]))
+    return np.where(prev == -1, 0, np.sign(zone_series - prev))
+
 def run_grid_bot():
     print(f"--- CRYPTO GRID BOT ({SYMBOL}) STARTED ---")
     print(f"Range: ${GRID_BOTTOM} - ${GRID_TOP} | Levels: {GRID_LEVELS}")
@@ -64,43 +99,49 @@ def run_grid_bot():
 
     log_to_influx(SYMBOL, "startup", 0, 0)
 
-    # Calculate Grid Zones
-    zone_size = (GRID_TOP - GRID_BOTTOM) / GRID_LEVELS
     previous_zone = -1 # Start unknown
 
+    # Warm start: remember which zone we were in (only if the grid itself hasn't changed)
+    grid = (SYMBOL, GRID_BOTTOM, GRID_TOP, GRID_LEVELS)
+    saved = checkpoint.load("crypto_grid", max_age=STATE_MAX_AGE)
+    if saved and saved.get("grid") == grid:
+        previous_zone = saved["previous_zone"]
+        print(f"  Resuming from Zone {previous_zone}")
+
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("crypto_grid", budget=heartbeat.DEFAULT_BUDGET) # Buys add a risk snapshot behind the fleet-wide rate limiter
         try:
             price = get_crypto_price(SYMBOL)
             if price is None:
-                time.sleep(60)
+                heartbeat.sleep("crypto_grid", 60)
                 continue
 
-            # Calculate which "Zone" we are in (0 is bottom, 4 is top)
-            if price < GRID_BOTTOM:
-                current_zone = -1 # Below Range (Danger!)
-            elif price > GRID_TOP:
-                current_zone = GRID_LEVELS # Above Range (Moon!)
-            else:
-                current_zone = int((price - GRID_BOTTOM) / zone_size)
+            current_zone = zone_of(price)
 
             print(f"  {SYMBOL} | Price: ${price:,.2f} | Zone: {current_zone} (Prev: {previous_zone})", end='\r')
 
             # --- TRADING LOGIC ---
             # Only trade if we CHANGED zones
-            if current_zone != previous_zone and previous_zone != -1:
+            signal = grid_signal(previous_zone, current_zone)
+            if signal:
 
                 # 1. PRICE DROPPED A ZONE -> BUY (Accumulate)
-                if current_zone < previous_zone:
+                if signal == "buy":
                     print(f"\n    [BUY] Price dropped to Zone {current_zone}")
-                    qty = BUDGET_PER_GRID / price
-                    req = MarketOrderRequest(symbol=SYMBOL, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.GTC)
-                    trading_client.submit_order(order_data=req)
-
-                    send_discord(f"🟢 **GRID BUY {SYMBOL}**\nPrice: ${price:,.2f}\nZone: {current_zone}")
-                    log_to_influx(SYMBOL, "grid_buy", price, qty)
+                    # Shared crypto pool with moon_bag: trimmed or blocked by the risk check
+                    check = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client), "crypto_grid",
+                                                    [{"symbol": SYMBOL, "qty": BUDGET_PER_GRID / price, "price": price, "fractional": True}])
+                    pre_trade_risk.log_decisions("crypto_grid", check)
+                    qty = check[0]["qty"]
+                    if qty > 0:
+                        req = MarketOrderRequest(symbol=SYMBOL, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.GTC)
+                        if order_registry.submit_order(trading_client, "crypto_grid", req, ref_price=price, dedup=False): # One order per zone crossed
+                            send_discord(f"🟢 **GRID BUY {SYMBOL}**\nPrice: ${price:,.2f}\nZone: {current_zone}")
+                            log_to_influx(SYMBOL, "grid_buy", price, qty)
 
                 # 2. PRICE ROSE A ZONE -> SELL (Take Profit)
-                elif current_zone > previous_zone:
+                else:
                     print(f"\n    [SELL] Price rose to Zone {current_zone}")
                     qty_to_sell = BUDGET_PER_GRID / price
                     
@@ -117,7 +158,7 @@ def run_grid_bot():
                     
                     if current_qty_held >= qty_to_sell:
                         req = MarketOrderRequest(symbol=SYMBOL, qty=qty_to_sell, side=OrderSide.SELL, time_in_force=TimeInForce.GTC)
-                        trading_client.submit_order(order_data=req)
+                        order_registry.submit_order(trading_client, "crypto_grid", req, ref_price=price, dedup=False)
 
                         send_discord(f"🔴 **GRID SELL {SYMBOL}**\nPrice: ${price:,.2f}\nZone: {current_zone}")
                         log_to_influx(SYMBOL, "grid_sell", price, qty_to_sell)
@@ -126,13 +167,17 @@ def run_grid_bot():
 
             # Update State
             previous_zone = current_zone
+            checkpoint.save("crypto_grid", {"grid": grid, "previous_zone": previous_zone})
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("crypto_grid")
 
             # Crypto moves fast, check every 30 seconds
-            time.sleep(30)
+            heartbeat.sleep("crypto_grid", POLL_INTERVAL)
 
         except Exception as e:
             print(f"CRITICAL: {e}")
-            time.sleep(60)
+            heartbeat.sleep("crypto_grid", 60)
 
 if __name__ == "__main__":
     run_grid_bot()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Decision-to-fill latency and slippage.
+
+order_registry.submit_order() tags every order with a client_order_id
+("<bot>-<decision ms>-<nonce>") and appends one line to JOURNAL_FILE with
+the decision time and reference price the bot acted on, plus when the
+request left and when the broker acknowledged it. The accountant calls
+collect() each cycle. It pages the closed orders since the oldest pending
+entry (one batched get_orders call per page), matches them by
+client_order_id, and writes one `executions` point per fill:
+
+    decision_to_submit_ms   bot decided -> request sent (scan cadence, risk pass, legging)
+    submit_to_ack_ms        request sent -> broker response
+    ack_to_fill_ms          broker submitted_at -> filled_at (broker clock)
+    slippage_bps            vs the reference price, positive = cost
+
+Every cycle it also writes `execution_stats` per bot and symbol (p50/p95
+latencies and mean slippage over the last STATS_WINDOW fills).
+"""
+import os
+import json
+import time
+import uuid
+import datetime
+import socket
+import collections
+import requests
+from alpaca.trading.requests import GetOrdersRequest
+from alpaca.trading.enums import QueryOrderStatus
+from alpaca.common.enums import Sort
+import config
+import instrument
+
+# --- CONFIGURATION ---
+JOURNAL_FILE = "execution_journal.jsonl"
+STATE_FILE = "execution_state.json"
+PENDING_MAX_AGE = 7 * 86400   # GTC orders can rest for days; give up after a week
+STATS_WINDOW = 200            # Fills per bot/symbol behind execution_stats
+PAGE_SIZE = 500
+MAX_PAGES = 10
+HOSTNAME = socket.gethostname()
+
+_recent = {}                  # (bot, symbol) -> deque of fill metrics (accountant process only)
+
+# --- TAGGING (bot side) ---
+def tag(bot_name, decided_at):
+    return f"{bot_name}-{int(decided_at * 1000)}-{uuid.uuid4().hex[:8]}"
+
+def bot_from_tag(client_order_id):
+    """Bot name from one of our client_order_ids, else None."""
+    parts = (client_order_id or "").rsplit("-", 2)
+    return parts[0] if len(parts) == 3 and parts[1].isdigit() else None
+
+def record_submission(bot_name, order_data, order, ref_price, decided_at, submit_at, ack_at):
+    """Appends the order's journal line (one short O_APPEND write, safe across processes)."""
+    try:
+        entry = {
+            "client_order_id": order_data.client_order_id, "id": str(getattr(order, "id", "")),
+            "bot": bot_name, "symbol": order_data.symbol, "side": str(getattr(order_data.side, "value", order_data.side)),
+            "qty": float(order_data.qty or 0), "ref_price": ref_price, "limit_price": getattr(order_data, "limit_price", None),
+            "decided_at": decided_at, "submit_at": submit_at, "ack_at": ack_at,
+            "broker_submitted_at": order.submitted_at.timestamp() if getattr(order, "submitted_at", None) else None,
+        }
+        with open(JOURNAL_FILE, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        print(f"  [!] Execution journal write failed: {e}")
+
+# --- COLLECTION (accountant side) ---
+def _load_state():
+    try:
+        with open(STATE_FILE, 'r') as f: return json.load(f)
+    except (OSError, ValueError): return {"offset": 0, "pending": {}}
+
+def _save_state(state):
+    tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f: json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+def _read_journal(state):
+    """New journal lines since the last read -> pending."""
+    if not os.path.exists(JOURNAL_FILE): return
+    if os.path.getsize(JOURNAL_FILE) < state["offset"]: state["offset"] = 0   # Rotated
+    with open(JOURNAL_FILE, 'r') as f:
+        f.seek(state["offset"])
+        while True:
+            line = f.readline()
+            if not line.endswith("\n"): break   # Partial write in progress: next time
+            state["offset"] = f.tell()
+            try:
+                entry = json.loads(line)
+                state["pending"][entry["client_order_id"]] = entry
+            except (ValueError, KeyError): continue
+
+def _closed_orders(trading_client, since):
+    orders, after = [], since
+    for _ in range(MAX_PAGES):
+        page = trading_client.get_orders(GetOrdersRequest(status=QueryOrderStatus.CLOSED, after=after,
+                                                          direction=Sort.ASC, limit=PAGE_SIZE))
+        orders.extend(page)
+        if len(page) < PAGE_SIZE: break
+        after = page[-1].submitted_at
+    return orders
+
+def fill_metrics(entry, order):
+    """Latencies (ms) and slippage (bps) for one filled order, or None if it never filled."""
+    if not order.filled_at or not order.filled_avg_price or float(order.filled_qty or 0) <= 0: return None
+    fill = float(order.filled_avg_price)
+    ref = entry.get("ref_price") or entry.get("limit_price")
+    sign = 1 if entry["side"] == "buy" else -1
+    submitted = order.submitted_at.timestamp() if order.submitted_at else entry.get("broker_submitted_at")
+    m = {
+        "decision_to_submit_ms": (entry["submit_at"] - entry["decided_at"]) * 1000,
+        "submit_to_ack_ms": (entry["ack_at"] - entry["submit_at"]) * 1000,
+        "ack_to_fill_ms": (order.filled_at.timestamp() - submitted) * 1000 if submitted else None,
+        "slippage_bps": sign * (fill - float(ref)) / float(ref) * 10000 if ref else None,
+        "fill_price": fill, "qty": float(order.filled_qty),
+    }
+    parts = [m["decision_to_submit_ms"], m["submit_to_ack_ms"], m["ack_to_fill_ms"]]
+    m["decision_to_fill_ms"] = sum(parts) if None not in parts else None
+    return m
+
+def _line(measurement, tags, fields, ts=None):
+    tag_str = ",".join(f"{k}={str(v).replace(' ', '_').replace('/', '')}" for k, v in tags.items())
+    field_str = ",".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}i" for k, v in fields.items() if v is not None)
+    return f"{measurement},{tag_str} {field_str}" + (f" {int(ts * 1e9)}" if ts else "")
+
+def _write(lines):
+    if not lines: return
+    try:
+        url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+        requests.post(url, data="\n".join(lines), timeout=5)
+    except Exception as e:
+        print(f"[!] Execution Metrics Error: {e}")
+
+@instrument.timed("execution_collect")
+def collect(trading_client):
+    """Resolves pending orders against the broker's closed orders and exports the metrics."""
+    state = _load_state()
+    _read_journal(state)
+    pending = state["pending"]
+    lines, now = [], time.time()
+
+    if pending:
+        oldest = min(e.get("broker_submitted_at") or e["submit_at"] for e in pending.values())   # `after` is on the broker clock
+        since = datetime.datetime.fromtimestamp(oldest - 60, datetime.timezone.utc)
+        try:
+            closed = {o.client_order_id: o for o in _closed_orders(trading_client, since)}
+        except Exception as e:
+            print(f"  [!] Fill collection failed: {e}")
+            closed = {}
+        for coid, entry in list(pending.items()):
+            order = closed.get(coid)
+            if order is None:
+                if now - entry["submit_at"] > PENDING_MAX_AGE: del pending[coid]
+                continue
+            del pending[coid]
+            m = fill_metrics(entry, order)
+            if m is None: continue   # Cancelled / expired / rejected unfilled
+            key = (entry["bot"], entry["symbol"])
+            _recent.setdefault(key, collections.deque(maxlen=STATS_WINDOW)).append(m)
+            lines.append(_line("executions", {"host": HOSTNAME, "bot": entry["bot"], "symbol": entry["symbol"], "side": entry["side"]},
+                               m, order.filled_at.timestamp()))
+
+    for (bot, symbol), fills in _recent.items():
+        fields = {"fills": len(fills)}
+        for name in ("decision_to_submit_ms", "submit_to_ack_ms", "ack_to_fill_ms", "decision_to_fill_ms"):
+            values = sorted(f[name] for f in fills if f[name] is not None)
+            if values:
+                fields[f"{name[:-3]}_p50_ms"] = instrument.percentile(values, 50)
+                fields[f"{name[:-3]}_p95_ms"] = instrument.percentile(values, 95)
+        slips = [f["slippage_bps"] for f in fills if f["slippage_bps"] is not None]
+        if slips: fields["slippage_bps_mean"] = sum(slips) / len(slips)
+        lines.append(_line("execution_stats", {"host": HOSTNAME, "bot": bot, "symbol": symbol}, fields))
+
+    _write(lines)
+    _save_state(state)
+    return len(lines)
@@ -1,12 +1,17 @@
 import pandas as pd
 import requests
 import io
+import sys
 import config
+import rollups
+import trade_archive
 from datetime import datetime
 
 # Configuration
 DB_URL = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/query"
 DB_NAME = config.INFLUX_DB_NAME
+TRADE_DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 7   # python export_data.py [trade days] [performance days]
+PERF_DAYS = int(sys.argv[2]) if len(sys.argv) > 2 else 1
 
 def query_influx(query):
     params = {'db': DB_NAME, 'q': query, 'epoch': 's'}
@@ -30,22 +35,33 @@ def query_influx(query):
 
 print(f"--- 📊 EXPORTING DATA FROM {config.INFLUX_HOST} ---")
 
-# 1. Get Trade History (All Bots)
+# 1. Get Trade History (All Bots) - from the Parquet archive, only the days we need
 print("1. Fetching Trade History...")
-measurements = ["trades", "crypto_trades", "survivor_trades", "breakout_trades", "wheel_trades"]
 all_trades = []
 
-for m in measurements:
-    df = query_influx(f"SELECT * FROM {m} WHERE time > now() - 7d")
-    if not df.empty:
-        df['bot_type'] = m
-        all_trades.append(df)
+try:
+    trade_archive.sync_from_influx()
+    archived = trade_archive.read_trades(start=pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=TRADE_DAYS))
+    if not archived.empty:
+        archived = archived.rename(columns={'measurement': 'bot_type'})
+        # Adjust timezone to US/Eastern (approximate for viewing), same as query_influx
+        archived['time'] = archived['time'].dt.tz_localize(None) - pd.Timedelta(hours=5)
+        all_trades.append(archived)
+except Exception as e:
+    print(f"Archive unavailable ({e}), reading Influx directly...")
+    for m in trade_archive.MEASUREMENTS:
+        # Individual fills are needed here, so trades always come from the raw measurement
+        df = query_influx(f"SELECT * FROM {m} WHERE time > now() - {TRADE_DAYS}d")
+        if not df.empty:
+            df['bot_type'] = m
+            all_trades.append(df)
 
 if all_trades:
     final_trades = pd.concat(all_trades).sort_values(by='time', ascending=False)
     # Reorder columns for readability
     cols = ['time', 'symbol', 'action', 'price', 'qty', 'bot_type']
     # Add any extra columns that exist
+    cols = [c for c in cols if c in final_trades.columns]
     remaining = [c for c in final_trades.columns if c not in cols]
     final_trades = final_trades[cols + remaining]
     
@@ -53,11 +69,11 @@ if all_trades:
     final_trades.to_csv(filename, index=False)
     print(f"✅ Saved {len(final_trades)} trades to: {filename}")
 else:
-    print("⚠️ No trades found in the last 7 days.")
+    print(f"⚠️ No trades found in the last {TRADE_DAYS} days.")
 
-# 2. Get Performance Snapshot (Last 24h)
+# 2. Get Performance Snapshot (Last 24h by default; longer ranges read the hourly/daily rollups)
 print("2. Fetching Performance Stats...")
-perf_df = query_influx("SELECT * FROM bot_performance WHERE time > now() - 1d")
+perf_df = query_influx(rollups.query("bot_performance", PERF_DAYS))
 if not perf_df.empty:
     filename_perf = f"bot_performance_{datetime.now().strftime('%Y%m%d')}.csv"
     perf_df.sort_values(by='time', ascending=False).to_csv(filename_perf, index=False)
@@ -0,0 +1,119 @@
+"""
+Symbol sharding for running one bot as several worker processes.
+
+The supervisor (coordinator) starts `workers: N` copies of a bot from
+bot_config.json as pm2 processes <bot>-w0 ... <bot>-w{N-1}, with
+FLEET_WORKER set. Each worker heartbeats into SHARD_DIR/<bot>/ and keeps
+only the symbols that a consistent-hash ring over the live workers
+assigns to it. When a worker stops heartbeating its symbols move to the
+survivors (and only its symbols - everyone else keeps their shard).
+
+Budgets stay global (pre_trade_risk reads the shared account), as do the
+rate limiter and the emergency stop. Without FLEET_WORKER every function
+here is a no-op and the bot scans its whole list.
+
+    python fleet_shard.py status trend_bot     # Live workers and current assignment
+"""
+import os
+import sys
+import json
+import time
+import bisect
+import socket
+import hashlib
+import threading
+import config
+
+# --- CONFIGURATION ---
+SHARD_DIR = getattr(config, 'FLEET_SHARD_DIR', "shards")   # Must be shared storage if workers span hosts
+VNODES = 64            # Ring points per worker (evens out shard sizes)
+HEARTBEAT_INTERVAL = 15
+WORKER_TTL = 60        # A worker silent for this long is dropped from the ring
+WORKER_ID = os.environ.get("FLEET_WORKER")   # e.g. "w0"; unset = unsharded
+HOSTNAME = socket.gethostname()
+
+_heartbeats = {}       # bot -> thread
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    def __init__(self, workers, vnodes=VNODES):
+        points = sorted((_hash(f"{w}#{i}"), w) for w in workers for i in range(vnodes))
+        self.points = [p for p, _ in points]
+        self.workers = [w for _, w in points]
+
+    def owner(self, key):
+        if not self.points: return None
+        return self.workers[bisect.bisect(self.points, _hash(key)) % len(self.points)]
+
+def worker_name(bot_name):
+    """Per-process name for checkpoints and metrics ("trend_bot-w0"), or the bot name when unsharded."""
+    return f"{bot_name}-{WORKER_ID}" if WORKER_ID else bot_name
+
+# --- HEARTBEATS ---
+def _beat_path(bot_name, worker):
+    return os.path.join(SHARD_DIR, bot_name, f"{worker}.json")
+
+def beat(bot_name):
+    os.makedirs(os.path.join(SHARD_DIR, bot_name), exist_ok=True)
+    path = _beat_path(bot_name, WORKER_ID)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({"worker": WORKER_ID, "host": HOSTNAME, "pid": os.getpid(), "ts": time.time()}, f)
+    os.replace(tmp, path)
+
+def start(bot_name):
+    """Starts the heartbeat thread (independent of the bot's loop, which may sleep for a whole bar)."""
+    if not WORKER_ID or bot_name in _heartbeats: return
+    beat(bot_name)
+    def loop():
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try: beat(bot_name)
+            except Exception as e: print(f"  [!] Shard heartbeat failed: {e}")
+    _heartbeats[bot_name] = threading.Thread(target=loop, daemon=True, name="shard_heartbeat")
+    _heartbeats[bot_name].start()
+
+def live_workers(bot_name):
+    folder = os.path.join(SHARD_DIR, bot_name)
+    if not os.path.isdir(folder): return []
+    now, live = time.time(), []
+    for name in os.listdir(folder):
+        if not name.endswith(".json"): continue
+        try:
+            with open(os.path.join(folder, name)) as f: hb = json.load(f)
+        except (OSError, ValueError): continue
+        if now - hb.get("ts", 0) <= WORKER_TTL: live.append(hb["worker"])
+    return sorted(live)
+
+# --- ASSIGNMENT ---
+def assign(symbols, workers):
+    ring = HashRing(workers)
+    return {s: ring.owner(s) for s in symbols}
+
+def filter_symbols(bot_name, symbols):
+    """The subset of `symbols` this worker owns (all of them when unsharded)."""
+    if not WORKER_ID: return list(symbols)
+    start(bot_name)
+    workers = live_workers(bot_name)
+    if WORKER_ID not in workers: workers.append(WORKER_ID)
+    owners = assign(symbols, workers)
+    mine = [s for s in symbols if owners[s] == WORKER_ID]
+    print(f"  🧩 Shard {WORKER_ID}: {len(mine)}/{len(symbols)} symbols ({len(workers)} workers)")
+    return mine
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "status":
+        print("usage: python fleet_shard.py status <bot>")
+        sys.exit(1)
+    bot = sys.argv[2]
+    workers = live_workers(bot)
+    print(f"{bot}: {len(workers)} live workers {workers}")
+    try:
+        with open("active_targets.json") as f: targets = json.load(f).get("targets", [])
+    except (OSError, ValueError): targets = []
+    if workers and targets:
+        owners = assign(targets, workers)
+        for w in workers:
+            print(f"  {w}: {', '.join(s for s in targets if owners[s] == w)}")
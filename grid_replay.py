@@ -0,0 +1,202 @@
+"""
+Replays recorded crypto trades through crypto_grid's zone logic.
+
+Measures what the grid's poll cadence, zone granularity and order type are
+worth on real tape. Every trade (or, when polling, the last trade at each
+poll) goes through crypto_grid.zones() / grid_signals(), vectorized over
+the whole tape. Only the resulting signals are walked one by one, because
+sells depend on inventory. Fills:
+
+    market   first trade >= LATENCY after the decision, +/- SLIPPAGE_BPS, taker fee
+    limit    at the decision price, when a later trade reaches it within LIMIT_TTL, maker fee
+
+Round trips are matched FIFO. Reported per scenario: signals, fills, missed
+limits, round trips, fees, realized/unrealized P&L and end inventory.
+
+    python grid_replay.py fetch --days 2 --out btc_trades.csv
+    python grid_replay.py run btc_trades.csv --polls 0 1 5 30 --fills market limit --levels 6 12
+    python grid_replay.py run --synthetic 2000000
+"""
+import sys
+import json
+import time
+import argparse
+import datetime
+import heapq
+import collections
+import numpy as np
+import pandas as pd
+import crypto_grid
+
+# --- CONFIGURATION ---
+LATENCY = 0.25           # Seconds from decision to a market fill (API round trip)
+SLIPPAGE_BPS = 2.0       # Market orders: paid on top of the first trade after LATENCY
+TAKER_FEE_BPS = 25.0
+MAKER_FEE_BPS = 15.0
+LIMIT_TTL = 300          # Seconds a limit rests before it is cancelled
+DEFAULT_POLLS = [0, 1, 5, crypto_grid.POLL_INTERVAL]   # 0 = streaming (every trade)
+
+# --- TAPE ---
+def load_tape(path):
+    """(timestamps in epoch seconds, prices) from a CSV with timestamp and price columns, sorted by time."""
+    df = pd.read_csv(path)
+    ts = df["timestamp"]
+    if pd.api.types.is_numeric_dtype(ts):
+        ts = ts.to_numpy(dtype=float)
+        if ts.max() > 1e12: ts = ts / 1000.0   # Milliseconds
+    else:
+        ts = pd.to_datetime(ts, utc=True).astype("int64").to_numpy() / 1e9
+    order = np.argsort(ts, kind="stable")
+    return ts[order], df["price"].to_numpy(dtype=float)[order]
+
+def synthetic_tape(n, seed=42, start_price=None, mean_gap=0.2):
+    """Random-walk trades around the middle of the grid (for smoke tests and throughput)."""
+    rng = np.random.default_rng(seed)
+    start_price = start_price or (crypto_grid.GRID_BOTTOM + crypto_grid.GRID_TOP) / 2
+    ts = np.cumsum(rng.exponential(mean_gap, n))
+    prices = start_price * np.exp(np.cumsum(rng.normal(0, 0.00005, n)))
+    return ts, prices
+
+def fetch(symbol, days, out):
+    """Downloads recent trades for `symbol` to a replayable CSV."""
+    from alpaca.data.historical import CryptoHistoricalDataClient
+    from alpaca.data.requests import CryptoTradesRequest
+    end = datetime.datetime.now(datetime.timezone.utc)
+    df = CryptoHistoricalDataClient().get_crypto_trades(
+        CryptoTradesRequest(symbol_or_symbols=symbol, start=end - datetime.timedelta(days=days), end=end)).df
+    df = df.reset_index()
+    pd.DataFrame({"timestamp": df["timestamp"].astype("int64") / 1e9, "price": df["price"], "size": df["size"]}).to_csv(out, index=False)
+    print(f"  -> Saved {len(df):,} {symbol} trades to {out}")
+
+# --- REPLAY ---
+def observe(ts, prices, poll):
+    """(observation times, prices) the bot would see: every trade, or the last trade at each poll."""
+    if poll <= 0: return ts, prices
+    times = np.arange(ts[0], ts[-1], poll)
+    idx = np.searchsorted(ts, times, side="right") - 1
+    return times, prices[idx]
+
+def _market_fill(ts, prices, t, side):
+    j = np.searchsorted(ts, t + LATENCY, side="left")
+    if j >= len(ts): return None
+    return ts[j], prices[j] * (1 + side * SLIPPAGE_BPS / 10000), TAKER_FEE_BPS
+
+def _limit_fill(ts, prices, t, side, limit):
+    start = np.searchsorted(ts, t + LATENCY, side="left")
+    stop = np.searchsorted(ts, t + LIMIT_TTL, side="right")
+    window = prices[start:stop]
+    hits = np.flatnonzero(window <= limit if side > 0 else window >= limit)
+    if not len(hits): return None
+    return ts[start + hits[0]], limit, MAKER_FEE_BPS
+
+def replay(ts, prices, poll=30, fill="market", levels=crypto_grid.GRID_LEVELS, bottom=crypto_grid.GRID_BOTTOM,
+           top=crypto_grid.GRID_TOP, budget=crypto_grid.BUDGET_PER_GRID, start_qty=0.0):
+    """Runs one scenario over the tape and returns its stats."""
+    started = time.perf_counter()
+    obs_t, obs_p = observe(ts, prices, poll)
+    signals = crypto_grid.grid_signals(crypto_grid.zones(obs_p, bottom, top, levels))
+    events = np.flatnonzero(signals)
+
+    lots = collections.deque()             # FIFO (qty, price) of open buys
+    if start_qty > 0: lots.append([start_qty, prices[0]])
+    held, reserved = start_qty, 0.0        # Filled inventory / qty promised to resting sells
+    pending = []                           # (fill time, qty delta, price, fee bps) not yet applied
+    stats = collections.Counter()
+    realized = fees = slippage = 0.0
+
+    def settle(until):
+        nonlocal held, reserved, realized, fees
+        while pending and pending[0][0] <= until:
+            _, qty, price, fee_bps = heapq.heappop(pending)
+            fees += abs(qty) * price * fee_bps / 10000
+            if qty > 0:
+                held += qty
+                lots.append([qty, price])
+                continue
+            qty = -qty
+            held -= qty
+            reserved -= qty
+            stats["round_trips"] += 1
+            while qty > 1e-12 and lots:
+                take = min(qty, lots[0][0])
+                realized += take * (price - lots[0][1])
+                lots[0][0] -= take
+                qty -= take
+                if lots[0][0] <= 1e-12: lots.popleft()
+
+    for i in events:
+        t, p = obs_t[i], obs_p[i]
+        settle(t)
+        side = 1 if signals[i] < 0 else -1  # -1 signal = buy
+        qty = budget / p
+        stats["buy_signals" if side > 0 else "sell_signals"] += 1
+        if side < 0:
+            if held - reserved < qty:       # Live: get_open_position() < qty_to_sell
+                stats["skipped_sells"] += 1
+                continue
+            reserved += qty
+        result = _market_fill(ts, prices, t, side) if fill == "market" else _limit_fill(ts, prices, t, side, p)
+        if result is None:
+            stats["missed"] += 1
+            if side < 0: reserved -= qty
+            continue
+        fill_t, fill_p, fee_bps = result
+        stats["fills"] += 1
+        slippage += side * (fill_p - p) / p * 10000
+        heapq.heappush(pending, (fill_t, qty * side, fill_p, fee_bps))
+    settle(np.inf)
+
+    last = prices[-1]
+    unrealized = sum(q * (last - px) for q, px in lots)
+    elapsed = time.perf_counter() - started
+    return {
+        "poll": poll, "fill": fill, "levels": levels, "ticks": len(ts), "observations": len(obs_t),
+        "buy_signals": stats["buy_signals"], "sell_signals": stats["sell_signals"], "skipped_sells": stats["skipped_sells"],
+        "fills": stats["fills"], "missed": stats["missed"], "round_trips": stats["round_trips"],
+        "avg_slippage_bps": slippage / stats["fills"] if stats["fills"] else 0.0,
+        "fees": fees, "realized_pl": realized - fees, "unrealized_pl": unrealized, "total_pl": realized - fees + unrealized,
+        "end_qty": held, "seconds": elapsed, "ticks_per_sec": len(ts) / elapsed if elapsed else 0.0,
+    }
+
+def print_results(results):
+    print(f"  {'poll':>5} {'fill':<6} {'lvls':>4} | {'signals':>7} {'fills':>6} {'missed':>6} {'trips':>6} | "
+          f"{'slip bps':>8} {'fees':>8} {'realized':>9} {'total P&L':>9} {'inventory':>10} | {'ticks/s':>10}")
+    for r in results:
+        poll = "tick" if r["poll"] <= 0 else f"{r['poll']:g}s"
+        print(f"  {poll:>5} {r['fill']:<6} {r['levels']:>4} | {r['buy_signals'] + r['sell_signals']:>7} {r['fills']:>6} "
+              f"{r['missed']:>6} {r['round_trips']:>6} | {r['avg_slippage_bps']:>8.2f} {r['fees']:>8.2f} {r['realized_pl']:>9.2f} "
+              f"{r['total_pl']:>9.2f} {r['end_qty']:>10.6f} | {r['ticks_per_sec']:>10,.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crypto grid tick replay")
+    parser.add_argument("mode", choices=["run", "fetch"])
+    parser.add_argument("tape", nargs="?", help="CSV of trades (timestamp, price)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Replay N random-walk trades instead of a file")
+    parser.add_argument("--symbol", default=crypto_grid.SYMBOL)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--polls", nargs="+", type=float, default=DEFAULT_POLLS)
+    parser.add_argument("--fills", nargs="+", choices=["market", "limit"], default=["market", "limit"])
+    parser.add_argument("--levels", nargs="+", type=int, default=[crypto_grid.GRID_LEVELS])
+    parser.add_argument("--bottom", type=float, default=crypto_grid.GRID_BOTTOM)
+    parser.add_argument("--top", type=float, default=crypto_grid.GRID_TOP)
+    parser.add_argument("--budget", type=float, default=crypto_grid.BUDGET_PER_GRID)
+    parser.add_argument("--start-qty", type=float, default=0.0, help="Inventory held at the start of the tape")
+    args = parser.parse_args()
+
+    if args.mode == "fetch":
+        fetch(args.symbol, args.days, args.out or f"{args.symbol.replace('/', '')}_trades.csv")
+        sys.exit(0)
+    if not args.tape and not args.synthetic:
+        parser.error("run needs a tape file or --synthetic N")
+
+    ts, prices = synthetic_tape(args.synthetic) if args.synthetic else load_tape(args.tape)
+    hours = (ts[-1] - ts[0]) / 3600
+    print(f"--- 🕸️ GRID REPLAY: {len(ts):,} trades over {hours:.1f}h (${prices.min():,.0f} - ${prices.max():,.0f}) "
+          f"| grid ${args.bottom:,.0f} - ${args.top:,.0f} ---")
+    results = [replay(ts, prices, poll, fill, levels, args.bottom, args.top, args.budget, args.start_qty)
+               for levels in args.levels for poll in args.polls for fill in args.fills]
+    print_results(results)
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(results, f, indent=2)
+        print(f"  -> Saved results to {args.out}")
@@ -0,0 +1,66 @@
+"""
+Loop heartbeats for stall detection.
+
+Every bot loop calls start() when a cycle begins and sleep() instead of
+time.sleep(). Each call rewrites heartbeats/<name>.json with a deadline:
+the cycle budget for start(), or the sleep plus the budget for sleep().
+The supervisor restarts any online process whose deadline has passed,
+which catches loops hung on a socket with no timeout, and forwards the
+reported cycle durations to Influx as loop percentiles.
+"""
+import os
+import json
+import time
+import collections
+import fleet_shard
+
+# --- CONFIGURATION ---
+HEARTBEAT_DIR = "heartbeats"
+DEFAULT_BUDGET = 120     # Seconds a cycle may run before the bot counts as hung
+RECENT_CYCLES = 20       # Durations carried in every beat, so none are lost between supervisor reads
+
+_cycles = {}             # name -> (cycle start, budget)
+_recent = {}             # name -> deque of [cycle end ts, seconds]
+
+def path(name):
+    return os.path.join(HEARTBEAT_DIR, f"{name}.json")
+
+def _write(name, deadline, state):
+    try:
+        os.makedirs(HEARTBEAT_DIR, exist_ok=True)
+        recent = list(_recent.get(name, []))
+        name = fleet_shard.worker_name(name)   # One file per process
+        tmp = f"{path(name)}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"name": name, "pid": os.getpid(), "ts": time.time(), "deadline": deadline,
+                       "state": state, "recent_cycles": recent}, f)
+        os.replace(tmp, path(name))
+    except Exception as e:
+        print(f"  [!] Heartbeat write failed: {e}")
+
+def start(name, budget=DEFAULT_BUDGET):
+    """A cycle begins; it must reach sleep() (or start() again) within `budget` seconds."""
+    now = time.time()
+    _cycles[name] = (now, budget)
+    _write(name, now + budget, "cycle")
+
+def sleep(name, seconds):
+    """time.sleep() that first tells the supervisor how long we'll be gone (and how long the last cycle took)."""
+    now = time.time()
+    started, budget = _cycles.get(name, (None, DEFAULT_BUDGET))
+    if started is not None:
+        _recent.setdefault(name, collections.deque(maxlen=RECENT_CYCLES)).append([now, now - started])
+    _write(name, now + seconds + budget, "sleep")
+    _cycles[name] = (None, budget)   # Report each cycle once
+    time.sleep(seconds)
+
+def read_all():
+    """All heartbeat files as dicts (unreadable ones skipped)."""
+    if not os.path.isdir(HEARTBEAT_DIR): return []
+    beats = []
+    for fname in os.listdir(HEARTBEAT_DIR):
+        if not fname.endswith(".json"): continue
+        try:
+            with open(os.path.join(HEARTBEAT_DIR, fname)) as f: beats.append(json.load(f))
+        except (OSError, ValueError): continue
+    return beats
@@ -0,0 +1,113 @@
+"""
+NumPy indicators that read BarBuffer views directly.
+
+Each one reproduces the pandas_ta function of the same name (same seeding,
+same NaN warm-up), so signals match what the bots computed on DataFrames.
+The exponential averages are first-order linear recurrences; they are
+evaluated in fixed-size blocks with a cached lower-triangular weight
+matrix, so there is no Python loop per bar.
+"""
+import functools
+import numpy as np
+
+BLOCK = 64
+
+@functools.lru_cache(maxsize=32)
+def _weights(decay):
+    """W[k, j] = decay**(k - j) for j <= k, plus decay**(k + 1) for carrying state into a block."""
+    k = np.arange(BLOCK)
+    diff = k[:, None] - k[None, :]
+    w = np.where(diff >= 0, decay ** np.maximum(diff, 0), 0.0)
+    return w, decay ** (k + 1)
+
+def _decay_sum(x, decay):
+    """s[t] = decay * s[t-1] + x[t], s[-1] = 0."""
+    w, carry_w = _weights(decay)
+    out = np.empty(len(x))
+    carry = 0.0
+    for start in range(0, len(x), BLOCK):
+        chunk = x[start:start + BLOCK]
+        n = len(chunk)
+        out[start:start + n] = w[:n, :n] @ chunk + carry_w[:n] * carry
+        carry = out[start + n - 1]
+    return out
+
+def _ewm_mean(x, alpha, min_periods=0):
+    """pandas `ewm(alpha=alpha, adjust=True, min_periods=min_periods).mean()` (NaNs decay the weights)."""
+    x = np.asarray(x, dtype=float)
+    seen = ~np.isnan(x)
+    decay = 1.0 - alpha
+    num = _decay_sum(np.where(seen, x, 0.0), decay)
+    den = _decay_sum(seen.astype(float), decay)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = num / den
+    out[np.cumsum(seen) < max(min_periods, 1)] = np.nan
+    return out
+
+def _diff(x):
+    out = np.empty(len(x))
+    out[:1] = np.nan
+    out[1:] = x[1:] - x[:-1]
+    return out
+
+# --- MOVING AVERAGES ---
+def sma(close, length):
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) < length: return out
+    csum = np.cumsum(np.concatenate(([0.0], close)))
+    out[length - 1:] = (csum[length:] - csum[:-length]) / length
+    return out
+
+def ema(close, length):
+    """pandas_ta ema: seeded with the SMA of the first `length` bars, then adjust=False recursion."""
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) < length: return out
+    alpha = 2.0 / (length + 1)
+    decay = 1.0 - alpha
+    tail = close[length - 1:]
+    # y[t] = decay * y[t-1] + alpha * x[t], with y[0] = seed
+    drive = alpha * tail
+    drive[0] = close[:length].mean()
+    out[length - 1:] = _decay_sum(drive, decay)
+    return out
+
+def rma(x, length):
+    """Wilder's smoothing, as pandas_ta rma (ewm alpha=1/length, min_periods=length)."""
+    return _ewm_mean(x, 1.0 / length, min_periods=length)
+
+# --- OSCILLATORS ---
+def rsi(close, length=14):
+    change = _diff(np.asarray(close, dtype=float))
+    positive = np.where(change > 0, change, 0.0)
+    negative = np.where(change < 0, change, 0.0)
+    positive[0] = negative[0] = np.nan
+    pos_avg, neg_avg = rma(positive, length), rma(negative, length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 * pos_avg / (pos_avg + np.abs(neg_avg))
+
+def true_range(high, low, close):
+    prev_close = np.empty(len(close))
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))) if len(close) else np.zeros(0)
+
+def adx(high, low, close, length=14):
+    """Returns (adx, dmp, dmn) arrays, as the ADX_/DMP_/DMN_ columns of pandas_ta adx."""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    tr = true_range(high, low, close)
+    if len(tr): tr[0] = np.nan
+    atr = rma(tr, length)
+
+    up, dn = _diff(high), -_diff(low)
+    pos = np.where((up > dn) & (up > 0), up, 0.0)
+    neg = np.where((dn > up) & (dn > 0), dn, 0.0)
+    pos[:1] = neg[:1] = np.nan
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = 100.0 / atr
+        dmp = k * rma(pos, length)
+        dmn = k * rma(neg, length)
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length), dmp, dmn
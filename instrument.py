@@ -0,0 +1,127 @@
+import math
+import time
+import socket
+import threading
+import functools
+import collections
+import requests
+import config
+
+# --- CONFIGURATION ---
+# Off by default: timed() and wrap_client() hand back the original objects,
+# so a disabled fleet pays nothing beyond one flag check per timer block.
+ENABLED = getattr(config, 'TIMING_ENABLED', False)
+REPORT_INTERVAL = getattr(config, 'TIMING_REPORT_INTERVAL', 300)  # Seconds
+MAX_SAMPLES = 2048    # Per operation, per report window
+HOSTNAME = socket.gethostname()
+
+# --- IN-MEMORY HISTOGRAMS ---
+_samples = collections.defaultdict(lambda: collections.deque(maxlen=MAX_SAMPLES))
+_counts = collections.Counter()
+_lock = threading.Lock()
+_last_report = time.time()
+
+def record(name, seconds):
+    """Adds one latency sample (seconds) for an operation."""
+    if not ENABLED: return
+    with _lock:
+        _samples[name].append(seconds)
+        _counts[name] += 1
+
+class timer:
+    """Context timer: `with instrument.timer("indicators"): ...`"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        if ENABLED: self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED: record(self.name, time.perf_counter() - self.start)
+        return False
+
+def timed(name):
+    """Decorator version of timer(). Returns the function untouched when disabled."""
+    def decorator(func):
+        if not ENABLED: return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class TimedClient:
+    """Proxy that times every public method of an Alpaca client as '<prefix>.<method>'."""
+    def __init__(self, client, prefix):
+        self._client = client
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        return timed(f"{self._prefix}.{name}")(attr)
+
+def wrap_client(client, prefix):
+    if not ENABLED: return client
+    return TimedClient(client, prefix)
+
+# --- REPORTING ---
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values: return 0.0
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+def snapshot(reset=False):
+    """Returns {op: {count, p50, p95, p99, max}} in milliseconds."""
+    with _lock:
+        data = {name: sorted(values) for name, values in _samples.items() if values}
+        counts = dict(_counts)
+        if reset:
+            _samples.clear()
+            _counts.clear()
+
+    stats = {}
+    for name, values in data.items():
+        stats[name] = {
+            "count": counts.get(name, len(values)),
+            "p50": percentile(values, 50) * 1000,
+            "p95": percentile(values, 95) * 1000,
+            "p99": percentile(values, 99) * 1000,
+            "max": values[-1] * 1000
+        }
+    return stats
+
+def report(bot_name):
+    """Flushes the current window to InfluxDB as one batched write (bot_timing)."""
+    stats = snapshot(reset=True)
+    if not stats: return
+    lines = []
+    for op, s in stats.items():
+        lines.append(
+            f'bot_timing,host={HOSTNAME},bot={bot_name},op={op} '
+            f'count={s["count"]}i,p50_ms={s["p50"]:.3f},p95_ms={s["p95"]:.3f},p99_ms={s["p99"]:.3f},max_ms={s["max"]:.3f}'
+        )
+    try:
+        url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+        requests.post(url, data="\n".join(lines), timeout=2)
+    except Exception as e:
+        print(f"[!] Timing Report Error: {e}")
+
+def maybe_report(bot_name):
+    """Call once per loop; reports at most every REPORT_INTERVAL seconds."""
+    global _last_report
+    if not ENABLED: return
+    if time.time() - _last_report < REPORT_INTERVAL: return
+    _last_report = time.time()
+    report(bot_name)
@@ -0,0 +1,214 @@
+"""
+Emergency stop fast path.
+
+Flipping `emergency_stop` in bot_config.json (noticed within WATCH_INTERVAL
+by the supervisor's watcher thread), sending the supervisor SIGUSR1, or
+running `python kill_switch.py engage` does the following:
+
+  1. Writes HALT_FILE. Every GovernedClient refuses new orders while it
+     exists, so order flow stops within milliseconds, even from a bot that
+     is mid-cycle.
+  2. Concurrently: `pm2 stop`s every strategy process (in parallel), and
+     cancels all open orders and then closes the positions of bots marked
+     `"flatten_on_stop": true` in bot_config.json (or all bots with --flatten).
+  3. Reports how long each step took (Discord + the kill_switch measurement).
+
+Clearing `emergency_stop` (or `python kill_switch.py release`) removes the
+HALT file and the supervisor's normal pass brings the fleet back.
+
+    python kill_switch.py engage [--flatten]
+    python kill_switch.py release
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import threading
+import subprocess
+import concurrent.futures
+import requests
+from alpaca.trading.client import TradingClient
+from alpaca.trading.enums import AssetClass
+import config
+import rate_limiter
+import options_math
+import utils
+
+# --- CONFIGURATION ---
+BOT_CONFIG_FILE = "bot_config.json"
+HALT_FILE = rate_limiter.HALT_FILE
+WATCH_INTERVAL = 0.2     # Seconds between bot_config.json mtime checks
+CLOSE_RETRIES = 3        # A close can race the cancel of an order still holding the shares
+CLOSE_WORKERS = 8
+HOSTNAME = socket.gethostname()
+
+_engage_lock = threading.Lock()
+
+def send_discord(msg):
+    if "YOUR" in config.WEBHOOK_OVERSEER: return
+    try:
+        requests.post(config.WEBHOOK_OVERSEER, json={"content": msg, "username": "Kill Switch 🛑"}, timeout=5)
+    except: pass
+
+def log_to_influx(timings, cancelled, closed, trigger):
+    try:
+        fields = ",".join(f"{k}_ms={v * 1000:.1f}" for k, v in timings.items())
+        data_str = f'kill_switch,host={HOSTNAME},trigger={trigger} {fields},orders_cancelled={cancelled}i,positions_closed={closed}i'
+        url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+        requests.post(url, data=data_str, timeout=2)
+    except Exception as e:
+        print(f"[!] Kill Switch Metrics Error: {e}")
+
+def _trading_client():
+    # Not governed: the HALT file would refuse our own closes, and an emergency shouldn't queue for tokens
+    return TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))
+
+# --- STATE ---
+def is_engaged():
+    return os.path.exists(HALT_FILE)
+
+def _load_config():
+    try:
+        with open(BOT_CONFIG_FILE, 'r') as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def _set_emergency_flag(value):
+    """Keeps bot_config.json in step so the supervisor doesn't revive what we just stopped."""
+    data = _load_config()
+    if data is None or data.get("global_settings", {}).get("emergency_stop", False) == value: return
+    data.setdefault("global_settings", {})["emergency_stop"] = value
+    tmp = f"{BOT_CONFIG_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f: json.dump(data, f, indent=4)
+    os.replace(tmp, BOT_CONFIG_FILE)
+
+def flatten_bots(bot_config_data):
+    bots = (bot_config_data or {}).get("bots", {})
+    return {name for name, details in bots.items() if details.get("flatten_on_stop", False)}
+
+# --- ACTIONS ---
+def stop_processes(pm2_list=None):
+    """Stops every online process except the supervisor, all at once. Returns the names stopped."""
+    if pm2_list is None:
+        result = subprocess.run(['pm2', 'jlist'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        pm2_list = json.loads(result.stdout or "[]")
+    names = [p['name'] for p in pm2_list if p['name'] != 'supervisor' and p['pm2_env']['status'] == 'online']
+    procs = [subprocess.Popen(['pm2', 'stop', n], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for n in names]
+    for p in procs: p.wait()
+    return names
+
+def _owner(position):
+    symbol = position.symbol
+    if position.asset_class == AssetClass.US_OPTION:
+        occ = options_math.parse_occ(symbol)
+        if occ: symbol = occ[0]
+    return utils.get_bot_owner(symbol, position.asset_class)
+
+def _close(trading_client, symbol):
+    for attempt in range(CLOSE_RETRIES):
+        try:
+            trading_client.close_position(symbol)
+            return True
+        except Exception as e:
+            if attempt == CLOSE_RETRIES - 1:
+                print(f"  [!] Could not close {symbol}: {e}")
+                return False
+            time.sleep(0.2)
+
+def cancel_and_flatten(trading_client, flatten, timings, started):
+    """Cancels every open order, then closes positions owned by `flatten` bots ("*" = all)."""
+    cancelled = len(trading_client.cancel_orders() or [])
+    timings["cancel"] = time.time() - started
+    closed = 0
+    if flatten:
+        positions = [p for p in trading_client.get_all_positions() if flatten == "*" or _owner(p) in flatten]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=CLOSE_WORKERS) as pool:
+            closed = sum(pool.map(lambda p: _close(trading_client, p.symbol), positions))
+        timings["flatten"] = time.time() - started
+    return cancelled, closed
+
+def engage(reason="manual", flatten=None, pm2_list=None, triggered_at=None):
+    """
+    Trips the switch. `flatten`: set of bot names, "*" for every position, or None to read
+    flatten_on_stop from bot_config.json. A no-op if the switch is already engaged.
+    """
+    with _engage_lock:
+        if is_engaged(): return None
+        started = triggered_at or time.time()
+        with open(HALT_FILE, 'w') as f:
+            json.dump({"reason": reason, "ts": time.time(), "pid": os.getpid()}, f)
+        timings = {"block": time.time() - started}
+        print(f"[!!!] KILL SWITCH ENGAGED ({reason}): order flow blocked in {timings['block'] * 1000:.0f}ms")
+
+        if flatten is None: flatten = flatten_bots(_load_config())
+        try: _set_emergency_flag(True)
+        except Exception as e: print(f"  [!] Could not persist emergency_stop: {e}")
+
+        stopped, cancelled, closed = [], 0, 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            stop_job = pool.submit(stop_processes, pm2_list)
+            orders_job = pool.submit(cancel_and_flatten, _trading_client(), flatten, timings, started)
+            try:
+                stopped = stop_job.result()
+                timings["stop"] = time.time() - started
+            except Exception as e: print(f"  [!] pm2 stop failed: {e}")
+            try: cancelled, closed = orders_job.result()
+            except Exception as e: print(f"  [!] Cancel/flatten failed: {e}")
+        timings["total"] = time.time() - started
+
+        steps = " | ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items())
+        print(f"  🛑 Stopped {len(stopped)} processes, cancelled {cancelled} orders, closed {closed} positions ({steps})")
+        send_discord(f"🛑 **KILL SWITCH** ({reason})\nStopped {len(stopped)} processes, cancelled {cancelled} orders, "
+                     f"closed {closed} positions.\n{steps}")
+        log_to_influx(timings, cancelled, closed, reason)
+        return timings
+
+def release():
+    """Lifts the order block (the supervisor restarts the bots on its next pass)."""
+    with _engage_lock:
+        try: _set_emergency_flag(False)
+        except Exception as e: print(f"  [!] Could not persist emergency_stop: {e}")
+        if not is_engaged(): return
+        os.remove(HALT_FILE)
+        print("[+] Kill switch released: order flow re-enabled.")
+        send_discord("✅ **KILL SWITCH RELEASED**: Order flow re-enabled.")
+
+# --- TRIGGERS ---
+def watch(config_file=BOT_CONFIG_FILE):
+    """Watches bot_config.json and engages/releases on `emergency_stop` changes (supervisor thread)."""
+    def current():
+        data = _load_config()
+        return None if data is None else bool(data.get("global_settings", {}).get("emergency_stop", False))
+
+    def loop():
+        last_mtime, last_value = None, current()
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            try:
+                mtime = os.stat(config_file).st_mtime
+                if mtime == last_mtime: continue
+                last_mtime, value = mtime, current()
+                if value is None or value == last_value: continue   # Half-written or unrelated edit
+                last_value = value
+                if value: engage("config", triggered_at=mtime)
+                else: release()
+            except Exception as e:
+                print(f"[!] Kill Switch Watcher Error: {e}")
+
+    threading.Thread(target=loop, daemon=True, name="kill_switch_watch").start()
+
+def install_signal_handler(signum=signal.SIGUSR1):
+    """`kill -USR1 <supervisor pid>` engages the switch (handled off the signal frame)."""
+    def handler(sig, frame):
+        threading.Thread(target=engage, args=("signal",), kwargs={"triggered_at": time.time()}).start()
+    signal.signal(signum, handler)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("engage", "release"):
+        print("usage: python kill_switch.py engage [--flatten] | release")
+        sys.exit(1)
+    if sys.argv[1] == "engage":
+        engage("cli", flatten="*" if "--flatten" in sys.argv else None)
+    else:
+        release()
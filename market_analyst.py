@@ -1,10 +1,16 @@
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import checkpoint
+import market_calendar
 import time
 import json
 import requests
 import pandas as pd
 import pandas_ta as ta
 import datetime
+from alpaca.trading.client import TradingClient
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
@@ -13,6 +19,9 @@ from alpaca.data.timeframe import TimeFrame
 CHECK_INTERVAL = 3600  # Check every hour (Don't flicker too fast)
 CONFIG_FILE = "bot_config.json"
 MARKET_SYMBOL = "SPY"  # The benchmark
+LOOKBACK_DAYS = 400
+MAX_BARS = 300         # Daily bars kept (SMA200 + ADX warm-up)
+PRE_OPEN_LEAD = 1800   # Regime is published this long before the bell
 
 # --- INFLUXDB ---
 INFLUX_HOST = config.INFLUX_HOST
@@ -20,8 +29,14 @@ INFLUX_PORT = config.INFLUX_PORT
 INFLUX_DB_NAME = config.INFLUX_DB_NAME
 
 # --- CLIENT ---
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 
+# --- WARM-START STATE ---
+bar_cache = checkpoint.BarCache(MAX_BARS)
+full_fetch_day = None  # adjustment='all' rewrites history on ex-dividend days, so refetch fully once a day
+
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in config.WEBHOOK_OVERSEER: return
     try:
@@ -31,6 +46,7 @@ def send_discord(msg):
         })
     except: pass
 
+@instrument.timed("influx_write")
 def log_regime(regime, adx, price, sma):
     """Log the current regime to InfluxDB for Grafana"""
     try:
@@ -41,9 +57,17 @@ def log_regime(regime, adx, price, sma):
         print(f"[!] Influx Error: {e}")
 
 def get_market_data():
-    """Fetch 300 days of SPY data to calculate 200 SMA and ADX."""
+    """Fetch 300 days of SPY data to calculate 200 SMA and ADX (only the gap after the first fetch of the day)."""
+    global full_fetch_day
     try:
-        start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=400)
+        today = datetime.date.today()
+        start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=LOOKBACK_DAYS)
+        full_refresh = full_fetch_day != today
+        if full_refresh:
+            bar_cache.retain([])
+        else:
+            start_time = bar_cache.gap_start(MARKET_SYMBOL) or start_time
+
         req = StockBarsRequest(
             symbol_or_symbols=[MARKET_SYMBOL],
             timeframe=TimeFrame.Day,
@@ -52,13 +76,14 @@ def get_market_data():
             adjustment='all'
         )
         bars = data_client.get_stock_bars(req)
-        if not bars.data: return None
+        if not bars.data: return bar_cache.merge(MARKET_SYMBOL, None)
         
         df = bars.df
         if isinstance(df.index, pd.MultiIndex):
             df = df.xs(MARKET_SYMBOL)
         
-        return df
+        if full_refresh: full_fetch_day = today
+        return bar_cache.merge(MARKET_SYMBOL, df)
     except Exception as e:
         print(f"[!] Data Fetch Error: {e}")
         return None
@@ -131,13 +156,26 @@ def run_analyst():
     print("--- 🧠 MARKET ANALYST (Regime Detection) STARTED ---")
     send_discord("🧠 **Analyst Online**\nWatching SPY for Trends...")
 
+    # Warm start: today's history is reused, only new bars are fetched
+    global bar_cache, full_fetch_day
+    saved = checkpoint.load("market_analyst", max_age=86400)
+    if saved:
+        bar_cache = checkpoint.BarCache.restore(saved.get("bars"), MAX_BARS)
+        full_fetch_day = saved.get("full_fetch_day")
+
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("market_analyst", budget=180)
         try:
+            # The regime can't change while the market is shut
+            if market_calendar.sleep_until_open(trading_client, "market_analyst", lead=PRE_OPEN_LEAD): continue
+
             df = get_market_data()
             if df is not None:
                 # Calculate Indicators
-                df['sma200'] = ta.sma(df['close'], length=200)
-                adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
+                with instrument.timer("indicators"):
+                    df['sma200'] = ta.sma(df['close'], length=200)
+                    adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
                 
                 # ADX returns 3 columns: ADX_14, DMP_14, DMN_14. We just want ADX.
                 # Creates a column named 'ADX_14' usually.
@@ -166,12 +204,17 @@ def run_analyst():
                 log_regime(regime, adx, price, sma)
                 update_bot_config(regime)
 
+            checkpoint.save("market_analyst", {"bars": bar_cache.state(), "full_fetch_day": full_fetch_day})
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("market_analyst")
+
             # Sleep 1 hour
-            time.sleep(CHECK_INTERVAL)
+            heartbeat.sleep("market_analyst", CHECK_INTERVAL)
 
         except Exception as e:
             print(f"[!] Critical Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("market_analyst", 60)
 
 if __name__ == "__main__":
     run_analyst()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Local trading calendar (sessions, holidays, early closes).
+
+One get_calendar + get_clock call per day for the whole fleet: the first
+process to need it saves the result as the "market_calendar" checkpoint
+and every other process reads that. Bots answer "is the market open?"
+locally and sleep straight to the next open instead of polling get_clock
+every minute. Local time is corrected by the broker clock (one get_clock)
+after every sleep to the open and at least every CLOCK_SYNC_INTERVAL, so a
+skewed host clock (or the simulator's) can't shift the sessions.
+"""
+import time
+import datetime
+import pytz
+from alpaca.trading.requests import GetCalendarRequest
+import checkpoint
+import heartbeat
+
+# --- CONFIGURATION ---
+CACHE_NAME = "market_calendar"
+LOOKBACK_DAYS = 3
+LOOKAHEAD_DAYS = 30
+REFRESH_AGE = 86400           # Re-fetch the calendar daily
+CLOCK_SYNC_INTERVAL = 3600    # Re-check the broker clock at least this often
+MAX_SLEEP = 6 * 3600          # Re-read the calendar at least this often while waiting
+TIMEZONE = pytz.timezone('US/Eastern')
+
+_state = {"sessions": [], "fetched": None, "offset": 0.0, "synced": None}
+clock = time.time             # Local clock; simulator.run_fleet swaps in the accelerated sim clock
+
+def _to_ts(dt):
+    if dt.tzinfo is None: dt = TIMEZONE.localize(dt)   # The calendar reports exchange-local times
+    return dt.timestamp()
+
+# --- REFRESH ---
+def sync_clock(trading_client):
+    """One get_clock: corrects for local clock skew (and the simulator's clock)."""
+    broker = trading_client.get_clock()
+    _state["offset"] = broker.timestamp.timestamp() - clock()
+    _state["synced"] = time.time()
+    return broker
+
+def refresh(trading_client):
+    today = datetime.datetime.fromtimestamp(now(), TIMEZONE).date()
+    days = trading_client.get_calendar(GetCalendarRequest(
+        start=today - datetime.timedelta(days=LOOKBACK_DAYS), end=today + datetime.timedelta(days=LOOKAHEAD_DAYS)))
+    sessions = sorted((_to_ts(d.open), _to_ts(d.close)) for d in days)
+    _state.update(sessions=sessions, fetched=time.time())
+    checkpoint.save(CACHE_NAME, {"sessions": sessions, "fetched": _state["fetched"]})
+    print(f"  📅 Market calendar refreshed: {len(sessions)} sessions")
+
+def _covers(sessions, t):
+    return bool(sessions) and sessions[0][0] <= t + 86400 and sessions[-1][1] > t
+
+def _ensure(trading_client):
+    if _state["synced"] is None or time.time() - _state["synced"] > CLOCK_SYNC_INTERVAL:
+        sync_clock(trading_client)
+    if _state["fetched"] is None or time.time() - _state["fetched"] > REFRESH_AGE or not _covers(_state["sessions"], now()):
+        saved = checkpoint.load(CACHE_NAME, max_age=REFRESH_AGE)
+        if saved and _covers(saved["sessions"], now()): _state.update(sessions=saved["sessions"], fetched=saved["fetched"])
+        else: refresh(trading_client)
+
+# --- QUERIES ---
+def now():
+    """Broker time (epoch seconds)."""
+    return clock() + _state["offset"]
+
+def current_session(trading_client):
+    """(open_ts, close_ts) of the session in progress, or None."""
+    _ensure(trading_client)
+    t = now()
+    for open_ts, close_ts in _state["sessions"]:
+        if open_ts <= t < close_ts: return open_ts, close_ts
+    return None
+
+def is_open(trading_client):
+    return current_session(trading_client) is not None
+
+def next_open(trading_client):
+    """Epoch seconds of the next session open (None past the cached horizon)."""
+    _ensure(trading_client)
+    t = now()
+    return next((o for o, _ in _state["sessions"] if o > t), None)
+
+def session_date(trading_client):
+    """Date of the session in progress, else of the next one."""
+    session = current_session(trading_client)
+    ts = session[0] if session else next_open(trading_client)
+    return datetime.datetime.fromtimestamp(ts, TIMEZONE).date() if ts else None
+
+def sleep_until_open(trading_client, bot_name, lead=0):
+    """
+    Returns False at once if the market is open (or opens within `lead` seconds).
+    Otherwise sleeps until `lead` seconds before the next open and returns True.
+    """
+    if is_open(trading_client): return False
+    opens = next_open(trading_client)
+    wait = (opens - now() - lead) if opens else MAX_SLEEP
+    if wait <= 0: return False
+    when = datetime.datetime.fromtimestamp(opens, TIMEZONE).strftime('%a %H:%M') if opens else "unknown"
+    print(f"Market Closed. Sleeping until {when} ET ({wait/3600:.1f}h)...")
+    heartbeat.sleep(bot_name, min(wait, MAX_SLEEP))
+    _state["synced"] = None   # Confirm against the broker once we wake
+    return True
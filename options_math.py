@@ -0,0 +1,169 @@
+"""
+Vectorized Black-Scholes for whole option chains.
+
+Every function takes NumPy arrays (one element per contract) so a 1000-contract
+chain is priced, inverted to implied vol and turned into Greeks in a handful of
+array operations instead of a Python loop.
+"""
+import re
+import datetime
+import numpy as np
+from alpaca.data.requests import OptionLatestQuoteRequest
+
+# --- CONFIGURATION ---
+RISK_FREE_RATE = 0.04
+MIN_VOL, MAX_VOL = 0.01, 5.0
+NEWTON_STEPS = 8
+BISECT_STEPS = 40
+QUOTE_BATCH = 100          # Alpaca caps latest-quote requests at 100 symbols
+MIN_YEARS = 1 / 365        # Treat expiry-day contracts as one day out
+OCC_PATTERN = re.compile(r'^([A-Z.]+?)(\d{6})([CP])(\d{8})$')
+
+# --- SYMBOLS ---
+def parse_occ(symbol):
+    """'TSLA240119P00200000' -> ('TSLA', date(2024, 1, 19), False, 200.0). None if not an OCC symbol."""
+    m = OCC_PATTERN.match(symbol)
+    if not m: return None
+    root, ymd, cp, strike = m.groups()
+    return root, datetime.datetime.strptime(ymd, '%y%m%d').date(), cp == "C", int(strike) / 1000.0
+
+# --- NORMAL DISTRIBUTION ---
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def norm_cdf(x):
+    """Abramowitz & Stegun 7.1.26 erf approximation (abs error < 1.5e-7), no SciPy needed."""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+# --- PRICING ---
+def _d1_d2(spot, strike, years, vol, rate):
+    sqrt_t = np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * years) / (vol * sqrt_t)
+    return d1, d1 - vol * sqrt_t
+
+def bs_price(spot, strike, years, vol, is_call, rate=RISK_FREE_RATE):
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    disc = strike * np.exp(-rate * years)
+    call = spot * norm_cdf(d1) - disc * norm_cdf(d2)
+    put = disc * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+def bs_vega(spot, strike, years, vol, rate=RISK_FREE_RATE):
+    d1, _ = _d1_d2(spot, strike, years, vol, rate)
+    return spot * norm_pdf(d1) * np.sqrt(years)
+
+def implied_vol(price, spot, strike, years, is_call, rate=RISK_FREE_RATE):
+    """
+    Newton-Raphson from a flat 50% guess; rows that fail to converge (deep ITM/OTM,
+    tiny vega) are finished by bisection. Prices outside no-arbitrage bounds give NaN.
+    """
+    price = np.asarray(price, dtype=float)
+    disc = strike * np.exp(-rate * years)
+    lower = np.where(is_call, np.maximum(spot - disc, 0.0), np.maximum(disc - spot, 0.0))
+    upper = np.where(is_call, spot, disc)
+    valid = np.isfinite(price) & (price > lower) & (price < upper)
+
+    vol = np.full(price.shape, 0.5)
+    for _ in range(NEWTON_STEPS):
+        diff = bs_price(spot, strike, years, vol, is_call, rate) - price
+        vega = bs_vega(spot, strike, years, vol, rate)
+        step = np.divide(diff, vega, out=np.zeros_like(diff), where=vega > 1e-8)
+        vol = np.clip(vol - step, MIN_VOL, MAX_VOL)
+
+    converged = np.abs(bs_price(spot, strike, years, vol, is_call, rate) - price) < 1e-4
+    redo = valid & ~converged
+    if redo.any():
+        lo = np.full(int(redo.sum()), MIN_VOL)
+        hi = np.full(int(redo.sum()), MAX_VOL)
+        args = (spot if np.ndim(spot) == 0 else spot[redo], strike[redo], years[redo])
+        target, calls = price[redo], is_call[redo]
+        for _ in range(BISECT_STEPS):
+            mid = 0.5 * (lo + hi)
+            too_high = bs_price(*args, mid, calls, rate) > target
+            hi = np.where(too_high, mid, hi)
+            lo = np.where(too_high, lo, mid)
+        vol[redo] = 0.5 * (lo + hi)
+
+    return np.where(valid, vol, np.nan)
+
+def greeks(spot, strike, years, vol, is_call, rate=RISK_FREE_RATE):
+    """Returns dict of delta, gamma, theta (per calendar day) and vega (per 1 vol point)."""
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    sqrt_t = np.sqrt(years)
+    pdf = norm_pdf(d1)
+    disc = strike * np.exp(-rate * years)
+
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    decay = -spot * pdf * vol / (2 * sqrt_t)
+    theta = np.where(is_call, decay - rate * disc * norm_cdf(d2), decay + rate * disc * norm_cdf(-d2))
+    return {
+        "delta": delta,
+        "gamma": pdf / (spot * vol * sqrt_t),
+        "theta": theta / 365.0,
+        "vega": spot * pdf * sqrt_t / 100.0,
+    }
+
+# --- CHAINS ---
+def fetch_quotes(option_data_client, symbols):
+    """Latest bid/ask for many contracts in batches of QUOTE_BATCH. Missing quotes come back as NaN."""
+    bids = np.full(len(symbols), np.nan)
+    asks = np.full(len(symbols), np.nan)
+    index = {s: i for i, s in enumerate(symbols)}
+    for i in range(0, len(symbols), QUOTE_BATCH):
+        try:
+            res = option_data_client.get_option_latest_quote(OptionLatestQuoteRequest(symbol_or_symbols=symbols[i:i + QUOTE_BATCH]))
+        except Exception as e:
+            print(f"  [!] Quote batch failed: {e}")
+            continue
+        for sym, q in res.items():
+            bids[index[sym]] = float(q.bid_price)
+            asks[index[sym]] = float(q.ask_price)
+    return bids, asks
+
+def analyze_chain(contracts, spot, bids, asks, today=None, rate=RISK_FREE_RATE):
+    """
+    Prices a list of Alpaca OptionContract objects in one pass.
+    Returns a dict of per-contract arrays: strike, dte, is_call, bid, ask, mid, iv, greeks,
+    and premium_per_day (bid / DTE, what a seller collects per day held).
+    """
+    today = today or datetime.date.today()
+    strike = np.array([float(c.strike_price) for c in contracts])
+    expiry = [c.expiration_date for c in contracts]
+    expiry = [datetime.date.fromisoformat(e) if isinstance(e, str) else e for e in expiry]
+    dte = np.array([(e - today).days for e in expiry], dtype=float)
+    is_call = np.array(["call" in str(getattr(c.type, 'value', c.type)).lower() for c in contracts])
+    years = np.maximum(dte / 365.0, MIN_YEARS)
+
+    bids = np.where(bids > 0, bids, np.nan)
+    asks = np.where(asks > 0, asks, np.nan)
+    mid = (bids + asks) / 2
+    iv = implied_vol(mid, spot, strike, years, is_call, rate)
+    g = greeks(spot, strike, years, np.nan_to_num(iv, nan=0.5), is_call, rate)
+    for key in g: g[key] = np.where(np.isnan(iv), np.nan, g[key])
+
+    return {
+        "strike": strike, "dte": dte, "is_call": is_call,
+        "bid": bids, "ask": asks, "mid": mid, "iv": iv,
+        "premium_per_day": bids / np.maximum(dte, 1.0),
+        **g,
+    }
+
+def select_by_delta(chain, target_delta, tolerance=0.05, min_premium=0.0, mask=None):
+    """
+    Index of the best short contract: among those whose |delta| is within `tolerance`
+    of `target_delta`, the one with the highest premium per day; otherwise the closest delta.
+    Returns None if no contract has a usable quote.
+    """
+    distance = np.abs(np.abs(chain["delta"]) - target_delta)
+    usable = np.isfinite(distance) & (np.nan_to_num(chain["bid"]) >= min_premium)
+    if mask is not None: usable &= mask
+    if not usable.any(): return None
+
+    in_band = usable & (distance <= tolerance)
+    if in_band.any():
+        return int(np.argmax(np.where(in_band, chain["premium_per_day"], -np.inf)))
+    return int(np.argmin(np.where(usable, distance, np.inf)))
@@ -0,0 +1,141 @@
+"""
+Fleet-wide registry of open (unfilled) orders.
+
+Bots only look at positions, so an order that hasn't filled yet is
+invisible to the next loop, which could then submit it again. The registry
+lives in a shared file. It is refreshed from one batched get_orders call
+at most every REFRESH_INTERVAL, by whichever process gets there first, and
+each submission is added the moment it is accepted. Bots submit through
+submit_order(), which skips an order when one for the same symbol and side
+is already resting. pre_trade_risk adds pending_exposure() to a bot's usage.
+"""
+import os
+import json
+import time
+import fcntl
+import contextlib
+from alpaca.trading.requests import GetOrdersRequest
+from alpaca.trading.enums import QueryOrderStatus, AssetClass
+import options_math
+import execution_analytics
+import utils
+
+# --- CONFIGURATION ---
+REGISTRY_FILE = "open_orders.json"
+LOCK_FILE = "open_orders.lock"
+REFRESH_INTERVAL = 20    # Seconds; one get_orders call per interval for the whole fleet
+MAX_ORDERS = 500
+
+_cache = {"mtime": None, "orders": []}
+
+@contextlib.contextmanager
+def _locked():
+    with open(LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try: yield
+        finally: fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _read():
+    try:
+        with open(REGISTRY_FILE, 'r') as f: return json.load(f)
+    except (OSError, ValueError): return {"updated": 0, "orders": []}
+
+def _write(state):
+    tmp = f"{REGISTRY_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f: json.dump(state, f)
+    os.replace(tmp, REGISTRY_FILE)
+
+def _value(x):
+    return str(getattr(x, "value", x)).lower()
+
+def _num(x):
+    return float(x) if x not in (None, "") else None
+
+def _entry(order, bot, ref_price=None):
+    """Registry row from an Alpaca order (or order request)."""
+    symbol = order.symbol.replace("/", "")
+    occ = options_math.parse_occ(symbol)
+    asset_class = getattr(order, "asset_class", None) or (AssetClass.US_OPTION if occ else None)
+    root = occ[0] if occ else symbol
+    if bot is None:
+        bot = utils.get_bot_owner(root, asset_class) if asset_class else None
+    return {
+        "id": str(getattr(order, "id", "") or ""), "symbol": symbol, "root": root, "bot": bot,
+        "side": _value(order.side), "qty": _num(order.qty), "notional": _num(getattr(order, "notional", None)),
+        "limit_price": _num(getattr(order, "limit_price", None)), "ref_price": ref_price,
+        "option": occ is not None, "submitted": time.time()
+    }
+
+# --- REFRESH ---
+def refresh(trading_client, force=False):
+    """Re-reads open orders from the API if the registry is older than REFRESH_INTERVAL."""
+    with _locked():
+        state = _read()
+        if not force and time.time() - state.get("updated", 0) < REFRESH_INTERVAL: return
+        started = time.time()
+        try:
+            live = trading_client.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=MAX_ORDERS))
+        except Exception as e:
+            print(f"  [!] Open order refresh failed: {e}")
+            return
+        known = {o["id"]: o for o in state.get("orders", [])}
+        orders = []
+        for o in live:
+            prev = known.get(str(o.id), {})
+            row = _entry(o, prev.get("bot") or execution_analytics.bot_from_tag(o.client_order_id), prev.get("ref_price"))
+            row["submitted"] = prev.get("submitted", row["submitted"])
+            orders.append(row)
+        # Submitted while the listing was in flight: keep until the next refresh sees them
+        ids = {o["id"] for o in orders}
+        orders += [o for o in state.get("orders", []) if o["submitted"] >= started and o["id"] not in ids]
+        _write({"updated": time.time(), "orders": orders})
+
+def open_orders(bot=None):
+    try: mtime = os.path.getmtime(REGISTRY_FILE)
+    except OSError: return []
+    if mtime != _cache["mtime"]:
+        _cache["mtime"], _cache["orders"] = mtime, _read().get("orders", [])
+    return [o for o in _cache["orders"] if bot is None or o["bot"] == bot]
+
+def has_open(symbol, side=None, bot=None):
+    """True if an order is resting for `symbol` (or any option on that underlying)."""
+    symbol = symbol.replace("/", "")
+    return any((o["symbol"] == symbol or o["root"] == symbol) and (side is None or o["side"] == side)
+               for o in open_orders(bot))
+
+def pending_exposure(bot_name):
+    """Dollar value of the bot's resting buy orders (crypto_grid and moon_bag share one pool)."""
+    pool = ("crypto_grid", "moon_bag") if bot_name in ("crypto_grid", "moon_bag") else (bot_name,)
+    total = 0.0
+    for o in open_orders():
+        if o["bot"] not in pool or o["side"] != "buy": continue
+        if o["notional"]:
+            total += o["notional"]
+            continue
+        price = o["limit_price"] or o["ref_price"] or 0.0
+        total += (o["qty"] or 0.0) * price * (100 if o["option"] else 1)
+    return total
+
+# --- SUBMISSION ---
+def submit_order(trading_client, bot_name, order_data, ref_price=None, dedup=True, decided_at=None):
+    """
+    Submits unless an order for the same symbol and side is already open (dedup=False for
+    strategies that deliberately stack orders). Returns the order, or None if skipped.
+    `decided_at` (default: now) and `ref_price` feed the fill latency/slippage journal.
+    """
+    decided_at = decided_at or time.time()
+    refresh(trading_client)
+    side = _value(order_data.side)
+    if dedup and has_open(order_data.symbol, side):
+        print(f"    [SKIP] {side.upper()} {order_data.symbol}: order already open")
+        return None
+    order_data.client_order_id = execution_analytics.tag(bot_name, decided_at)
+    submit_at = time.time()
+    order = trading_client.submit_order(order_data=order_data)
+    execution_analytics.record_submission(bot_name, order_data, order, ref_price, decided_at, submit_at, time.time())
+    if _value(getattr(order, "status", "")) == "filled": return order
+    with _locked():
+        state = _read()
+        state.setdefault("orders", []).append(_entry(order, bot_name, ref_price))
+        _write(state)
+    return order
@@ -0,0 +1,136 @@
+"""
+Portfolio risk for the options books (and the stock they hedge).
+
+Every option position is parsed from its OCC symbol, quoted in one batch,
+backed out to implied vol and repriced across a grid of underlying moves
+as NumPy arrays - one matrix operation for the whole book.
+"""
+import datetime
+import numpy as np
+from alpaca.trading.enums import AssetClass
+from alpaca.data.requests import StockLatestTradeRequest
+import options_math
+
+# --- CONFIGURATION ---
+SCENARIO_MOVES = np.round(np.arange(-0.20, 0.2001, 0.05), 2)   # Underlying moves: -20% ... +20%
+EXPIRY_MOVES = np.linspace(-0.50, 0.50, 101)                   # Wider grid for the at-expiry payoff
+DEFAULT_VOL = 0.50         # Used when a contract has no quote and its underlying no other IV
+CONTRACT_SIZE = 100
+
+def scenario_label(move):
+    """0.05 -> 'up5', -0.2 -> 'dn20', 0 -> 'flat' (Influx-friendly field names)."""
+    pct = int(round(move * 100))
+    if pct == 0: return "flat"
+    return f"{'up' if pct > 0 else 'dn'}{abs(pct)}"
+
+# --- BOOK ---
+def build_book(positions, owner_of):
+    """
+    Splits live positions into option legs and equity hedges (crypto is ignored).
+    `owner_of(symbol, asset_class)` attributes each position to a bot.
+    """
+    options, stocks = [], []
+    for p in positions:
+        if p.asset_class == AssetClass.US_OPTION:
+            occ = options_math.parse_occ(p.symbol)
+            if not occ: continue
+            root, expiry, is_call, strike = occ
+            options.append({"symbol": p.symbol, "root": root, "expiry": expiry, "is_call": is_call,
+                            "strike": strike, "qty": float(p.qty), "mark": float(p.current_price),
+                            "owner": owner_of(p.symbol, p.asset_class)})
+        elif p.asset_class == AssetClass.US_EQUITY:
+            stocks.append({"symbol": p.symbol, "root": p.symbol, "qty": float(p.qty),
+                           "owner": owner_of(p.symbol, p.asset_class)})
+    return options, stocks
+
+def fetch_spots(data_client, roots):
+    """Latest trade for every underlying in one request."""
+    if not roots: return {}
+    res = data_client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=sorted(roots)))
+    return {sym: float(t.price) for sym, t in res.items()}
+
+# --- ENGINE ---
+def compute_risk(options, stocks, spots, bids, asks, today=None):
+    """
+    Returns {bot: {...}} plus a "portfolio" entry. Each entry has net delta (shares),
+    dollar delta, gamma, vega ($ per vol point), theta ($ per day), scenario P&L per
+    SCENARIO_MOVES and the worst loss on the grid today and at expiry.
+    """
+    today = today or datetime.date.today()
+    owners = sorted({o["owner"] for o in options} | {s["owner"] for s in stocks})
+    results = {}
+
+    # Options -> arrays (one row per leg)
+    opt = [o for o in options if o["root"] in spots]
+    spot = np.array([spots[o["root"]] for o in opt])
+    strike = np.array([o["strike"] for o in opt])
+    is_call = np.array([o["is_call"] for o in opt], dtype=bool)
+    years = np.maximum(np.array([(o["expiry"] - today).days for o in opt], dtype=float) / 365.0, options_math.MIN_YEARS)
+    units = np.array([o["qty"] for o in opt]) * CONTRACT_SIZE
+    owner_idx = np.array([owners.index(o["owner"]) for o in opt], dtype=int)
+
+    if opt:
+        index = {o["symbol"]: i for i, o in enumerate(options)}
+        rows = [index[o["symbol"]] for o in opt]
+        bid, ask = np.asarray(bids)[rows], np.asarray(asks)[rows]
+        mid = np.where((bid > 0) & (ask > 0), (bid + ask) / 2, np.array([o["mark"] for o in opt]))
+        iv = options_math.implied_vol(mid, spot, strike, years, is_call)
+
+        # Fill missing IVs with the median of the same underlying, then DEFAULT_VOL
+        roots = np.array([o["root"] for o in opt])
+        for root in np.unique(roots[np.isnan(iv)]):
+            same = (roots == root) & np.isfinite(iv)
+            iv[(roots == root) & np.isnan(iv)] = np.median(iv[same]) if same.any() else DEFAULT_VOL
+
+        g = options_math.greeks(spot, strike, years, iv, is_call)
+        value_now = options_math.bs_price(spot, strike, years, iv, is_call)
+
+        # Scenario grid: (legs x moves)
+        shocked = spot[:, None] * (1 + SCENARIO_MOVES[None, :])
+        value_grid = options_math.bs_price(shocked, strike[:, None], years[:, None], iv[:, None], is_call[:, None])
+        pnl_grid = (value_grid - value_now[:, None]) * units[:, None]
+
+        at_expiry = spot[:, None] * (1 + EXPIRY_MOVES[None, :])
+        intrinsic = np.where(is_call[:, None], np.maximum(at_expiry - strike[:, None], 0), np.maximum(strike[:, None] - at_expiry, 0))
+        expiry_grid = (intrinsic - value_now[:, None]) * units[:, None]
+    else:
+        g = {k: np.zeros(0) for k in ("delta", "gamma", "theta", "vega")}
+        pnl_grid = np.zeros((0, len(SCENARIO_MOVES)))
+        expiry_grid = np.zeros((0, len(EXPIRY_MOVES)))
+
+    # Equity hedges: delta 1, linear P&L
+    stk = [s for s in stocks if s["root"] in spots]
+    s_spot = np.array([spots[s["root"]] for s in stk])
+    s_qty = np.array([s["qty"] for s in stk])
+    s_owner = np.array([owners.index(s["owner"]) for s in stk], dtype=int)
+    s_pnl = (s_qty * s_spot)[:, None] * SCENARIO_MOVES[None, :] if stk else np.zeros((0, len(SCENARIO_MOVES)))
+    s_exp = (s_qty * s_spot)[:, None] * EXPIRY_MOVES[None, :] if stk else np.zeros((0, len(EXPIRY_MOVES)))
+
+    def total(mask_opt, mask_stk):
+        pnl = pnl_grid[mask_opt].sum(axis=0) + s_pnl[mask_stk].sum(axis=0)
+        exp = expiry_grid[mask_opt].sum(axis=0) + s_exp[mask_stk].sum(axis=0)
+        delta = (g["delta"] * units)[mask_opt].sum() + s_qty[mask_stk].sum()
+        return {
+            "delta": float(delta),
+            "dollar_delta": float((g["delta"] * units * spot)[mask_opt].sum() + (s_qty * s_spot)[mask_stk].sum()),
+            "gamma": float((g["gamma"] * units)[mask_opt].sum()),
+            "vega": float((g["vega"] * units)[mask_opt].sum()),
+            "theta": float((g["theta"] * units)[mask_opt].sum()),
+            "legs": int(mask_opt.sum()),
+            "max_loss": float(min(pnl.min(), 0.0)),
+            "expiry_max_loss": float(min(exp.min(), 0.0)),
+            "scenarios": {scenario_label(m): float(v) for m, v in zip(SCENARIO_MOVES, pnl)},
+        }
+
+    for i, owner in enumerate(owners):
+        results[owner] = total(owner_idx == i, s_owner == i)
+    results["portfolio"] = total(np.ones(len(opt), dtype=bool), np.ones(len(stk), dtype=bool))
+    return results
+
+def run_risk(positions, owner_of, data_client, option_data_client):
+    """Full pass: parse the book, batch-quote underlyings and legs, aggregate."""
+    options, stocks = build_book(positions, owner_of)
+    if not options: return {}
+    spots = fetch_spots(data_client, {o["root"] for o in options} | {s["root"] for s in stocks})
+    bids, asks = options_math.fetch_quotes(option_data_client, [o["symbol"] for o in options])
+    return compute_risk(options, stocks, spots, bids, asks)
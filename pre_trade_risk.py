@@ -0,0 +1,129 @@
+"""
+Pre-trade risk: one account snapshot per cycle, all of a bot's proposed entries checked in one pass.
+
+    snap = pre_trade_risk.snapshot(trading_client, account, positions)
+    results = pre_trade_risk.evaluate(snap, "trend_bot", proposals)
+
+A proposal is {"symbol", "qty", "price"} plus optional "multiplier" (100 for
+options) and "fractional" (crypto). Proposals are funded in the order given
+against, in turn, the symbol's concentration headroom, the bot's allocation
+(crypto_grid and moon_bag draw on one shared pool) and buying power. Each
+result is the proposal with the accepted "qty" (possibly trimmed, 0 =
+rejected) and a "reason". This fails closed: no snapshot, no trades.
+"""
+import json
+import numpy as np
+import config
+import instrument
+import options_math
+import order_registry
+import utils
+
+# --- CONFIGURATION ---
+BOT_CONFIG_FILE = "bot_config.json"
+MAX_SYMBOL_PCT = getattr(config, 'MAX_SYMBOL_PCT', 0.15)   # Of equity, per underlying, across the fleet
+SHARED_POOLS = {"crypto_grid": "crypto", "moon_bag": "crypto"}
+FRACTIONAL_STEP = 1e-6     # Crypto qty granularity (trims round down to this)
+
+def _pool(bot_name):
+    return SHARED_POOLS.get(bot_name, bot_name)
+
+def _root(symbol):
+    symbol = symbol.replace("/", "")
+    occ = options_math.parse_occ(symbol)
+    return occ[0] if occ else symbol
+
+@instrument.timed("risk_snapshot")
+def snapshot(trading_client, account=None, positions=None):
+    """
+    Equity, buying power and per-bot / per-underlying usage (positions + resting orders).
+    Pass in the account and positions the bot already fetched to make this free. None on failure.
+    """
+    try:
+        with open(BOT_CONFIG_FILE, 'r') as f:
+            bots = json.load(f).get("bots", {})
+        account = account or trading_client.get_account()
+        positions = trading_client.get_all_positions() if positions is None else positions
+
+        bot_used, symbol_used = {}, {}
+        for p in positions:
+            root = _root(p.symbol)
+            value = abs(float(p.market_value))
+            pool = _pool(utils.get_bot_owner(root, p.asset_class))
+            bot_used[pool] = bot_used.get(pool, 0.0) + value
+            symbol_used[root] = symbol_used.get(root, 0.0) + value
+        for pool, bot_name in {_pool(b): b for b in bots}.items():
+            bot_used[pool] = bot_used.get(pool, 0.0) + order_registry.pending_exposure(bot_name)
+        for o in order_registry.open_orders():
+            if o["side"] != "buy": continue
+            price = o["limit_price"] or o["ref_price"] or 0.0
+            value = o["notional"] or (o["qty"] or 0.0) * price * (100 if o["option"] else 1)
+            symbol_used[o["root"]] = symbol_used.get(o["root"], 0.0) + value
+
+        return {
+            "equity": float(account.equity),
+            "buying_power": float(account.buying_power),
+            "allocation": {b: float(d.get("allocation", 0.0)) for b, d in bots.items()},
+            "bot_used": bot_used,
+            "symbol_used": symbol_used,
+        }
+    except Exception as e:
+        print(f"  [RISK] Snapshot failed, blocking entries: {e}")
+        return None
+
+@instrument.timed("risk_evaluate")
+def evaluate(snap, bot_name, proposals):
+    """Returns the proposals with accepted "qty" and "reason" (see module docstring)."""
+    if not proposals: return []
+    if snap is None:
+        return [dict(p, qty=0, requested=p["qty"], reason="no risk snapshot") for p in proposals]
+
+    qty = np.array([float(p["qty"]) for p in proposals])
+    unit = np.array([float(p["price"]) * p.get("multiplier", 1) for p in proposals])
+    fractional = np.array([bool(p.get("fractional", False)) for p in proposals])
+    roots = [_root(p["symbol"]) for p in proposals]
+    wanted = qty * unit
+
+    # 1. Concentration: each underlying up to MAX_SYMBOL_PCT of equity (repeats share the headroom)
+    cap = snap["equity"] * MAX_SYMBOL_PCT
+    room = {r: max(0.0, cap - snap["symbol_used"].get(r, 0.0)) for r in set(roots)}
+    allowed = np.empty(len(proposals))
+    for i, r in enumerate(roots):
+        allowed[i] = min(wanted[i], room[r])
+        room[r] -= allowed[i]
+    concentration_cut = allowed < wanted
+
+    # 2. Allocation and buying power, funded in order
+    limit = snap["buying_power"]
+    allocation = snap["allocation"].get(bot_name, 0.0)
+    if allocation > 0:   # 0 = no allocation limit
+        limit = min(limit, snap["equity"] * allocation - snap["bot_used"].get(_pool(bot_name), 0.0))
+    before = np.cumsum(allowed) - allowed
+    funded = np.clip(max(limit, 0.0) - before, 0.0, allowed)
+
+    accepted = np.where(unit > 0, funded / np.where(unit > 0, unit, 1), 0.0)
+    accepted = np.where(fractional, np.floor(accepted / FRACTIONAL_STEP + 1e-6) * FRACTIONAL_STEP, np.floor(accepted + 1e-9))
+    accepted = np.clip(accepted, 0, qty)
+
+    results = []
+    for i, p in enumerate(proposals):
+        if accepted[i] >= qty[i]: reason = "ok"
+        elif concentration_cut[i] and funded[i] >= allowed[i]: reason = "concentration"
+        elif allocation > 0 and limit < snap["buying_power"]: reason = "allocation"
+        else: reason = "buying power"
+        q = float(accepted[i]) if fractional[i] else int(accepted[i])
+        results.append(dict(p, qty=q, requested=p["qty"], reason=reason if q < qty[i] else "ok"))
+
+    # Commit what we accepted so a second evaluate() in the same cycle sees it
+    spent = float((accepted * unit).sum())
+    snap["buying_power"] -= spent
+    snap["bot_used"][_pool(bot_name)] = snap["bot_used"].get(_pool(bot_name), 0.0) + spent
+    for i, r in enumerate(roots):
+        snap["symbol_used"][r] = snap["symbol_used"].get(r, 0.0) + float(accepted[i] * unit[i])
+    return results
+
+def log_decisions(bot_name, results):
+    for r in results:
+        if r["reason"] == "ok": continue
+        verb = "TRIM" if r["qty"] > 0 else "SKIP"
+        print(f"    [RISK] {verb} {r['symbol']}: {r['requested']} -> {r['qty']} ({r['reason']})")
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import fcntl
+import socket
+import threading
+import contextlib
+import requests
+import config
+
+# --- CONFIGURATION ---
+# Alpaca allows ~200 requests/min per account. We keep a safety margin because
+# every bot in the fleet shares the same key.
+RATE_LIMIT_PER_MIN = getattr(config, 'ALPACA_RATE_LIMIT', 180)
+BURST_CAPACITY = 20          # Max tokens the bucket can hold
+ORDER_RESERVE = 5            # Tokens that only order calls may spend
+MAX_WAIT_SLICE = 0.5         # Re-check the bucket at least this often (seconds)
+STATE_FILE = "rate_limiter.json"
+LOCK_FILE = "rate_limiter.lock"
+HALT_FILE = "HALT"           # Written by kill_switch.py; new orders are refused while it exists
+HOSTNAME = socket.gethostname()
+
+PRIORITY_ORDER = "order"
+PRIORITY_DATA = "data"
+
+# Any client method starting with one of these is treated as order flow
+ORDER_METHOD_PREFIXES = ("submit_", "replace_", "cancel_", "close_", "exercise_")
+# ...and these are refused outright while the kill switch is engaged (cancels still go through)
+HALTED_METHOD_PREFIXES = ("submit_", "replace_", "close_", "exercise_")
+
+class TradingHalted(RuntimeError):
+    pass
+
+# Per-process counters (reported alongside the shared queue depth)
+_local_stats = {"calls": 0, "waited": 0, "wait_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+@contextlib.contextmanager
+def _shared_state():
+    """Opens the fleet-wide bucket under an exclusive file lock."""
+    with open(LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(STATE_FILE, 'r') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            state.setdefault("tokens", float(BURST_CAPACITY))
+            state.setdefault("updated", time.time())
+            state.setdefault("waiting", {})
+            yield state
+            tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp, STATE_FILE)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _refill(state):
+    now = time.time()
+    elapsed = max(0.0, now - state["updated"])
+    state["tokens"] = min(float(BURST_CAPACITY), state["tokens"] + elapsed * RATE_LIMIT_PER_MIN / 60.0)
+    state["updated"] = now
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def _prune_waiters(state):
+    """Drops queue entries left behind by processes that died while waiting."""
+    for key in list(state["waiting"].keys()):
+        if not _pid_alive(int(key.split(":")[0])):
+            del state["waiting"][key]
+
+def acquire(priority=PRIORITY_DATA):
+    """
+    Blocks until the shared bucket grants one request.
+    Order calls may dip into the reserve; data calls also yield to any waiting order.
+    Returns the number of seconds spent waiting.
+    """
+    me = f"{os.getpid()}:{threading.get_ident()}"
+    started = time.time()
+
+    while True:
+        with _shared_state() as state:
+            _refill(state)
+            _prune_waiters(state)
+            waiting = state["waiting"]
+
+            if priority == PRIORITY_ORDER:
+                floor = 1.0
+            else:
+                orders_waiting = any(v == PRIORITY_ORDER for k, v in waiting.items() if k != me)
+                floor = float("inf") if orders_waiting else 1.0 + ORDER_RESERVE
+
+            if state["tokens"] >= floor:
+                state["tokens"] -= 1.0
+                waiting.pop(me, None)
+                break
+
+            waiting[me] = priority
+            deficit = (1.0 if floor == float("inf") else floor) - state["tokens"]
+
+        time.sleep(min(MAX_WAIT_SLICE, max(0.01, deficit * 60.0 / RATE_LIMIT_PER_MIN)))
+
+    waited = time.time() - started
+    with _stats_lock:
+        _local_stats["calls"] += 1
+        if waited > 0.01:
+            _local_stats["waited"] += 1
+            _local_stats["wait_seconds"] += waited
+    return waited
+
+def queue_depth():
+    """Returns a snapshot of the shared bucket: tokens left and waiters per priority."""
+    with _shared_state() as state:
+        _refill(state)
+        _prune_waiters(state)
+        values = list(state["waiting"].values())
+        return {
+            "tokens": round(state["tokens"], 2),
+            "waiting_order": values.count(PRIORITY_ORDER),
+            "waiting_data": values.count(PRIORITY_DATA)
+        }
+
+def log_queue_depth():
+    """Writes the governor state to InfluxDB (called by the supervisor each cycle)."""
+    try:
+        depth = queue_depth()
+        data_str = (
+            f'rate_limiter,host={HOSTNAME} '
+            f'tokens={depth["tokens"]},waiting_order={depth["waiting_order"]}i,waiting_data={depth["waiting_data"]}i'
+        )
+        url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+        requests.post(url, data=data_str, timeout=2)
+    except Exception as e:
+        print(f"[!] Rate Limiter Metrics Error: {e}")
+
+def local_stats():
+    with _stats_lock:
+        return dict(_local_stats)
+
+# --- CLIENT WRAPPER ---
+class GovernedClient:
+    """
+    Transparent proxy around an Alpaca client.
+    Every public method call takes a token from the shared bucket first.
+    Order-entry calls raise TradingHalted while the kill switch is engaged.
+    """
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        priority = PRIORITY_ORDER if name.startswith(ORDER_METHOD_PREFIXES) else PRIORITY_DATA
+        haltable = name.startswith(HALTED_METHOD_PREFIXES)
+
+        def governed_call(*args, **kwargs):
+            acquire(priority)
+            # Checked after the wait, right before the request leaves
+            if haltable and os.path.exists(HALT_FILE):
+                raise TradingHalted(f"{name} refused: kill switch engaged")
+            return attr(*args, **kwargs)
+        return governed_call
+
+def govern(client):
+    """Wraps an Alpaca client so all of its calls go through the fleet governor."""
+    return GovernedClient(client)
@@ -0,0 +1,162 @@
+"""
+Downsampled rollups for the fleet's monitoring measurements.
+
+InfluxDB continuous queries maintain 1-minute, 1-hour and 1-day aggregates in
+their own retention policies (rp_1m, rp_1h, rp_1d). Each level is built from
+the one below it, so the hourly CQ reads 60 one-minute rows per series rather
+than every raw point.
+
+    python rollups.py ensure      # Create retention policies + continuous queries (idempotent)
+    python rollups.py backfill    # One-off: roll up the history that predates the CQs
+
+Long-range readers ask `source_for()` / `query()` which level to read.
+In Grafana, select the rollup directly, e.g. FROM "rp_1h"."bot_monitor".
+"""
+import sys
+import requests
+import config
+
+# --- CONFIGURATION ---
+DB_NAME = config.INFLUX_DB_NAME
+QUERY_URL = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/query"
+MAX_POINTS = 1000     # Per series; reads are routed to the finest level under this
+
+# (name, group-by interval, retention policy, retention duration, source RP or None for raw)
+LEVELS = [
+    ("1m", 60, "rp_1m", "30d", None),
+    ("1h", 3600, "rp_1h", "400d", "rp_1m"),
+    ("1d", 86400, "rp_1d", "INF", "rp_1h"),
+]
+
+# Measurement -> (raw write interval in seconds, [(aggregate, field, output name)])
+TRADE_FIELDS = [("count", "price", "trades"), ("mean", "price", "price"), ("sum", "qty", "qty")]
+ROLLUPS = {
+    "bot_monitor": (60, [("mean", "status_code", "status_code"), ("mean", "memory", "memory"), ("mean", "cpu", "cpu"),
+                         ("max", "restarts", "restarts"), ("max", "uptime", "uptime")]),
+    "bot_performance": (300, [("last", "allocation", "allocation"), ("last", "unrealized_pl", "unrealized_pl"),
+                              ("last", "realized_pl", "realized_pl"), ("last", "total_pl", "total_pl")]),
+    "account_stats": (300, [("last", "equity", "equity"), ("min", "equity", "equity_min"), ("max", "equity", "equity_max"),
+                            ("last", "cash", "cash"), ("last", "buying_power", "buying_power")]),
+    "bot_loop": (60, [("max", "p50_ms", "p50_ms"), ("max", "p95_ms", "p95_ms"), ("max", "p99_ms", "p99_ms"),
+                      ("max", "max_ms", "max_ms"), ("max", "heartbeat_age", "heartbeat_age")]),
+    "trades": (None, TRADE_FIELDS),
+    "crypto_trades": (None, TRADE_FIELDS),
+    "survivor_trades": (None, TRADE_FIELDS),
+    "breakout_trades": (None, TRADE_FIELDS),
+    "wheel_trades": (None, [("count", "price", "trades"), ("mean", "price", "price")]),
+    "condor_trades": (None, [("count", "price", "trades"), ("mean", "price", "price")]),
+    "executions": (None, [("count", "fill_price", "fills"), ("mean", "slippage_bps", "slippage_bps"),
+                          ("max", "slippage_bps", "slippage_bps_max"), ("mean", "decision_to_submit_ms", "decision_to_submit_ms"),
+                          ("mean", "submit_to_ack_ms", "submit_to_ack_ms"), ("mean", "ack_to_fill_ms", "ack_to_fill_ms"),
+                          ("max", "decision_to_fill_ms", "decision_to_fill_ms_max")]),
+    "shadow_trades": (None, [("count", "price", "trades"), ("sum", "pnl", "pnl")]),
+    "shadow_pnl": (900, [("last", "realized", "realized"), ("last", "unrealized", "unrealized"), ("last", "total", "total"),
+                         ("last", "open_positions", "open_positions"), ("last", "trades", "trades")]),
+}
+
+# Re-aggregating a rollup: counts add up, everything else keeps its function
+CASCADE = {"count": "sum"}
+
+# --- INFLUX HELPERS ---
+def _influx(q, method="get"):
+    params = {'db': DB_NAME, 'q': q}
+    r = requests.post(QUERY_URL, params=params, timeout=30) if method == "post" else requests.get(QUERY_URL, params=params, timeout=30)
+    return r.json()
+
+def _names(result):
+    names = set()
+    for series in result.get("results", [{}])[0].get("series", []):
+        cols = series.get("columns", [])
+        if "name" not in cols: continue
+        idx = cols.index("name")
+        names.update(row[idx] for row in series.get("values", []))
+    return names
+
+def _select(measurement, level):
+    """SELECT ... INTO statement for one measurement at one level (without a time range)."""
+    _, interval, rp, _, source_rp = level
+    _, fields = ROLLUPS[measurement]
+    parts = []
+    for agg, field, out in fields:
+        if source_rp:  # Reading a rollup: its columns are already named `out`
+            parts.append(f'{CASCADE.get(agg, agg)}("{out}") AS "{out}"')
+        else:
+            parts.append(f'{agg}("{field}") AS "{out}"')
+    source = f'"{DB_NAME}"."{source_rp}"."{measurement}"' if source_rp else f'"{measurement}"'
+    return f'SELECT {", ".join(parts)} INTO "{DB_NAME}"."{rp}"."{measurement}" FROM {source}', interval
+
+def cq_name(measurement, level_name):
+    return f"cq_{measurement}_{level_name}"
+
+# --- SETUP ---
+def ensure_rollups():
+    """Creates any missing retention policies and continuous queries. Safe to call repeatedly."""
+    try:
+        existing_rps = _names(_influx("SHOW RETENTION POLICIES"))
+        existing_cqs = set()
+        for series in _influx("SHOW CONTINUOUS QUERIES").get("results", [{}])[0].get("series", []):
+            if series.get("name") == DB_NAME:
+                existing_cqs.update(row[0] for row in series.get("values", []))
+
+        created = 0
+        for name, interval, rp, duration, _ in LEVELS:
+            if rp not in existing_rps:
+                _influx(f'CREATE RETENTION POLICY "{rp}" ON "{DB_NAME}" DURATION {duration} REPLICATION 1', "post")
+                created += 1
+
+        for measurement in ROLLUPS:
+            for level in LEVELS:
+                cq = cq_name(measurement, level[0])
+                if cq in existing_cqs: continue
+                select, interval = _select(measurement, level)
+                # RESAMPLE FOR 2 intervals so late points still land in their bucket
+                _influx(f'CREATE CONTINUOUS QUERY "{cq}" ON "{DB_NAME}" RESAMPLE EVERY {interval}s FOR {interval * 2}s '
+                        f'BEGIN {select} GROUP BY time({interval}s), * END', "post")
+                created += 1
+
+        if created: print(f"  📉 Rollups: created {created} retention policies / continuous queries")
+        return True
+    except Exception as e:
+        print(f"[!] Rollup Setup Error: {e}")
+        return False
+
+def backfill(days=400):
+    """CQs only roll up new data; this rolls up existing history once, level by level."""
+    for level in LEVELS:
+        for measurement in ROLLUPS:
+            select, interval = _select(measurement, level)
+            res = _influx(f"{select} WHERE time > now() - {days}d GROUP BY time({interval}s), *", "post")
+            err = res.get("results", [{}])[0].get("error")
+            print(f"  {measurement:<16} {level[0]:<3} {'ERROR ' + err if err else 'ok'}")
+
+# --- QUERY ROUTING ---
+def source_for(measurement, span_seconds):
+    """
+    FROM clause and bucket size (seconds, None = raw) for reading `span_seconds` of a measurement:
+    raw if that stays under MAX_POINTS per series, otherwise the finest rollup that does
+    (and whose retention still covers the span).
+    """
+    raw_interval = ROLLUPS.get(measurement, (None, None))[0]
+    if measurement not in ROLLUPS or (raw_interval and span_seconds / raw_interval <= MAX_POINTS):
+        return f'"{measurement}"', None
+
+    retention = {"30d": 30 * 86400, "400d": 400 * 86400, "INF": float('inf')}
+    for _, interval, rp, duration, _ in LEVELS:
+        if span_seconds / interval <= MAX_POINTS and span_seconds <= retention[duration]:
+            return f'"{DB_NAME}"."{rp}"."{measurement}"', interval
+    _, interval, rp, _, _ = LEVELS[-1]
+    return f'"{DB_NAME}"."{rp}"."{measurement}"', interval
+
+def query(measurement, days, select="*", where=""):
+    """Builds a routed SELECT over the last `days` days."""
+    source, _ = source_for(measurement, days * 86400)
+    clause = f" AND {where}" if where else ""
+    return f"SELECT {select} FROM {source} WHERE time > now() - {int(days * 86400)}s{clause}"
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "backfill":
+        ensure_rollups()
+        backfill()
+    else:
+        ensure_rollups()
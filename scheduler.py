@@ -0,0 +1,59 @@
+import datetime
+import heartbeat
+import market_calendar
+
+# --- CONFIGURATION ---
+# Bar timeframe (minutes) each strategy's signals are computed from
+STRATEGY_TIMEFRAMES = {
+    "survivor_bot": 15,
+    "trend_bot": 15,
+}
+BAR_SETTLE_SECONDS = 5      # Alpaca publishes a bar a few seconds after it closes
+EXIT_CHECK_INTERVAL = 60    # Default cadence of the intrabar (exits-only) path
+
+# Scan modes returned by BarCloseScheduler.wait()
+FULL_SCAN = "full"
+EXITS_ONLY = "exits"
+
+def next_bar_close(timeframe_minutes, now=None):
+    """Epoch seconds of the next bar boundary for a timeframe (bars align to the broker/sim clock)."""
+    now = market_calendar.now() if now is None else now
+    period = timeframe_minutes * 60
+    return (int(now // period) + 1) * period
+
+class BarCloseScheduler:
+    """
+    Wakes a strategy just after each of its bars closes (FULL_SCAN) and,
+    optionally, every `exit_interval` seconds in between (EXITS_ONLY).
+    """
+    def __init__(self, bot_name, exit_interval=EXIT_CHECK_INTERVAL):
+        self.bot_name = bot_name
+        self.timeframe = STRATEGY_TIMEFRAMES[bot_name]
+        self.exit_interval = exit_interval
+        self._next_full = None    # None = run a full scan immediately (startup)
+
+    def next_wake(self, now=None):
+        """Returns (seconds_to_sleep, mode) without sleeping."""
+        now = market_calendar.now() if now is None else now
+        if self._next_full is None:
+            return 0.0, FULL_SCAN
+
+        until_full = self._next_full - now
+        if until_full <= 0:
+            return 0.0, FULL_SCAN
+        if self.exit_interval and self.exit_interval < until_full:
+            return float(self.exit_interval), EXITS_ONLY
+        return until_full, FULL_SCAN
+
+    def wait(self):
+        """Sleeps until the next wake-up and returns its mode."""
+        delay, mode = self.next_wake()
+        if delay > 0:
+            heartbeat.sleep(self.bot_name, delay)
+        if mode == FULL_SCAN:
+            self._next_full = next_bar_close(self.timeframe) + BAR_SETTLE_SECONDS
+        return mode
+
+    def describe_next(self):
+        if self._next_full is None: return "now"
+        return datetime.datetime.fromtimestamp(self._next_full).strftime('%H:%M:%S')
@@ -1,9 +1,14 @@
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import market_calendar
 import time
 import json
 import requests
 import pandas as pd
 import datetime
+from alpaca.trading.client import TradingClient
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
@@ -11,6 +16,7 @@ from alpaca.data.timeframe import TimeFrame
 # --- CONFIGURATION ---
 CHECK_INTERVAL = 3600  # Run hourly
 TARGET_FILE = "active_targets.json"
+PRE_OPEN_LEAD = 1800   # Publish targets this long before the bell
 
 # --- THE MAP: Generals -> Soldiers ---
 # If the ETF (Key) moves, we activate the Stocks (Values)
@@ -31,8 +37,10 @@ MOMENTUM_THRESHOLD = 0.02  # 2% Daily Move triggers activation
 VOLATILITY_THRESHOLD = 0.03 # 3% Intra-day range triggers activation
 
 # --- CLIENT ---
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 
+@instrument.timed("influx_write")
 def log_scout_activity(sector, move_pct, status):
     try:
         data_str = f'sector_scout,sector={sector} move_pct={move_pct},status="{status}"'
@@ -57,12 +65,11 @@ def run_scout():
     print("--- 🔭 SECTOR SCOUT (Reconnaissance) STARTED ---")
     
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("sector_scout", budget=300)
         try:
+            if market_calendar.sleep_until_open(trading_client, "sector_scout", lead=PRE_OPEN_LEAD): continue
             now = datetime.datetime.now()
-            if now.hour < 8 or now.hour > 17:
-                print("Sleeping until market hours...")
-                time.sleep(3600)
-                continue
 
             print(f"\n[{now.strftime('%H:%M')}] Scanning Sectors...")
             active_symbols = []
@@ -109,12 +116,14 @@ def run_scout():
 
             # Update the shared file
             update_targets(active_symbols)
-            
-            time.sleep(CHECK_INTERVAL)
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("sector_scout")
+            heartbeat.sleep("sector_scout", CHECK_INTERVAL)
 
         except Exception as e:
             print(f"Scout Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("sector_scout", 60)
 
 if __name__ == "__main__":
     run_scout()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Shadow strategies: parameter variants evaluated on the live scan's bars, without orders.
+
+Variants are listed per bot in bot_config.json. Each one overrides some of
+the bot's parameters; the rest keep the live values:
+
+    "survivor_bot": {..., "shadow_variants": [{"name": "rsi_25_75", "RSI_BUY": 25, "RSI_SELL": 75}]}
+
+The bot hands every bar it already fetched to ShadowBook.observe(). The
+bot's signal function gets each parameter as an array (one entry per
+variant, plus the live settings as "live") and returns every variant's
+target side in one vectorized pass, so an extra variant costs indicator
+math, not another data request. Hypothetical fills happen at the bar's
+close. They go to JOURNAL_FILE and the `shadow_trades` measurement; the
+P&L per variant goes to `shadow_pnl` after each scan. Books survive
+restarts via checkpoints.
+"""
+import os
+import copy
+import json
+import time
+import socket
+import threading
+import requests
+import numpy as np
+import config
+import checkpoint
+import fleet_shard
+import instrument
+
+# --- CONFIGURATION ---
+BOT_CONFIG_FILE = "bot_config.json"
+JOURNAL_FILE = "shadow_journal.jsonl"
+MAX_VARIANTS = getattr(config, 'SHADOW_MAX_VARIANTS', 16)
+BASELINE = "live"          # The bot's own parameters, as a variant (no risk limits, fills at the close)
+HOSTNAME = socket.gethostname()
+
+_config_cache = {"mtime": None, "bots": {}}
+
+def load_variants(bot_name, defaults):
+    """[(name, params)] for the bot: the live parameters first, then each configured variant."""
+    try:
+        mtime = os.path.getmtime(BOT_CONFIG_FILE)
+        if mtime != _config_cache["mtime"]:
+            with open(BOT_CONFIG_FILE, 'r') as f:
+                _config_cache["bots"] = json.load(f).get("bots", {})
+            _config_cache["mtime"] = mtime
+    except (OSError, ValueError):
+        pass
+    configured = _config_cache["bots"].get(bot_name, {}).get("shadow_variants", [])
+    if not configured: return []
+    variants = [(BASELINE, dict(defaults))]
+    for i, v in enumerate(configured[:MAX_VARIANTS]):
+        params = dict(defaults)
+        params.update({k: v[k] for k in defaults if k in v})
+        variants.append((str(v.get("name", f"variant_{i}")).replace(" ", "_"), params))
+    return variants
+
+class ShadowBook:
+    """
+    Hypothetical positions of every variant of one bot.
+
+    `signal_fn(buf, price, params, side, entry, context)` gets `params` as
+    {name: array over variants} plus the variants' current `side` (-1/0/1)
+    and `entry` price (NaN when flat), and returns (target_side, entry_qty)
+    arrays. A change of side closes the old position at `price` and opens
+    the new one.
+    """
+    def __init__(self, bot_name, defaults, signal_fn):
+        self.bot_name = bot_name
+        self.defaults = defaults
+        self.signal_fn = signal_fn
+        self.name = f"shadow_{fleet_shard.worker_name(bot_name)}"
+        saved = checkpoint.load(self.name) or {}
+        self.positions = saved.get("positions", {})   # variant -> symbol -> {"side", "qty", "entry"}
+        self.realized = saved.get("realized", {})     # variant -> P&L
+        self.trades = saved.get("trades", {})         # variant -> closed trade count
+        self.marks = {}                                # symbol -> last observed price
+        self.pending = []                              # Fills since the last flush
+        self.variants = []
+        self.scan_context = {}
+        self.generation = 0                            # Bumped by begin_scan() and flush(); late observes are dropped
+        self.lock = threading.Lock()                   # observe() runs on scan workers
+
+    def begin_scan(self, **context):
+        """
+        Re-reads the variant list (edits to bot_config.json apply from the next scan).
+        `context` (equity, target list, ...) is passed to every signal_fn call of this scan.
+        """
+        variants = load_variants(self.bot_name, self.defaults)
+        with self.lock:
+            self.variants = variants
+            self.scan_context = context
+            self.generation += 1
+        return bool(self.variants)
+
+    @instrument.timed("shadow_observe")
+    def observe(self, symbol, buf, price, scan=None, **context):
+        """`scan` is the generation the caller started under (a worker past the scan deadline is ignored)."""
+        with self.lock:
+            if not self.variants or (scan is not None and scan != self.generation): return
+            variants, scan_context, scan = self.variants, self.scan_context, self.generation
+            names = [n for n, _ in variants]
+            held = [self.positions.get(n, {}).get(symbol) for n in names]
+        params = {k: np.array([p[k] for _, p in variants]) for k in self.defaults}
+        side = np.array([h["side"] if h else 0 for h in held])
+        entry = np.array([h["entry"] if h else np.nan for h in held])
+
+        target, qty = self.signal_fn(buf, price, params, side, entry, dict(scan_context, symbol=symbol, **context))
+
+        now = time.time()
+        with self.lock:
+            if scan != self.generation: return   # flush() ran meanwhile
+            self.marks[symbol] = price
+            for i in np.flatnonzero(target != side):
+                name = names[i]
+                book = self.positions.setdefault(name, {})
+                if held[i]:
+                    pnl = (price - held[i]["entry"]) * held[i]["qty"] * held[i]["side"]
+                    self.realized[name] = self.realized.get(name, 0.0) + pnl
+                    self.trades[name] = self.trades.get(name, 0) + 1
+                    del book[symbol]
+                    self.pending.append({"ts": now, "bot": self.bot_name, "variant": name, "symbol": symbol,
+                                         "action": "close", "side": held[i]["side"], "qty": held[i]["qty"],
+                                         "price": price, "pnl": pnl})
+                if target[i] != 0 and qty[i] > 0:
+                    book[symbol] = {"side": int(target[i]), "qty": float(qty[i]), "entry": price}
+                    self.pending.append({"ts": now, "bot": self.bot_name, "variant": name, "symbol": symbol,
+                                         "action": "open", "side": int(target[i]), "qty": float(qty[i]),
+                                         "price": price, "pnl": 0.0})
+
+    def summary(self):
+        """{variant: (realized, unrealized, open positions, closed trades)} at the last observed prices."""
+        with self.lock:
+            return self._summary()
+
+    def _summary(self):
+        out = {}
+        for name, _ in self.variants:
+            book = self.positions.get(name, {})
+            unrealized = sum((self.marks[s] - p["entry"]) * p["qty"] * p["side"] for s, p in book.items() if s in self.marks)
+            out[name] = (self.realized.get(name, 0.0), unrealized, len(book), self.trades.get(name, 0))
+        return out
+
+    def flush(self):
+        """End of scan: journal the fills, export trades and P&L, checkpoint the books."""
+        with self.lock:
+            if not self.variants: return
+            self.generation += 1
+            fills, self.pending = self.pending, []
+            summary, variant_count = self._summary(), len(self.variants)
+            state = copy.deepcopy({"positions": self.positions, "realized": self.realized, "trades": self.trades})
+        if fills:
+            try:
+                with open(JOURNAL_FILE, 'a') as f:
+                    f.write("".join(json.dumps(x) + "\n" for x in fills))
+            except Exception as e:
+                print(f"  [!] Shadow journal write failed: {e}")
+
+        lines = [f'shadow_trades,host={HOSTNAME},bot={x["bot"]},variant={x["variant"]},symbol={x["symbol"].replace("/", "")} '
+                 f'price={x["price"]},qty={x["qty"]},pnl={x["pnl"]:.2f},side={x["side"]}i,action="{x["action"]}" {int(x["ts"] * 1e9)}'
+                 for x in fills]
+        for name, (realized, unrealized, open_count, trades) in summary.items():
+            lines.append(f'shadow_pnl,host={HOSTNAME},bot={self.bot_name},variant={name} realized={realized:.2f},'
+                         f'unrealized={unrealized:.2f},total={realized + unrealized:.2f},open_positions={open_count}i,trades={trades}i')
+        try:
+            url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+            requests.post(url, data="\n".join(lines), timeout=5)
+        except Exception as e:
+            print(f"[!] Shadow Metrics Error: {e}")
+
+        if fills: print(f"    👥 Shadow: {len(fills)} hypothetical fills across {variant_count} variants")
+        checkpoint.save(self.name, state)
@@ -0,0 +1,576 @@
+"""
+Local Alpaca + InfluxDB stand-in for offline fleet load testing.
+
+One HTTP server answers the trading API (/v2/account, /v2/positions, /v2/orders,
+/v2/clock, /v2/calendar, /v2/options/contracts), the market-data API
+(stock/crypto bars + latest trades, option latest quotes) and Influx's
+/write and /query. Prices follow a deterministic random walk per symbol, and
+simulated time runs `--speed` times faster than the wall clock.
+
+Point the bots at it from config.py:
+    ALPACA_URL_OVERRIDE = "http://127.0.0.1:8765"
+    ALPACA_DATA_URL_OVERRIDE = "http://127.0.0.1:8765"
+    INFLUX_HOST = "127.0.0.1"; INFLUX_PORT = 8765
+
+    python simulator.py serve --speed 30 --start 2026-01-05T09:25
+    python simulator.py fleet --speed 60 --symbols 300 survivor_bot trend_bot condor_bot
+"""
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import zlib
+import argparse
+import datetime
+import threading
+import importlib
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytz
+
+# --- CONFIGURATION ---
+DEFAULT_PORT = 8765
+STARTING_CASH = 100000.0
+INTRADAY_HISTORY_DAYS = 30     # 1-minute path generated before the sim start
+DAILY_HISTORY_DAYS = 600
+OPTION_VOL = 0.50              # Flat implied vol used to quote the synthetic chains
+OPTION_SPREAD = 0.03           # Bid/ask +/- 3% around the model price
+EASTERN = pytz.timezone('US/Eastern')
+
+def _iso(dt):
+    return dt.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode())
+
+def _norm_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+# --- SIMULATED TIME ---
+class SimClock:
+    def __init__(self, start, speed):
+        self.start = start
+        self.speed = speed
+        self._real_start = time.time()
+
+    def now(self):
+        return self.start + datetime.timedelta(seconds=(time.time() - self._real_start) * self.speed)
+
+    @staticmethod
+    def session(day):
+        """Regular session for a date (weekdays only, no holiday table)."""
+        if day.weekday() >= 5: return None
+        open_ = EASTERN.localize(datetime.datetime.combine(day, datetime.time(9, 30)))
+        close = EASTERN.localize(datetime.datetime.combine(day, datetime.time(16, 0)))
+        return open_, close
+
+    def is_open(self, now=None):
+        now = now or self.now()
+        session = self.session(now.astimezone(EASTERN).date())
+        return bool(session and session[0] <= now < session[1])
+
+    def next_session(self, now=None):
+        now = now or self.now()
+        day = now.astimezone(EASTERN).date()
+        for i in range(10):
+            session = self.session(day + datetime.timedelta(days=i))
+            if session and now < session[1]:
+                return session
+        return None
+
+# --- PRICE PATHS ---
+class PricePaths:
+    """Deterministic 1-minute random walks, generated lazily per symbol."""
+    def __init__(self, clock):
+        self.clock = clock
+        self.origin = clock.start.replace(second=0, microsecond=0) - datetime.timedelta(days=INTRADAY_HISTORY_DAYS)
+        self._paths = {}
+        self._daily = {}
+        self._lock = threading.Lock()
+
+    def _base_price(self, symbol):
+        if symbol.startswith("BTC"): return 40000.0
+        if symbol.startswith("ETH"): return 2500.0
+        return 10.0 + (_seed(symbol) % 4000) / 10.0
+
+    def _minute_index(self, ts):
+        return int((ts - self.origin).total_seconds() // 60)
+
+    def path(self, symbol, upto_index):
+        symbol = symbol.replace("/", "")   # BTC/USD (data API) and BTCUSD (positions) share one path
+        with self._lock:
+            path = self._paths.get(symbol)
+            if path is None or len(path) <= upto_index:
+                size = max(upto_index + 1, (INTRADAY_HISTORY_DAYS + 3) * 1440)
+                size = max(size, 2 * len(path) if path is not None else 0)
+                rng = np.random.default_rng(_seed(symbol))
+                steps = rng.normal(0.0, 0.0012, size).astype(np.float64)
+                path = (self._base_price(symbol) * np.exp(np.cumsum(steps))).astype(np.float64)
+                self._paths[symbol] = path
+            return path
+
+    def price(self, symbol, ts=None):
+        idx = self._minute_index(ts or self.clock.now())
+        return float(self.path(symbol, idx)[idx])
+
+    def intraday_bars(self, symbol, minutes, limit, session_only):
+        now = self.clock.now()
+        end_idx = self._minute_index(now)
+        path = self.path(symbol, end_idx)
+        # Only completed bars, aligned to the timeframe
+        end_idx -= (end_idx + int(self.origin.timestamp() // 60)) % minutes
+        bars = []
+        idx = end_idx - minutes
+        while idx >= 0 and len(bars) < limit:
+            ts = self.origin + datetime.timedelta(minutes=idx)
+            if not session_only or self.clock.is_open(ts):
+                chunk = path[idx:idx + minutes]
+                bars.append({"t": _iso(ts), "o": float(chunk[0]), "h": float(chunk.max()), "l": float(chunk.min()),
+                             "c": float(chunk[-1]), "v": 1000 * minutes, "n": 10 * minutes, "vw": float(chunk.mean())})
+            idx -= minutes
+        bars.reverse()
+        return bars
+
+    def daily_bars(self, symbol, limit):
+        with self._lock:
+            closes = self._daily.get(symbol)
+            if closes is None:
+                rng = np.random.default_rng(_seed(symbol) + 1)
+                closes = np.exp(np.cumsum(rng.normal(0.0, 0.02, DAILY_HISTORY_DAYS)))
+                self._daily[symbol] = closes
+        # Anchor the daily history so its last close meets the intraday path
+        scale = self.price(symbol) / closes[-1]
+        today = self.clock.now().astimezone(EASTERN).date()
+        bars = []
+        for i, c in enumerate(closes[-limit:]):
+            day = today - datetime.timedelta(days=min(limit, len(closes)) - i)
+            close = float(c * scale)
+            bars.append({"t": _iso(EASTERN.localize(datetime.datetime.combine(day, datetime.time(0, 0)))),
+                         "o": close * 0.995, "h": close * 1.01, "l": close * 0.99, "c": close, "v": 1e6, "n": 1e4, "vw": close})
+        return bars
+
+# --- OPTIONS ---
+OCC_PATTERN = re.compile(r'^([A-Z]+)(\d{6})([CP])(\d{8})$')
+
+def occ_symbol(root, expiry, kind, strike):
+    return f"{root}{expiry.strftime('%y%m%d')}{'C' if kind == 'call' else 'P'}{int(round(strike * 1000)):08d}"
+
+def parse_occ(symbol):
+    m = OCC_PATTERN.match(symbol)
+    if not m: return None
+    root, ymd, cp, strike = m.groups()
+    expiry = datetime.datetime.strptime(ymd, '%y%m%d').date()
+    return root, expiry, "call" if cp == "C" else "put", int(strike) / 1000.0
+
+def black_scholes(spot, strike, years, kind, vol=OPTION_VOL, rate=0.04):
+    years = max(years, 1 / 365)
+    d1 = (math.log(spot / strike) + (rate + vol * vol / 2) * years) / (vol * math.sqrt(years))
+    d2 = d1 - vol * math.sqrt(years)
+    if kind == "call":
+        return spot * _norm_cdf(d1) - strike * math.exp(-rate * years) * _norm_cdf(d2)
+    return strike * math.exp(-rate * years) * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+
+# --- MARKET STATE ---
+class SimMarket:
+    def __init__(self, clock):
+        self.clock = clock
+        self.prices = PricePaths(clock)
+        self.cash = STARTING_CASH
+        self.positions = {}     # symbol -> {"qty", "avg", "asset_class"}
+        self.orders = {}        # id -> order dict
+        self.influx = {}        # measurement -> list of (ts, tags, fields)
+        self.lock = threading.RLock()
+        self.request_count = 0
+
+    # Pricing
+    def mark(self, symbol):
+        opt = parse_occ(symbol)
+        if opt:
+            root, expiry, kind, strike = opt
+            years = (expiry - self.clock.now().date()).days / 365.0
+            return max(0.01, black_scholes(self.prices.price(root), strike, years, kind))
+        return self.prices.price(symbol)
+
+    def quote(self, symbol):
+        mid = self.mark(symbol)
+        return round(mid * (1 - OPTION_SPREAD), 2), round(mid * (1 + OPTION_SPREAD), 2)
+
+    @staticmethod
+    def _is_crypto(symbol):
+        return "/" in symbol or (symbol.endswith("USD") and len(symbol) <= 7 and not OCC_PATTERN.match(symbol))
+
+    def asset_class(self, symbol):
+        if parse_occ(symbol): return "us_option"
+        if self._is_crypto(symbol): return "crypto"
+        return "us_equity"
+
+    # Account
+    def position_json(self, symbol, pos):
+        price = self.mark(symbol)
+        multiplier = 100 if pos["asset_class"] == "us_option" else 1
+        qty = pos["qty"]
+        market_value = price * qty * multiplier
+        cost_basis = pos["avg"] * qty * multiplier
+        return {
+            "asset_id": str(uuid.uuid5(uuid.NAMESPACE_DNS, symbol)), "symbol": symbol, "exchange": "CRYPTO" if pos["asset_class"] == "crypto" else "",
+            "asset_class": pos["asset_class"], "avg_entry_price": str(pos["avg"]), "qty": str(qty),
+            "qty_available": str(qty), "side": "long" if qty > 0 else "short",
+            "market_value": str(market_value), "cost_basis": str(cost_basis),
+            "unrealized_pl": str(market_value - cost_basis),
+            "unrealized_plpc": str((market_value - cost_basis) / abs(cost_basis) if cost_basis else 0),
+            "unrealized_intraday_pl": "0", "unrealized_intraday_plpc": "0",
+            "current_price": str(price), "lastday_price": str(price), "change_today": "0"
+        }
+
+    def account_json(self):
+        market_value = sum(float(self.position_json(s, p)["market_value"]) for s, p in self.positions.items())
+        equity = self.cash + market_value
+        return {
+            "id": "00000000-0000-0000-0000-000000000000", "account_number": "SIM000001", "status": "ACTIVE",
+            "crypto_status": "ACTIVE", "currency": "USD", "cash": str(self.cash), "equity": str(equity),
+            "last_equity": str(equity), "portfolio_value": str(equity), "buying_power": str(max(0.0, self.cash) * 2),
+            "regt_buying_power": str(max(0.0, self.cash) * 2), "daytrading_buying_power": "0",
+            "non_marginable_buying_power": str(max(0.0, self.cash)), "long_market_value": str(market_value),
+            "short_market_value": "0", "initial_margin": "0", "maintenance_margin": "0",
+            "last_maintenance_margin": "0", "sma": "0", "daytrade_count": 0, "multiplier": "2",
+            "pattern_day_trader": False, "trading_blocked": False, "transfers_blocked": False,
+            "account_blocked": False, "trade_suspended_by_user": False, "shorting_enabled": True,
+            "created_at": "2024-01-01T00:00:00Z", "accrued_fees": "0", "pending_transfer_out": "0"
+        }
+
+    # Orders
+    def submit(self, body):
+        now = _iso(self.clock.now())
+        order = {
+            "id": str(uuid.uuid4()), "client_order_id": body.get("client_order_id") or str(uuid.uuid4()),
+            "created_at": now, "updated_at": now, "submitted_at": now, "filled_at": None,
+            "symbol": body["symbol"], "asset_class": self.asset_class(body["symbol"]),
+            "qty": str(body.get("qty")), "filled_qty": "0", "filled_avg_price": None,
+            "order_class": body.get("order_class") or "simple", "order_type": body.get("type", "market"),
+            "type": body.get("type", "market"), "side": body["side"], "time_in_force": body.get("time_in_force", "day"),
+            "limit_price": body.get("limit_price"), "stop_price": None, "status": "new", "extended_hours": False
+        }
+        self.orders[order["id"]] = order
+        self._try_fill(order)
+        return order
+
+    def _try_fill(self, order):
+        if order["status"] not in ("new", "accepted"): return
+        symbol = order["symbol"]
+        is_option = order["asset_class"] == "us_option"
+        if not is_option and order["asset_class"] == "us_equity" and not self.clock.is_open():
+            return
+        bid, ask = self.quote(symbol) if is_option else (self.mark(symbol), self.mark(symbol))
+        fill = ask if order["side"] == "buy" else bid
+        if order["type"] == "limit":
+            limit = float(order["limit_price"])
+            if (order["side"] == "buy" and fill > limit) or (order["side"] == "sell" and fill < limit):
+                return
+            fill = limit
+
+        qty = float(order["qty"])
+        signed = qty if order["side"] == "buy" else -qty
+        key = symbol.replace("/", "")
+        pos = self.positions.get(key, {"qty": 0.0, "avg": 0.0, "asset_class": order["asset_class"]})
+        new_qty = pos["qty"] + signed
+        if pos["qty"] == 0 or (pos["qty"] > 0) == (signed > 0):
+            pos["avg"] = (pos["avg"] * abs(pos["qty"]) + fill * abs(signed)) / abs(new_qty)
+        elif (new_qty > 0) != (pos["qty"] > 0) and new_qty != 0:
+            pos["avg"] = fill
+        pos["qty"] = new_qty
+        if abs(new_qty) < 1e-9:
+            self.positions.pop(key, None)
+        else:
+            self.positions[key] = pos
+
+        self.cash -= signed * fill * (100 if is_option else 1)
+        now = _iso(self.clock.now())
+        order.update({"status": "filled", "filled_qty": order["qty"], "filled_avg_price": str(fill),
+                      "filled_at": now, "updated_at": now})
+
+    def match_resting(self):
+        for order in list(self.orders.values()):
+            self._try_fill(order)
+
+    def cancel(self, order_id):
+        order = self.orders.get(order_id)
+        if order and order["status"] in ("new", "accepted"):
+            order["status"] = "canceled"
+            order["updated_at"] = _iso(self.clock.now())
+            return True
+        return False
+
+    def close_position(self, symbol):
+        pos = self.positions.get(symbol.replace("/", ""))
+        if not pos: return None
+        side = "sell" if pos["qty"] > 0 else "buy"
+        return self.submit({"symbol": symbol, "qty": abs(pos["qty"]), "side": side, "type": "market"})
+
+    # Option chains
+    def option_contracts(self, params):
+        roots = (params.get("underlying_symbols") or "").split(",")
+        kind = params.get("type")
+        gte = datetime.date.fromisoformat(params["expiration_date_gte"]) if params.get("expiration_date_gte") else self.clock.now().date()
+        lte = datetime.date.fromisoformat(params["expiration_date_lte"]) if params.get("expiration_date_lte") else gte + datetime.timedelta(days=60)
+        limit = int(params.get("limit") or 100)
+        contracts = []
+        for root in filter(None, roots):
+            spot = self.prices.price(root)
+            step = 1.0 if spot < 200 else 5.0
+            day = gte
+            while day <= lte:
+                if day.weekday() == 4:  # Fridays
+                    strike = math.floor(spot * 0.7 / step) * step
+                    while strike <= spot * 1.3:
+                        for k in ("put", "call"):
+                            if kind and k != kind: continue
+                            symbol = occ_symbol(root, day, k, strike)
+                            contracts.append({
+                                "id": str(uuid.uuid5(uuid.NAMESPACE_DNS, symbol)), "symbol": symbol,
+                                "name": f"{root} {day} {k} {strike}", "status": "active", "tradable": True,
+                                "expiration_date": day.isoformat(), "root_symbol": root, "underlying_symbol": root,
+                                "underlying_asset_id": str(uuid.uuid5(uuid.NAMESPACE_DNS, root)), "type": k,
+                                "style": "american", "strike_price": str(strike), "size": "100",
+                                "open_interest": "1000", "close_price": str(round(self.mark(symbol), 2))
+                            })
+                        strike += step
+                day += datetime.timedelta(days=1)
+        return {"option_contracts": contracts[:limit], "next_page_token": None}
+
+    # Influx
+    def influx_write(self, body):
+        now = self.clock.now().timestamp()
+        for line in body.splitlines():
+            line = line.strip()
+            if not line: continue
+            try:
+                head, fields_str = re.split(r'(?<!\\) ', line, maxsplit=1)
+                fields_str = fields_str.rsplit(' ', 1)[0] if re.search(r' \d{9,}$', fields_str) else fields_str
+                parts = head.split(',')
+                tags = dict(p.split('=', 1) for p in parts[1:])
+                fields = {}
+                for kv in re.findall(r'(\w+)=("(?:[^"\\]|\\.)*"|[^,]+)', fields_str):
+                    k, v = kv
+                    if v.startswith('"'): fields[k] = v[1:-1]
+                    elif v.endswith('i'): fields[k] = int(v[:-1])
+                    elif v in ("true", "false"): fields[k] = v == "true"
+                    else: fields[k] = float(v)
+                self.influx.setdefault(parts[0], []).append((now, tags, fields))
+            except ValueError:
+                continue
+
+    def influx_query(self, query):
+        m = re.search(r'FROM\s+(.+?)(?:\s+WHERE\s+time\s*>\s*now\(\)\s*-\s*(\d+)([smhd]))?\s*(?:GROUP|$)', query, re.I)
+        if not m or not query.strip().upper().startswith("SELECT"):
+            return {"results": [{"statement_id": 0}]}
+        names = [n.strip().strip('"').split('.')[-1].strip('"') for n in m.group(1).split(',')]
+        span = int(m.group(2)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(3)] if m.group(2) else None
+        cutoff = self.clock.now().timestamp() - span if span else 0
+        series = []
+        for name in names:
+            points = [p for p in self.influx.get(name, []) if p[0] > cutoff]
+            if not points: continue
+            columns = ["time"] + sorted({k for p in points for k in list(p[1]) + list(p[2])})
+            values = [[int(p[0])] + [p[1].get(c, p[2].get(c)) for c in columns[1:]] for p in points]
+            series.append({"name": name, "columns": columns, "values": values})
+        result = {"statement_id": 0}
+        if series: result["series"] = series
+        return {"results": [result]}
+
+# --- HTTP LAYER ---
+class SimHandler(BaseHTTPRequestHandler):
+    market = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status if payload is not None else 204)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _params(self):
+        parsed = urllib.parse.urlparse(self.path)
+        return parsed.path, {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode() if length else ""
+
+    def do_GET(self):
+        path, params = self._params()
+        market = self.market
+        with market.lock:
+            market.request_count += 1
+            market.match_resting()
+            clock = market.clock
+
+            if path == "/v2/account": return self._send(market.account_json())
+            if path == "/v2/positions":
+                return self._send([market.position_json(s, p) for s, p in market.positions.items()])
+            if path.startswith("/v2/positions/"):
+                symbol = urllib.parse.unquote(path.split("/")[-1]).replace("/", "")
+                pos = market.positions.get(symbol)
+                if not pos: return self._send({"code": 40410000, "message": "position does not exist"}, 404)
+                return self._send(market.position_json(symbol, pos))
+            if path == "/v2/clock":
+                now = clock.now()
+                session = clock.next_session(now)
+                open_, close = session if session else (now, now)
+                next_open = open_ if now < open_ else clock.next_session(close + datetime.timedelta(minutes=1))[0]
+                return self._send({"timestamp": _iso(now), "is_open": clock.is_open(now),
+                                   "next_open": _iso(next_open), "next_close": _iso(close)})
+            if path == "/v2/calendar":
+                start = datetime.date.fromisoformat(params.get("start", clock.now().date().isoformat()))
+                end = datetime.date.fromisoformat(params.get("end", (start + datetime.timedelta(days=30)).isoformat()))
+                days = []
+                day = start
+                while day <= end:
+                    if clock.session(day):
+                        days.append({"date": day.isoformat(), "open": "09:30", "close": "16:00",
+                                     "session_open": "0400", "session_close": "2000", "settlement_date": day.isoformat()})
+                    day += datetime.timedelta(days=1)
+                return self._send(days)
+            if path == "/v2/orders":
+                status = params.get("status", "open")
+                wanted = {"open": ("new", "accepted"), "closed": ("filled", "canceled")}.get(status)
+                orders = [o for o in market.orders.values() if wanted is None or o["status"] in wanted]
+                return self._send(orders[-int(params.get("limit", 500)):])
+            if path.startswith("/v2/orders/"):
+                order = market.orders.get(path.split("/")[-1])
+                return self._send(order) if order else self._send({"message": "order not found"}, 404)
+            if path == "/v2/options/contracts": return self._send(market.option_contracts(params))
+
+            # Market data
+            if path in ("/v2/stocks/bars", "/v1beta3/crypto/us/bars"):
+                symbols = params.get("symbols", "").split(",")
+                tf = params.get("timeframe", "1Min")
+                limit = int(params.get("limit") or 1000)
+                bars = {}
+                for s in filter(None, symbols):
+                    if tf.endswith("Day"):
+                        bars[s] = market.prices.daily_bars(s, limit)
+                    else:
+                        minutes = int(re.match(r'(\d+)', tf).group(1)) * (60 if tf.endswith("Hour") else 1)
+                        bars[s] = market.prices.intraday_bars(s, minutes, limit, session_only=path.startswith("/v2"))
+                return self._send({"bars": bars, "next_page_token": None})
+            if path in ("/v2/stocks/trades/latest", "/v1beta3/crypto/us/latest/trades"):
+                now = _iso(clock.now())
+                trades = {s: {"t": now, "p": market.prices.price(s), "s": 100, "x": "V", "i": 1, "c": ["@"], "z": "C"}
+                          for s in filter(None, params.get("symbols", "").split(","))}
+                return self._send({"trades": trades})
+            if path == "/v1beta1/options/quotes/latest":
+                now = _iso(clock.now())
+                quotes = {}
+                for s in filter(None, params.get("symbols", "").split(",")):
+                    bid, ask = market.quote(s)
+                    quotes[s] = {"t": now, "bp": bid, "bs": 10, "bx": "C", "ap": ask, "as": 10, "ax": "C", "c": "A"}
+                return self._send({"quotes": quotes})
+
+            # Influx
+            if path == "/query": return self._send(market.influx_query(params.get("q", "")))
+            if path == "/ping": return self._send(None)
+
+        self._send({"message": f"not simulated: {path}"}, 404)
+
+    def do_POST(self):
+        path, params = self._params()
+        body = self._body()
+        market = self.market
+        with market.lock:
+            market.request_count += 1
+            if path == "/v2/orders": return self._send(market.submit(json.loads(body)))
+            if path == "/write":
+                market.influx_write(body)
+                return self._send(None)
+            if path == "/query": return self._send(market.influx_query(params.get("q", "") or urllib.parse.parse_qs(body).get("q", [""])[0]))
+        self._send({"message": f"not simulated: {path}"}, 404)
+
+    def do_DELETE(self):
+        path, params = self._params()
+        market = self.market
+        with market.lock:
+            market.request_count += 1
+            if path == "/v2/orders":
+                cancelled = [o["id"] for o in list(market.orders.values()) if market.cancel(o["id"])]
+                return self._send([{"id": oid, "status": 200} for oid in cancelled], 207)
+            if path.startswith("/v2/orders/"):
+                return self._send(None) if market.cancel(path.split("/")[-1]) else self._send({"message": "not found"}, 404)
+            if path == "/v2/positions":
+                closed = [market.close_position(s) for s in list(market.positions)]
+                return self._send([{"symbol": o["symbol"], "status": 200, "body": o} for o in closed if o], 207)
+            if path.startswith("/v2/positions/"):
+                order = market.close_position(urllib.parse.unquote(path.split("/")[-1]))
+                return self._send(order) if order else self._send({"message": "position does not exist"}, 404)
+        self._send({"message": f"not simulated: {path}"}, 404)
+
+def start_server(market, port=DEFAULT_PORT):
+    handler = type("BoundSimHandler", (SimHandler,), {"market": market})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# --- FLEET RUNNER ---
+FLEET = {
+    "survivor_bot": "run_survivor_bot", "trend_bot": "run_trend_bot", "crypto_grid": "run_grid_bot",
+    "crypto_breakout": "run_breakout_bot", "wheel_bot": "run_wheel_bot", "condor_bot": "run_condor_bot",
+    "accountant": "run_accountant", "market_analyst": "run_analyst", "sector_scout": "run_scout",
+}
+
+def run_fleet(market, port, bots, symbols):
+    """Runs bots in-process against the simulator with sleeps compressed by the sim speed."""
+    import config
+    base = f"http://127.0.0.1:{port}"
+    config.ALPACA_URL_OVERRIDE = base
+    config.ALPACA_DATA_URL_OVERRIDE = base
+    config.INFLUX_HOST, config.INFLUX_PORT = "127.0.0.1", port
+    config.ALPACA_RATE_LIMIT = 100000   # The simulator has no request limit
+
+    if symbols:
+        with open("active_targets.json", 'w') as f:
+            json.dump({"targets": [f"SIM{i:03d}" for i in range(symbols)], "updated": str(datetime.datetime.now())}, f)
+
+    real_sleep = time.sleep
+    time.sleep = lambda seconds: real_sleep(max(0.0, seconds) / market.clock.speed)
+    import market_calendar
+    market_calendar.clock = lambda: market.clock.now().timestamp()   # Bar-close scans follow sim time, not wall time
+
+    for name in bots:
+        module = importlib.import_module(name)
+        threading.Thread(target=getattr(module, FLEET[name]), name=name, daemon=True).start()
+        print(f"  [+] {name} running against {base}")
+
+    while True:
+        real_sleep(10)
+        print(f"[SIM {market.clock.now().astimezone(EASTERN).strftime('%a %H:%M')}] "
+              f"requests={market.request_count} orders={len(market.orders)} positions={len(market.positions)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Alpaca/InfluxDB simulator")
+    parser.add_argument("mode", choices=["serve", "fleet"])
+    parser.add_argument("bots", nargs="*", default=[])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--speed", type=float, default=1.0, help="Simulated seconds per real second")
+    parser.add_argument("--start", default=None, help="Sim start (US/Eastern), e.g. 2026-01-05T09:25")
+    parser.add_argument("--symbols", type=int, default=0, help="Write N synthetic scout targets")
+    args = parser.parse_intermixed_args()
+
+    start = EASTERN.localize(datetime.datetime.fromisoformat(args.start)) if args.start else datetime.datetime.now(EASTERN)
+    sim_market = SimMarket(SimClock(start, args.speed))
+    start_server(sim_market, args.port)
+    print(f"--- 🧪 FLEET SIMULATOR on :{args.port} (x{args.speed}, start {start.strftime('%Y-%m-%d %H:%M %Z')}) ---")
+
+    if args.mode == "fleet":
+        run_fleet(sim_market, args.port, args.bots or list(FLEET), args.symbols)
+    else:
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt:
+            sys.exit(0)
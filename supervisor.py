@@ -6,11 +6,22 @@ import socket
 import datetime
 import os
 import shutil
+import collections
 import config  # Ensure config.py has WEBHOOK_OVERSEER and INFLUX details
+import rate_limiter
+import rollups
+import heartbeat
+import instrument
+import kill_switch
 
 # --- CONFIGURATION ---
 BOT_CONFIG_FILE = "bot_config.json"
 CHECK_INTERVAL = 60
+HEARTBEAT_CHECK_INTERVAL = 5  # Stalls are caught within this of a missed deadline
+STALL_GRACE = 5               # Slack past a heartbeat deadline before restarting
+STARTUP_GRACE = 90            # Don't judge a process we just (re)started until it has had time to beat
+LOOP_WINDOW = 200             # Cycle durations kept per bot for the loop percentiles
+ROLLUP_CHECK_INTERVAL = 3600  # Re-assert rollup CQs (e.g. after the Influx DB is recreated)
 HOSTNAME = socket.gethostname()
 
 # --- DISCORD ALERTS ---
@@ -81,6 +92,16 @@ def load_bot_config():
         print(f"[!] JSON Error: {e}")
         return None
 
+def desired_processes(bot_name, details):
+    """pm2 process name -> extra env. `"workers": N` shards a bot into N processes (see fleet_shard.py)."""
+    workers = int(details.get('workers', 1))
+    if workers <= 1: return {bot_name: {}}
+    return {f"{bot_name}-w{i}": {"FLEET_WORKER": f"w{i}"} for i in range(workers)}
+
+def is_process_of(proc_name, bot_name):
+    suffix = proc_name[len(bot_name):]
+    return proc_name == bot_name or (proc_name.startswith(bot_name) and suffix.startswith("-w") and suffix[2:].isdigit())
+
 def manage_fleet(pm2_list, bot_config_data):
     """
     Compares actual PM2 state vs. Desired Config state.
@@ -97,63 +118,152 @@ def manage_fleet(pm2_list, bot_config_data):
     for bot_name, details in target_bots.items():
         script = details.get('script')
         desired_status = details.get('status') # 'active' or 'paused'
-        actual_status = current_state.get(bot_name, "missing")
-
-        # 1. Bot should be ACTIVE
-        if desired_status == "active":
-            if actual_status == "missing":
-                print(f"  [+] Launching {bot_name}...")
-                subprocess.run(['pm2', 'start', script, '--name', bot_name])
-                send_discord_alert(f"🟢 **LAUNCH**: `{bot_name}` started by Supervisor.")
-            
-            elif actual_status in ['stopped', 'errored']:
-                print(f"  [!] Reviving {bot_name}...")
-                subprocess.run(['pm2', 'restart', bot_name])
-                send_discord_alert(f"⚠️ **REVIVED**: `{bot_name}` was down/stopped. Restarting...")
-
-        # 2. Bot should be PAUSED
-        elif desired_status == "paused":
-            if actual_status == "online":
-                print(f"  [-] Pausing {bot_name}...")
-                subprocess.run(['pm2', 'stop', bot_name])
-                send_discord_alert(f"⏸️ **PAUSED**: `{bot_name}` stopped by config.")
+        processes = desired_processes(bot_name, details)
+
+        for proc_name, extra_env in processes.items():
+            actual_status = current_state.get(proc_name, "missing")
+
+            # 1. Bot should be ACTIVE
+            if desired_status == "active":
+                if actual_status == "missing":
+                    print(f"  [+] Launching {proc_name}...")
+                    # pm2 keeps the launch environment across restarts (FLEET_WORKER for shard workers)
+                    subprocess.run(['pm2', 'start', script, '--name', proc_name], env={**os.environ, **extra_env})
+                    send_discord_alert(f"🟢 **LAUNCH**: `{proc_name}` started by Supervisor.")
+                
+                elif actual_status in ['stopped', 'errored']:
+                    print(f"  [!] Reviving {proc_name}...")
+                    subprocess.run(['pm2', 'restart', proc_name])
+                    send_discord_alert(f"⚠️ **REVIVED**: `{proc_name}` was down/stopped. Restarting...")
+
+            # 2. Bot should be PAUSED
+            elif desired_status == "paused":
+                if actual_status == "online":
+                    print(f"  [-] Pausing {proc_name}...")
+                    subprocess.run(['pm2', 'stop', proc_name])
+                    send_discord_alert(f"⏸️ **PAUSED**: `{proc_name}` stopped by config.")
+
+        # 3. Worker count changed: retire processes that are no longer wanted (their shards rebalance)
+        for proc_name in current_state:
+            if is_process_of(proc_name, bot_name) and proc_name not in processes:
+                print(f"  [-] Retiring {proc_name}...")
+                subprocess.run(['pm2', 'delete', proc_name])
+                send_discord_alert(f"➖ **RETIRED**: `{proc_name}` (worker count changed).")
+
+# --- STALL DETECTION (Heartbeats) ---
+_cycle_samples = {}   # heartbeat name -> recent cycle durations (seconds)
+_seen_cycles = {}     # heartbeat name -> end ts of the newest cycle already sampled
+_restarted = {}       # pm2 name -> when we last restarted it
+
+def get_pm2_list():
+    result = subprocess.run(['pm2', 'jlist'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return json.loads(result.stdout)
+
+def check_heartbeats(pm2_list):
+    """
+    Restarts online processes that missed their heartbeat deadline (hung loops stay 'online' in pm2).
+    Heartbeats are matched to pm2 processes by pid, so paused bots and leftover files are ignored.
+    """
+    now = time.time()
+    online = {p.get('pid'): p['name'] for p in pm2_list if p['pm2_env']['status'] == 'online'}
+    for hb in heartbeat.read_all():
+        name = hb.get("name")
+        for ended, seconds in hb.get("recent_cycles", []):
+            if ended > _seen_cycles.get(name, 0):
+                _cycle_samples.setdefault(name, collections.deque(maxlen=LOOP_WINDOW)).append(seconds)
+                _seen_cycles[name] = ended
+
+        proc_name = online.get(hb.get("pid"))
+        if proc_name is None: continue
+        if now <= hb["deadline"] + STALL_GRACE: continue
+        if now - _restarted.get(proc_name, 0) < STARTUP_GRACE: continue
+
+        # Confirm against live pm2 state before acting (the cached list can be up to a minute old)
+        live = {p.get('pid'): p['name'] for p in get_pm2_list() if p['pm2_env']['status'] == 'online'}
+        if live.get(hb.get("pid")) != proc_name: continue
+
+        overdue = now - hb["deadline"]
+        print(f"  [!!] {proc_name} stalled ({hb.get('state')}, {overdue:.0f}s past its heartbeat deadline). Restarting...")
+        subprocess.run(['pm2', 'restart', proc_name])
+        _restarted[proc_name] = now
+        send_discord_alert(f"🫀 **STALL**: `{proc_name}` missed its heartbeat by {overdue:.0f}s (hung in `{hb.get('state')}`). Restarted.")
+
+def log_loop_metrics():
+    """Loop-duration percentiles and heartbeat age per bot (bot_loop)."""
+    now = time.time()
+    lines = []
+    for hb in heartbeat.read_all():
+        name = hb.get("name")
+        samples = sorted(_cycle_samples.get(name, []))
+        fields = [f"heartbeat_age={now - hb['ts']:.1f}", f"deadline_in={hb['deadline'] - now:.1f}"]
+        if samples:
+            fields += [f"count={len(samples)}i"] + [f"p{p}_ms={instrument.percentile(samples, p) * 1000:.1f}" for p in (50, 95, 99)]
+            fields.append(f"max_ms={samples[-1] * 1000:.1f}")
+        lines.append(f"bot_loop,host={HOSTNAME},bot={name} {','.join(fields)}")
+    if not lines: return
+    try:
+        url = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/write?db={config.INFLUX_DB_NAME}"
+        requests.post(url, data="\n".join(lines), timeout=2)
+    except Exception as e:
+        print(f"[!] Loop Metrics Error: {e}")
 
 # --- MAIN LOOP ---
 def run_supervisor():
     print("--- 🛡️ FLEET SUPERVISOR ONLINE ---")
     send_discord_alert("🛡️ **Supervisor Online**\nMonitoring Grafana & Enforcing Config.")
+    # Emergency stop fast path: bot_config.json changes are noticed in WATCH_INTERVAL, not CHECK_INTERVAL
+    kill_switch.watch(BOT_CONFIG_FILE)
+    kill_switch.install_signal_handler()
+    last_rollup_check = None
+    last_fleet_pass = None
+    pm2_list = []
+    emergency = False
 
     while True:
         try:
-            # 1. Get Global PM2 Status (One call for efficiency)
-            result = subprocess.run(['pm2', 'jlist'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            pm2_list = json.loads(result.stdout)
-            
-            # 2. Log Metrics to InfluxDB (The Watcher Job)
-            for proc in pm2_list:
-                log_process_to_influx(proc)
-            
-            # 3. Read the Brain (Config)
-            bot_config = load_bot_config()
-            
-            # 4. Enforce Orders (The Overseer Job)
-            if bot_config:
-                # Check for Global Kill Switch
-                if bot_config.get("global_settings", {}).get("emergency_stop", False):
-                    print("[!!!] EMERGENCY STOP ACTIVE")
-                    # Stop everything except the Supervisor itself
-                    for p in pm2_list:
-                        if p['name'] != 'supervisor' and p['pm2_env']['status'] == 'online':
-                            subprocess.run(['pm2', 'stop', p['name']])
-                    time.sleep(10)
-                    continue
-
-                manage_fleet(pm2_list, bot_config)
+            if last_fleet_pass is None or time.time() - last_fleet_pass >= (10 if emergency else CHECK_INTERVAL):
+                last_fleet_pass = time.time()
+
+                # 0. Keep the downsampled rollups (1m/1h/1d continuous queries) in place
+                if last_rollup_check is None or time.time() - last_rollup_check > ROLLUP_CHECK_INTERVAL:
+                    rollups.ensure_rollups()
+                    last_rollup_check = time.time()
+
+                # 1. Get Global PM2 Status (One call for efficiency)
+                pm2_list = get_pm2_list()
+                
+                # 2. Log Metrics to InfluxDB (The Watcher Job)
+                for proc in pm2_list:
+                    log_process_to_influx(proc)
+                rate_limiter.log_queue_depth()
+                log_loop_metrics()
+                
+                # 3. Read the Brain (Config)
+                bot_config = load_bot_config()
+                
+                # 4. Enforce Orders (The Overseer Job)
+                emergency = kill_switch.is_engaged()
+                if bot_config:
+                    # Check for Global Kill Switch (normally already tripped by the watcher thread)
+                    if emergency or bot_config.get("global_settings", {}).get("emergency_stop", False):
+                        print("[!!!] EMERGENCY STOP ACTIVE")
+                        emergency = True
+                        if not kill_switch.is_engaged():
+                            kill_switch.engage("config", pm2_list=pm2_list)
+                        else:
+                            # Stop stragglers (anything started by hand since) except the Supervisor itself
+                            kill_switch.stop_processes(pm2_list)
+                    else:
+                        manage_fleet(pm2_list, bot_config)
+
+            # 5. Between fleet passes: restart hung loops within seconds
+            if not emergency:
+                check_heartbeats(pm2_list)
 
         except Exception as e:
             print(f"[!] Main Loop Error: {e}")
             
-        time.sleep(CHECK_INTERVAL)
+        time.sleep(HEARTBEAT_CHECK_INTERVAL)
 
 if __name__ == "__main__":
     run_supervisor()
\ No newline at end of file
@@ -1,13 +1,24 @@
-import utils
+import order_registry
+import pre_trade_risk
+import market_calendar
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import scheduler
+import checkpoint
+import bar_buffer
+import indicators
+import warmup
+import watchlists
+import fleet_shard
+import shadow
 import time
-import json
-import os
 import datetime
+import math
 import requests
-import pandas as pd
-import pandas_ta as ta
 import pytz
+import numpy as np
 from alpaca.trading.client import TradingClient
 from alpaca.trading.enums import OrderSide, TimeInForce, AssetClass
 from alpaca.trading.requests import MarketOrderRequest
@@ -17,25 +28,33 @@ from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 # --- CONFIGURATION ---
 # Core leveraged ETFs we ALWAYS watch (High Volatility is their nature)
-CORE_WATCHLIST = ["TQQQ", "SQQQ", "SOXL", "SOXS", "FNGU", "UPRO"]
-TARGET_FILE = "active_targets.json" # <--- Reading the Scout's list
+CORE_WATCHLIST = watchlists.SURVIVOR_CORE
 
 # Indicators
 RSI_BUY = 30        # Oversold (Buy the dip)
 RSI_SELL = 70       # Overbought (Sell the rip)
+RSI_LENGTH = 14
+TAKE_PROFIT = 0.05
+STOP_LOSS = 0.03
 RISK_PER_TRADE = 0.05 # Aggressive sizing for mean reversion
+EXIT_CHECK_INTERVAL = 60 # Intrabar TP/SL checks between 15m bar closes
+LOOKBACK_DAYS = watchlists.SURVIVOR_LOOKBACK_DAYS   # Cold-start history
+MAX_BARS = watchlists.SURVIVOR_MAX_BARS             # Bars kept per symbol (enough for SMA200)
 
 # --- CREDENTIALS & CLIENTS ---
-trading_client = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 TIMEZONE = pytz.timezone('US/Eastern')
+bar_store = bar_buffer.BufferStore(MAX_BARS)
 
 # --- INFLUX & DISCORD ---
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in config.WEBHOOK_TREND: return # Reusing Trend webhook for now
     try: requests.post(config.WEBHOOK_TREND, json={"content": msg})
     except: pass
 
+@instrument.timed("influx_write")
 def log_to_influx(symbol, action, price, qty):
     try:
         data_str = f'survivor_trades,symbol={symbol} price={price},action="{action}",qty={qty}'
@@ -45,72 +64,131 @@ def log_to_influx(symbol, action, price, qty):
 
 def get_dynamic_targets():
     """Reads the 'Hot Sector' list from the Scout."""
-    if not os.path.exists(TARGET_FILE): return []
-    try:
-        with open(TARGET_FILE, 'r') as f:
-            data = json.load(f)
-            # Filter out ETFs from the scout list so we don't double count, 
-            # or keep them if we want to trade the underlying sector ETF.
-            return data.get("targets", [])
-    except: return []
+    return watchlists.scout_targets()
 
 def get_data_alpaca(symbol):
+    """Appends new bars to the symbol's ring buffer and returns it (no DataFrame is built)."""
     try:
-        start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=20)
+        # Full lookback on a cold start, otherwise just the gap since the buffered bars
+        cold_start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=LOOKBACK_DAYS)
+        start_time = max(bar_store.gap_start(symbol) or cold_start, cold_start)
         req = StockBarsRequest(
             symbol_or_symbols=[symbol],
             timeframe=TimeFrame(15, TimeFrameUnit.Minute), # 15m candles for intraday dips
-            start=start_time,
-            limit=200
+            start=start_time
         )
         bars = data_client.get_stock_bars(req)
-        if not bars.data: return None
-        df = bars.df.xs(symbol)
-        df.index = df.index.tz_convert('US/Eastern')
-        return df
+        return bar_store.ingest(symbol, bars.data.get(symbol)) # Keeps the newest MAX_BARS
     except: return None
 
+def get_exit_reason(pct_gain, rsi=None):
+    """Exit if Overbought (RSI > 70) OR Big Win (+5%) OR Stop Loss (-3%)."""
+    if rsi is not None and rsi > RSI_SELL: return f"RSI Overbought ({rsi:.0f})"
+    if pct_gain > TAKE_PROFIT: return f"Take Profit (+{TAKE_PROFIT*100:.0f}%)"
+    if pct_gain < -STOP_LOSS: return f"Stop Loss (-{STOP_LOSS*100:.0f}%)"
+    return None
+
+def sell_position(symbol, qty, price, reason, pct_gain):
+    print(f"    📉 SELLING {symbol}: {reason}")
+    order = MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.GTC)
+    if order_registry.submit_order(trading_client, "survivor_bot", order, ref_price=price):
+        send_discord(f"💰 **SOLD {symbol}**\nReason: {reason}\nP&L: {pct_gain*100:.2f}%")
+        log_to_influx(symbol, "sell", price, qty)
+
+# --- SHADOW VARIANTS ---
+SHADOW_DEFAULTS = {"RSI_LENGTH": RSI_LENGTH, "RSI_BUY": RSI_BUY, "RSI_SELL": RSI_SELL,
+                   "TAKE_PROFIT": TAKE_PROFIT, "STOP_LOSS": STOP_LOSS, "RISK_PER_TRADE": RISK_PER_TRADE}
+
+def shadow_signals(buf, price, p, side, entry, context):
+    """The live entry/exit rules for every variant at once (one RSI per distinct length)."""
+    close = buf.close()
+    rsi_by_length = {n: float(indicators.rsi(close, length=int(n))[-1]) for n in np.unique(p["RSI_LENGTH"])}
+    rsi = np.array([rsi_by_length[n] for n in p["RSI_LENGTH"]])
+    with np.errstate(invalid='ignore'):
+        gain = (price - entry) / entry
+    exit_ = (side == 1) & ((rsi > p["RSI_SELL"]) | (gain > p["TAKE_PROFIT"]) | (gain < -p["STOP_LOSS"]))
+    enter = (side == 0) & (rsi < p["RSI_BUY"]) & (context["uptrend"] or context["scout"])
+    target = np.where(exit_, 0, np.where(enter, 1, side))
+    return target, np.floor(context["equity"] * p["RISK_PER_TRADE"] / price)
+
+shadow_book = shadow.ShadowBook("survivor_bot", SHADOW_DEFAULTS, shadow_signals)
+
+def check_intrabar_exits(watchlist):
+    """
+    Cheap path between bar closes: TP/SL from the positions' own marks.
+    No bars, no indicators - RSI exits wait for the next bar close.
+    """
+    for p in trading_client.get_all_positions():
+        if p.symbol not in watchlist: continue
+        price = float(p.current_price)
+        entry_price = float(p.avg_entry_price)
+        pct_gain = (price - entry_price) / entry_price
+        reason = get_exit_reason(pct_gain)
+        if reason:
+            sell_position(p.symbol, float(p.qty), price, reason, pct_gain)
+
 def run_survivor_bot():
     print(f"--- 🛡️ SURVIVOR BOT (Scout Integrated) STARTED ---")
     send_discord("**Survivor Bot (V3)** Online\nScanning Core + Scout Targets for Dips.")
-    
+
+    # Full scans run once per 15m bar close; exits are checked every minute in between
+    bar_scheduler = scheduler.BarCloseScheduler("survivor_bot", exit_interval=EXIT_CHECK_INTERVAL)
+    full_watchlist = fleet_shard.filter_symbols("survivor_bot", CORE_WATCHLIST)
+
+    # Warm start: reuse cached bars and fetch only the gap
+    global bar_store
+    saved = checkpoint.load(fleet_shard.worker_name("survivor_bot"), max_age=LOOKBACK_DAYS * 86400)
+    if saved:
+        bar_store = bar_buffer.BufferStore.restore(saved.get("buffers"), MAX_BARS)
+        full_watchlist = saved.get("watchlist", full_watchlist)
+
     while True:
+        scan_mode = bar_scheduler.wait()
+        cycle_start = time.perf_counter()
+        heartbeat.start("survivor_bot", budget=180)
         try:
             # 1. Market Check
             try:
-                clock = trading_client.get_clock()
-                if not clock.is_open:
-                    print("Market Closed.", end='\r')
-                    time.sleep(60)
-                    continue
+                if market_calendar.sleep_until_open(trading_client, "survivor_bot"): continue
             except: pass
 
+            if scan_mode == scheduler.EXITS_ONLY:
+                check_intrabar_exits(full_watchlist)
+                instrument.record("exit_check", time.perf_counter() - cycle_start)
+                continue
+
             # 2. Build Watchlist
             scout_targets = get_dynamic_targets()
             # Combine Core + Scout (Remove duplicates)
             full_watchlist = list(set(CORE_WATCHLIST + scout_targets))
+            full_watchlist = fleet_shard.filter_symbols("survivor_bot", full_watchlist) # Sharded workers: only our slice
+            warmup.seed_bars(bar_store, full_watchlist) # First scan of the day: pre-open bars instead of a cold fetch
             
             account = trading_client.get_account()
             equity = float(account.portfolio_value)
             positions = trading_client.get_all_positions()
+            order_registry.refresh(trading_client) # Unfilled orders are invisible in positions
             pos_dict = {p.symbol: p for p in positions}
 
             print(f"\n[{datetime.datetime.now(TIMEZONE).strftime('%H:%M')}] Scanning {len(full_watchlist)} Targets (Core: {len(CORE_WATCHLIST)} | Scout: {len(scout_targets)})")
 
+            dips = [] # Entry proposals, risk-checked together after the scan
+            shadow_book.begin_scan(equity=equity) # Parameter variants ride along on the same bars
             for symbol in full_watchlist:
                 if symbol in ["BTC/USD", "ETH/USD"]: continue 
 
-                df = get_data_alpaca(symbol)
-                if df is None: continue
+                buf = get_data_alpaca(symbol)
+                if buf is None or len(buf) < 2: continue
 
-                # Indicators
-                df['rsi'] = ta.rsi(df['close'], length=14)
-                df['sma200'] = ta.sma(df['close'], length=200) # Trend filter
-                
-                latest = df.iloc[-1]
-                price = float(latest['close'])
-                rsi = float(latest['rsi'])
-                sma = float(latest['sma200']) if not pd.isna(latest['sma200']) else 0
+                # Indicators (straight off the buffer - no DataFrame per symbol)
+                with instrument.timer("indicators"):
+                    close = buf.close()
+                    rsi = float(indicators.rsi(close, length=RSI_LENGTH)[-1])
+                    sma = float(indicators.sma(close, 200)[-1]) # Trend filter
+                    if math.isnan(sma): sma = 0 # Until 200 bars are buffered
+
+                price = float(close[-1])
+                shadow_book.observe(symbol, buf, price, uptrend=price > sma, scout=symbol in scout_targets)
 
                 # --- EXIT LOGIC (Take Profit / Stop Loss) ---
                 if symbol in pos_dict:
@@ -118,34 +196,17 @@ def run_survivor_bot():
                     qty = float(pos.qty)
                     entry_price = float(pos.avg_entry_price)
                     pct_gain = (price - entry_price) / entry_price
-                    
-                    # Exit if Overbought (RSI > 70) OR Big Win (+5%) OR Stop Loss (-3%)
-                    should_sell = False
-                    reason = ""
-                    
-                    if rsi > RSI_SELL:
-                        should_sell = True
-                        reason = f"RSI Overbought ({rsi:.0f})"
-                    elif pct_gain > 0.05:
-                        should_sell = True
-                        reason = "Take Profit (+5%)"
-                    elif pct_gain < -0.03:
-                        should_sell = True
-                        reason = "Stop Loss (-3%)"
-                        
-                    if should_sell:
-                        print(f"    📉 SELLING {symbol}: {reason}")
-                        trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.GTC))
-                        send_discord(f"💰 **SOLD {symbol}**\nReason: {reason}\nP&L: {pct_gain*100:.2f}%")
-                        log_to_influx(symbol, "sell", price, qty)
+
+                    reason = get_exit_reason(pct_gain, rsi)
+                    if reason:
+                        sell_position(symbol, qty, price, reason, pct_gain)
 
                 # --- ENTRY LOGIC (Buy the Dip) ---
                 else:
                     # 1. Basic Condition: OVERSOLD
                     if rsi < RSI_BUY:
-                        # [NEW] CFO CHECK
-                        if not utils.check_budget("survivor_bot", trading_client):
-                            print(f"    [SKIP] Survivor Budget Exceeded.")
+                        if order_registry.has_open(symbol, "buy"):
+                            print(f"    [SKIP] {symbol}: buy order still open")
                             continue
                         # 2. Safety Filter:
                         # Only buy if the price is ABOVE the 200 SMA (Uptrend Pullback)
@@ -161,19 +222,36 @@ def run_survivor_bot():
                             qty = int(risk_amt / price)
                             
                             if qty > 0:
-                                print(f"       -> Buying {qty} shares...")
-                                trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.DAY))
-                                source_tag = "SCOUT PICK" if is_scout_pick else "CORE"
-                                send_discord(f"💎 **BOUGHT DIP {symbol}** ({source_tag})\nRSI: {rsi:.0f}")
-                                log_to_influx(symbol, "buy", price, qty)
+                                dips.append({"symbol": symbol, "qty": qty, "price": price, "rsi": rsi, "scout": is_scout_pick, "decided_at": time.time()})
                         else:
                             print(f"    ⚠️ Skipping {symbol} (RSI {rsi:.0f} but Below SMA200)")
 
-            time.sleep(60)
+            shadow_book.flush()
+
+            # 3. Risk-check every dip of this scan at once (deepest first), then buy what passed
+            dips.sort(key=lambda d: d["rsi"])
+            approved = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client, account, positions), "survivor_bot", dips)
+            pre_trade_risk.log_decisions("survivor_bot", approved)
+            for d in approved:
+                if d["qty"] <= 0: continue
+                symbol, qty, price = d["symbol"], d["qty"], d["price"]
+                print(f"       -> Buying {qty} {symbol}...")
+                order = MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.DAY)
+                if order_registry.submit_order(trading_client, "survivor_bot", order, ref_price=price, decided_at=d["decided_at"]):
+                    source_tag = "SCOUT PICK" if d["scout"] else "CORE"
+                    send_discord(f"💎 **BOUGHT DIP {symbol}** ({source_tag})\nRSI: {d['rsi']:.0f}")
+                    log_to_influx(symbol, "buy", price, qty)
+
+            bar_store.retain(full_watchlist)
+            checkpoint.save(fleet_shard.worker_name("survivor_bot"), {"buffers": bar_store.state(), "watchlist": full_watchlist})
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report(fleet_shard.worker_name("survivor_bot"))
+            print(f"  Next full scan after bar close: {bar_scheduler.describe_next()}")
 
         except Exception as e:
             print(f"Survivor Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("survivor_bot", 60)
 
 if __name__ == "__main__":
     run_survivor_bot()
\ No newline at end of file
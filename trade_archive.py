@@ -0,0 +1,187 @@
+"""
+Parquet archive of every bot's trade events in one normalized schema.
+
+    trade_archive/date=2026-01-05/bot=wheel_bot/part-....parquet
+
+sync_from_influx() copies new points from the per-bot Influx measurements
+(incrementally, by timestamp high-water mark). read_trades() filters on the
+date/bot partitions and on row-group statistics, and only decodes the
+columns it is asked for.
+
+    python trade_archive.py sync
+    python trade_archive.py show 30     # Per-bot summary of the last 30 days
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+import datetime
+import requests
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import config
+import options_math
+
+# --- CONFIGURATION ---
+ARCHIVE_DIR = "trade_archive"
+STATE_FILE = os.path.join(ARCHIVE_DIR, "_sync_state.json")   # "_" prefix: ignored by the dataset reader
+LOCK_FILE = os.path.join(ARCHIVE_DIR, "_sync.lock")
+BACKFILL_DAYS = 365        # History pulled on the very first sync
+ROW_GROUP_SIZE = 10000
+DB_QUERY_URL = f"http://{config.INFLUX_HOST}:{config.INFLUX_PORT}/query"
+
+# Influx measurement -> bot that writes it
+MEASUREMENTS = {
+    "trades": "trend_bot",
+    "crypto_trades": "crypto_grid",
+    "survivor_trades": "survivor_bot",
+    "breakout_trades": "moon_bag",
+    "wheel_trades": "wheel_bot",
+    "condor_trades": "condor_bot",
+}
+
+SCHEMA = pa.schema([
+    ("time", pa.timestamp("ns", tz="UTC")),
+    ("measurement", pa.string()),
+    ("symbol", pa.string()),        # Underlying / ticker / pair
+    ("contract", pa.string()),      # OCC option symbol, null for stock & crypto
+    ("asset_class", pa.string()),   # "us_equity" | "us_option" | "crypto"
+    ("action", pa.string()),
+    ("price", pa.float64()),
+    ("qty", pa.float64()),          # Null where the bot doesn't log it (wheel / condor)
+    ("detail", pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("bot", pa.string())]), flavor="hive")
+
+# --- NORMALIZATION ---
+def normalize(measurement, row):
+    """One Influx point (dict of column -> value) -> one archive record."""
+    symbol = row.get("symbol")
+    contract = row.get("contract")
+    occ = options_math.parse_occ(contract or symbol or "")
+    if occ:
+        contract = contract or symbol
+        symbol = occ[0]
+        asset_class = "us_option"
+    elif measurement in ("wheel_trades", "condor_trades"):
+        contract, asset_class = None, "us_option"   # e.g. open_condor logs the underlying, not a leg
+    elif measurement in ("crypto_trades", "breakout_trades") or (symbol and "/" in symbol):
+        contract, asset_class = None, "crypto"
+    else:
+        contract, asset_class = None, "us_equity"
+
+    qty = row.get("qty")
+    ts = pd.Timestamp(row["time"], unit="ns", tz="UTC")
+    return {
+        "time": ts, "measurement": measurement, "symbol": symbol, "contract": contract,
+        "asset_class": asset_class, "action": row.get("action"),
+        "price": float(row["price"]) if row.get("price") is not None else None,
+        "qty": float(qty) if qty is not None else None,
+        "detail": row.get("detail"),
+        "date": ts.strftime("%Y-%m-%d"), "bot": MEASUREMENTS[measurement],
+    }
+
+# --- SYNC ---
+def _load_state():
+    if not os.path.exists(STATE_FILE): return {}
+    try:
+        with open(STATE_FILE) as f: return json.load(f)
+    except: return {}
+
+def _save_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, 'w') as f: json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+def _fetch_new(measurement, since_ns):
+    where = f"time > {since_ns}" if since_ns else f"time > now() - {BACKFILL_DAYS}d"
+    params = {'db': config.INFLUX_DB_NAME, 'q': f"SELECT * FROM {measurement} WHERE {where}", 'epoch': 'ns'}
+    data = requests.get(DB_QUERY_URL, params=params, timeout=30).json()
+    rows = []
+    for series in data.get('results', [{}])[0].get('series', []):
+        cols = series['columns']
+        rows.extend(dict(zip(cols, v)) for v in series['values'])
+    return rows
+
+def sync_from_influx():
+    """Appends trades newer than the last sync. Returns the number of new records."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    with open(LOCK_FILE, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)   # One writer at a time (accountant vs. export_data)
+        state = _load_state()
+        records = []
+        for measurement in MEASUREMENTS:
+            try:
+                rows = _fetch_new(measurement, state.get(measurement))
+            except Exception as e:
+                print(f"  [!] Archive sync failed for {measurement}: {e}")
+                continue
+            if not rows: continue
+            records.extend(normalize(measurement, r) for r in rows)
+            state[measurement] = max(int(r["time"]) for r in rows)
+
+        if records:
+            df = pd.DataFrame(records).sort_values("time")
+            table = pa.Table.from_pandas(df, schema=SCHEMA.append(pa.field("date", pa.string())).append(pa.field("bot", pa.string())), preserve_index=False)
+            ds.write_dataset(table, ARCHIVE_DIR, format="parquet", partitioning=PARTITIONING,
+                             basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+                             existing_data_behavior="overwrite_or_ignore",
+                             max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=0)
+        _save_state(state)
+        compact()
+        return len(records)
+
+def compact():
+    """Merges the small per-sync files of closed days into one time-sorted file per partition."""
+    today = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+    for date_dir in sorted(os.listdir(ARCHIVE_DIR)):
+        if not date_dir.startswith("date=") or date_dir[5:] >= today: continue
+        for bot_dir in os.listdir(os.path.join(ARCHIVE_DIR, date_dir)):
+            path = os.path.join(ARCHIVE_DIR, date_dir, bot_dir)
+            files = sorted(f for f in os.listdir(path) if f.endswith(".parquet"))
+            if len(files) <= 1: continue
+            table = pa.concat_tables([pq.read_table(os.path.join(path, f)) for f in files])
+            table = table.sort_by("time")
+            tmp = os.path.join(path, "_compact.tmp")
+            pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp, os.path.join(path, "part-compacted.parquet"))
+            for f in files:
+                if f != "part-compacted.parquet": os.remove(os.path.join(path, f))
+
+# --- READ ---
+def read_trades(start=None, end=None, bots=None, symbols=None, columns=None):
+    """
+    Trades as a DataFrame. `start`/`end` (datetimes, UTC if naive) prune date partitions and
+    row groups; `bots` prunes bot partitions; `columns` limits what is decoded.
+    """
+    if not os.path.isdir(ARCHIVE_DIR): return pd.DataFrame()
+    dataset = ds.dataset(ARCHIVE_DIR, format="parquet", partitioning=PARTITIONING)
+
+    expr = None
+    def both(a, b): return b if a is None else a & b
+    if start is not None:
+        start = pd.Timestamp(start).tz_localize("UTC") if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+        expr = both(expr, (pc.field("date") >= start.strftime("%Y-%m-%d")) & (pc.field("time") >= pa.scalar(start.value, pa.timestamp("ns", tz="UTC"))))
+    if end is not None:
+        end = pd.Timestamp(end).tz_localize("UTC") if pd.Timestamp(end).tzinfo is None else pd.Timestamp(end)
+        expr = both(expr, (pc.field("date") <= end.strftime("%Y-%m-%d")) & (pc.field("time") < pa.scalar(end.value, pa.timestamp("ns", tz="UTC"))))
+    if bots: expr = both(expr, pc.field("bot").isin(list(bots)))
+    if symbols: expr = both(expr, pc.field("symbol").isin(list(symbols)))
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    if command == "show":
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        df = read_trades(start=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days),
+                         columns=["bot", "action", "price", "qty"])
+        if df.empty: print("No archived trades.")
+        else: print(df.groupby("bot").agg(trades=("action", "size"), avg_price=("price", "mean"), qty=("qty", "sum")))
+    else:
+        print(f"  -> Archived {sync_from_influx()} new trades")
@@ -1,13 +1,26 @@
 import config
+import rate_limiter
+import instrument
+import heartbeat
+import scheduler
+import checkpoint
+import bar_buffer
+import indicators
+import warmup
+import watchlists
+import fleet_shard
+import shadow
 import time
+import concurrent.futures
 import json
 import os
 import datetime
 import requests
-import pandas as pd
-import pandas_ta as ta
 import pytz
-import utils
+import numpy as np
+import order_registry
+import pre_trade_risk
+import market_calendar
 from alpaca.trading.client import TradingClient
 from alpaca.trading.enums import OrderSide, TimeInForce, AssetClass
 from alpaca.trading.requests import MarketOrderRequest
@@ -16,24 +29,35 @@ from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 # --- CONFIGURATION ---
-TARGET_FILE = "active_targets.json" # <--- NEW: Dynamic List
 STATUS_FILE = "market_status.json"
 FAST_EMA = 9
 SLOW_EMA = 21
 ADX_THRESHOLD = 25
+ENTRY_ADX = 20            # Minimum ADX for a cross to count as an entry
 RISK_PER_TRADE = 0.02
+PARALLEL_SCAN = getattr(config, 'TREND_PARALLEL_SCAN', True)
+SCAN_WORKERS = getattr(config, 'TREND_SCAN_WORKERS', 8)     # Bounded: each worker holds one data request in flight
+SCAN_DEADLINE = getattr(config, 'TREND_SCAN_DEADLINE', 45)  # Seconds; late symbols wait for the next bar
+LOOKBACK_DAYS = watchlists.TREND_LOOKBACK_DAYS   # Cold-start history for EMA21 / ADX
+MAX_BARS = watchlists.TREND_MAX_BARS             # Bars kept per symbol
 
 # --- CREDENTIALS & CLIENTS ---
-trading_client = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
 TIMEZONE = pytz.timezone('US/Eastern')
 
+scan_pool = concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="trend_scan")
+order_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="trend_orders")
+bar_store = bar_buffer.BufferStore(MAX_BARS)
+
 # --- INFLUX & DISCORD (Helpers) ---
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in config.WEBHOOK_TREND: return
     try: requests.post(config.WEBHOOK_TREND, json={"content": msg})
     except: pass
 
+@instrument.timed("influx_write")
 def log_to_influx(symbol, action, price, qty):
     try:
         data_str = f'trades,symbol={symbol} price={price},action="{action}",qty={qty}'
@@ -43,13 +67,7 @@ def log_to_influx(symbol, action, price, qty):
 
 def get_targets():
     """Reads the dynamic list from Sector Scout."""
-    default = ["NVDA", "TSLA", "COIN"] # Fallback
-    if not os.path.exists(TARGET_FILE): return default
-    try:
-        with open(TARGET_FILE, 'r') as f:
-            data = json.load(f)
-            return data.get("targets", default)
-    except: return default
+    return watchlists.scout_targets(watchlists.TREND_FALLBACK)
 
 def get_market_regime():
     if not os.path.exists(STATUS_FILE): return "UNKNOWN"
@@ -59,30 +77,179 @@ def get_market_regime():
     except: return "UNKNOWN"
 
 def get_data_alpaca(symbol):
+    """Appends new bars to the symbol's ring buffer and returns it (no DataFrame is built)."""
     try:
-        # Get enough data for EMA21 and ADX
-        start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=10)
-        req = StockBarsRequest(symbol_or_symbols=[symbol], timeframe=TimeFrame(15, TimeFrameUnit.Minute), start=start_time, limit=500)
+        # Get enough data for EMA21 and ADX - or just the gap since the buffered bars
+        cold_start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=LOOKBACK_DAYS)
+        start_time = max(bar_store.gap_start(symbol) or cold_start, cold_start)
+        req = StockBarsRequest(symbol_or_symbols=[symbol], timeframe=TimeFrame(15, TimeFrameUnit.Minute), start=start_time)
         bars = data_client.get_stock_bars(req)
-        if not bars.data: return None
-        df = bars.df.xs(symbol)
-        df.index = df.index.tz_convert('US/Eastern')
-        return df
+        return bar_store.ingest(symbol, bars.data.get(symbol))
     except: return None
 
+# --- SHADOW VARIANTS ---
+SHADOW_DEFAULTS = {"FAST_EMA": FAST_EMA, "SLOW_EMA": SLOW_EMA, "ENTRY_ADX": ENTRY_ADX, "RISK_PER_TRADE": RISK_PER_TRADE}
+
+def shadow_signals(buf, price, p, side, entry, context):
+    """The live cross rules for every variant at once (one EMA per distinct length)."""
+    close = buf.close()
+    fast_len, slow_len = p["FAST_EMA"].astype(int), p["SLOW_EMA"].astype(int)
+    ema = {n: indicators.ema(close, int(n))[-2:] for n in np.union1d(fast_len, slow_len)}
+    fast = np.array([ema[n] for n in fast_len])
+    slow = np.array([ema[n] for n in slow_len])
+    bull = (fast[:, 1] > slow[:, 1]) & (fast[:, 0] <= slow[:, 0])
+    bear = (fast[:, 1] < slow[:, 1]) & (fast[:, 0] >= slow[:, 0])
+    exit_ = ((side == 1) & bear) | ((side == -1) & bull)
+    can_enter = context["can_trade"] and context["symbol"] in context["targets"]
+    enter = (side == 0) & can_enter & (bull | bear) & (context["adx"] > p["ENTRY_ADX"])
+    target = np.where(exit_, 0, np.where(enter, np.where(bull, 1, -1), side))
+    return target, np.floor(context["equity"] * p["RISK_PER_TRADE"] / (price * 0.02))
+
+shadow_book = shadow.ShadowBook("trend_bot", SHADOW_DEFAULTS, shadow_signals)
+
+# --- SIGNALS ---
+def evaluate_symbol(symbol, global_regime, scan=None):
+    """
+    Fetches bars and computes the cross/ADX signal for one symbol (safe to run on a worker thread).
+    `scan` is the shadow book's generation at submit time, so a worker that outlives the deadline stays out of the book.
+    """
+    buf = get_data_alpaca(symbol)
+    if buf is None or len(buf) < SLOW_EMA + 1: return None
+
+    # Calculate Indicators (on views of the buffer - only the last two values are used)
+    with instrument.timer("indicators"):
+        close = buf.close()
+        ema_fast = indicators.ema(close, FAST_EMA)[-2:]
+        ema_slow = indicators.ema(close, SLOW_EMA)[-2:]
+        adx = indicators.adx(buf.high(), buf.low(), close, length=14)[0]
+
+    local_adx = float(adx[-1])
+    price = float(close[-1])
+    
+    # --- THE OVERRIDE LOGIC ---
+    # Default: Obey Global Regime
+    can_trade = True
+    
+    if "CHOP" in global_regime:
+        # override if THIS stock is trending hard (ADX > 30)
+        if local_adx > 30:
+            can_trade = True
+            print(f"    ! {symbol} defying CHOP (ADX {local_adx:.1f})")
+        else:
+            can_trade = False
+
+    shadow_book.observe(symbol, buf, price, scan=scan, adx=local_adx, can_trade=can_trade)
+
+    return {
+        "symbol": symbol,
+        "price": price,
+        "decided_at": time.time(),
+        "adx": local_adx,
+        "can_trade": can_trade,
+        "bull_cross": bool((ema_fast[1] > ema_slow[1]) and (ema_fast[0] <= ema_slow[0])),
+        "bear_cross": bool((ema_fast[1] < ema_slow[1]) and (ema_fast[0] >= ema_slow[0])),
+    }
+
+# --- EXECUTION ---
+def act_on_signal(signal, pos_dict, symbols, equity):
+    """Exits for one evaluated symbol, or its entry proposal. Only ever runs on the order executor (one at a time)."""
+    symbol = signal["symbol"]
+    price = signal["price"]
+    bull_cross, bear_cross = signal["bull_cross"], signal["bear_cross"]
+    local_adx = signal["adx"]
+    decided_at = signal["decided_at"]
+
+    # EXIT LOGIC (Always Active)
+    if symbol in pos_dict:
+        pos = pos_dict[symbol]
+        qty = float(pos.qty)
+        side = pos.side # 'long' or 'short'
+        
+        if side == 'long' and bear_cross:
+            print(f"    📉 CLOSE LONG {symbol}")
+            if order_registry.submit_order(trading_client, "trend_bot", MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.GTC), ref_price=price, decided_at=decided_at):
+                send_discord(f"📉 **SELL {symbol}** (Cross)")
+                log_to_influx(symbol, "sell", price, qty)
+            
+        elif side == 'short' and bull_cross:
+            print(f"    📈 CLOSE SHORT {symbol}")
+            if order_registry.submit_order(trading_client, "trend_bot", MarketOrderRequest(symbol=symbol, qty=abs(qty), side=OrderSide.BUY, time_in_force=TimeInForce.GTC), ref_price=price, decided_at=decided_at):
+                send_discord(f"📈 **COVER {symbol}** (Cross)")
+                log_to_influx(symbol, "buy_cover", price, abs(qty))
+
+    # ENTRY LOGIC (If Allowed) - proposed here, risk-checked with the rest of the scan
+    elif signal["can_trade"] and symbol in symbols:
+        if not (bull_cross or bear_cross) or local_adx <= ENTRY_ADX: return
+        if order_registry.has_open(symbol):
+            print(f"    [SKIP] {symbol}: entry order still open")
+            return
+
+        risk_amt = equity * RISK_PER_TRADE
+        # Simple stop at recent low (approx 2% risk)
+        stop_dist = price * 0.02
+        qty = int(risk_amt / stop_dist)
+        if qty > 0:
+            return {"symbol": symbol, "qty": qty, "price": price, "bull": bull_cross, "adx": local_adx, "decided_at": decided_at}
+
+def place_entry(entry):
+    symbol, qty, price = entry["symbol"], entry["qty"], entry["price"]
+    if entry["bull"]:
+        print(f"    🚀 BUY SIGNAL {symbol}")
+        if order_registry.submit_order(trading_client, "trend_bot", MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.DAY), ref_price=price, decided_at=entry["decided_at"]):
+            send_discord(f"🚀 **BUY {symbol}** (Sector Play)")
+            log_to_influx(symbol, "buy", price, qty)
+    else:
+        print(f"    🐻 SHORT SIGNAL {symbol}")
+        if order_registry.submit_order(trading_client, "trend_bot", MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.DAY), ref_price=price, decided_at=entry["decided_at"]):
+            send_discord(f"🐻 **SHORT {symbol}** (Sector Play)")
+            log_to_influx(symbol, "sell_short", price, qty)
+
+def scan_serial(scan_list, global_regime, on_signal):
+    for symbol in scan_list:
+        signal = evaluate_symbol(symbol, global_regime)
+        if signal: on_signal(signal)
+
+def scan_parallel(scan_list, global_regime, on_signal):
+    """
+    Evaluates symbols on the worker pool and hands each signal over as soon as it lands.
+    Symbols still pending at the deadline are dropped for this cycle (picked up next bar). Workers
+    already running can't be cancelled: their bars still land in bar_store, their shadow results don't.
+    """
+    deadline = time.monotonic() + SCAN_DEADLINE
+    futures = {scan_pool.submit(evaluate_symbol, symbol, global_regime, shadow_book.generation): symbol for symbol in scan_list}
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=SCAN_DEADLINE):
+            try:
+                signal = future.result()
+            except Exception as e:
+                print(f"    ⚠️ {futures[future]} scan failed: {e}")
+                continue
+            if signal: on_signal(signal)
+    except concurrent.futures.TimeoutError:
+        late = [s for f, s in futures.items() if not f.done()]
+        for f in futures: f.cancel()
+        print(f"    ⏱️ Scan deadline hit ({SCAN_DEADLINE}s) - skipped {len(late)}: {', '.join(late[:10])}")
+
 def run_trend_bot():
     print(f"--- TREND SNIPER (Dynamic Hunter) STARTED ---")
     send_discord("**Trend Sniper V3 (Dynamic)** Online")
-    
+
+    # EMA crosses only change when a 15m bar closes, so there is no intrabar path
+    bar_scheduler = scheduler.BarCloseScheduler("trend_bot", exit_interval=None)
+
+    # Warm start: reuse cached bars and fetch only the gap
+    global bar_store
+    saved = checkpoint.load(fleet_shard.worker_name("trend_bot"), max_age=LOOKBACK_DAYS * 86400)
+    bar_store = bar_buffer.BufferStore.restore(saved and saved.get("buffers"), MAX_BARS)
+
     while True:
+        bar_scheduler.wait()
+        cycle_start = time.perf_counter()
+        heartbeat.start("trend_bot", budget=SCAN_DEADLINE + 75)
         try:
             # 1. Check Clock
             try:
-                clock = trading_client.get_clock()
-                if not clock.is_open:
-                    print("Market Closed.", end='\r')
-                    time.sleep(60)
-                    continue
+                if market_calendar.sleep_until_open(trading_client, "trend_bot"): continue
             except: pass
 
             # 2. Load Intel
@@ -92,6 +259,7 @@ def run_trend_bot():
             account = trading_client.get_account()
             equity = float(account.portfolio_value)
             positions = trading_client.get_all_positions()
+            order_registry.refresh(trading_client) # Unfilled orders are invisible in positions
             pos_dict = {p.symbol: p for p in positions}
 
             print(f"\n[{datetime.datetime.now(TIMEZONE).strftime('%H:%M')}] Regime: {global_regime} | Targets: {len(symbols)}")
@@ -99,100 +267,49 @@ def run_trend_bot():
             # 3. Scan Targets
             # We scan the Dynamic List + Anything we currently hold (to manage exits)
             scan_list = list(set(symbols + [p.symbol for p in positions if p.asset_class == AssetClass.US_EQUITY]))
+            scan_list = [s for s in scan_list if s not in ["BTC/USD", "ETH/USD"]] # Skip crypto
+            scan_list = fleet_shard.filter_symbols("trend_bot", scan_list) # Sharded workers: only our slice
+            warmup.seed_bars(bar_store, scan_list) # First scan of the day: pre-open bars instead of a cold fetch
+            shadow_book.begin_scan(equity=equity, targets=set(symbols)) # Parameter variants ride along on the same bars
 
-            for symbol in scan_list:
-                if symbol in ["BTC/USD", "ETH/USD"]: continue # Skip crypto
-                
-                df = get_data_alpaca(symbol)
-                if df is None: continue
-
-                # Calculate Indicators
-                df['ema_fast'] = ta.ema(df['close'], length=FAST_EMA)
-                df['ema_slow'] = ta.ema(df['close'], length=SLOW_EMA)
-                adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
-                df = pd.concat([df, adx_df], axis=1)
-
-                latest = df.iloc[-1]
-                prev = df.iloc[-2]
-                
-                # Dynamic column name handling for ADX
-                adx_col = [c for c in latest.index if c.startswith('ADX')][0]
-                local_adx = float(latest[adx_col])
-                price = float(latest['close'])
-                
-                # --- THE OVERRIDE LOGIC ---
-                # Default: Obey Global Regime
-                can_trade = True
-                
-                if "CHOP" in global_regime:
-                    # override if THIS stock is trending hard (ADX > 30)
-                    if local_adx > 30:
-                        can_trade = True
-                        print(f"    ! {symbol} defying CHOP (ADX {local_adx:.1f})")
-                    else:
-                        can_trade = False
-                
-                # Signals
-                bull_cross = (latest['ema_fast'] > latest['ema_slow']) and (prev['ema_fast'] <= prev['ema_slow'])
-                bear_cross = (latest['ema_fast'] < latest['ema_slow']) and (prev['ema_fast'] >= prev['ema_slow'])
-                trend_up = latest['ema_fast'] > latest['ema_slow']
-                trend_down = latest['ema_fast'] < latest['ema_slow']
-
-                # --- EXECUTION ---
-                
-                # EXIT LOGIC (Always Active)
-                if symbol in pos_dict:
-                    pos = pos_dict[symbol]
-                    qty = float(pos.qty)
-                    side = pos.side # 'long' or 'short'
-                    
-                    if side == 'long' and bear_cross:
-                        print(f"    📉 CLOSE LONG {symbol}")
-                        trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.GTC))
-                        send_discord(f"📉 **SELL {symbol}** (Cross)")
-                        log_to_influx(symbol, "sell", price, qty)
-                        
-                    elif side == 'short' and bull_cross:
-                        print(f"    📈 CLOSE SHORT {symbol}")
-                        trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=abs(qty), side=OrderSide.BUY, time_in_force=TimeInForce.GTC))
-                        send_discord(f"📈 **COVER {symbol}** (Cross)")
-                        log_to_influx(symbol, "buy_cover", price, abs(qty))
-
-                # ENTRY LOGIC (If Allowed)
-                elif can_open_new and symbol not in pos_dict and symbol in SYMBOLS:
-    
-                    # [NEW] CFO CHECK
-                    if not utils.check_budget("trend_bot", trading_client):
-                        print(f"    [SKIP] Trend Bot Budget Exceeded.")
-                        continue
-                    if bull_cross and local_adx > 20:
-                        risk_amt = equity * RISK_PER_TRADE
-                        # Simple stop at recent low (approx 2% risk)
-                        stop_dist = price * 0.02
-                        qty = int(risk_amt / stop_dist)
-                        
-                        if qty > 0:
-                            print(f"    🚀 BUY SIGNAL {symbol}")
-                            trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.DAY))
-                            send_discord(f"🚀 **BUY {symbol}** (Sector Play)")
-                            log_to_influx(symbol, "buy", price, qty)
-                    
-                    elif bear_cross and local_adx > 20:
-                        risk_amt = equity * RISK_PER_TRADE
-                        stop_dist = price * 0.02
-                        qty = int(risk_amt / stop_dist)
-
-                        if qty > 0:
-                            print(f"    🐻 SHORT SIGNAL {symbol}")
-                            trading_client.submit_order(order_data=MarketOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.DAY))
-                            send_discord(f"🐻 **SHORT {symbol}** (Sector Play)")
-                            log_to_influx(symbol, "sell_short", price, qty)
-
-            time.sleep(60)
+            # 4. Execute - exits go through the single order thread as signals arrive;
+            # entries come back as proposals for the risk pass below
+            order_futures = []
+            def on_signal(signal):
+                order_futures.append(order_executor.submit(act_on_signal, signal, pos_dict, symbols, equity))
+
+            if PARALLEL_SCAN:
+                scan_parallel(scan_list, global_regime, on_signal)
+            else:
+                scan_serial(scan_list, global_regime, on_signal)
+
+            shadow_book.flush()
+
+            entries = []
+            for future in order_futures:
+                try:
+                    entry = future.result()
+                    if entry: entries.append(entry)
+                except Exception as e: print(f"    ⚠️ Order error: {e}")
+
+            # 5. One risk pass over every entry of the scan (strongest trend first)
+            entries.sort(key=lambda e: -e["adx"])
+            approved = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client, account, positions), "trend_bot", entries)
+            pre_trade_risk.log_decisions("trend_bot", approved)
+            for entry in approved:
+                if entry["qty"] <= 0: continue
+                try: place_entry(entry)
+                except Exception as e: print(f"    ⚠️ Order error: {e}")
+
+            bar_store.retain(scan_list)
+            checkpoint.save(fleet_shard.worker_name("trend_bot"), {"buffers": bar_store.state()})
+
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report(fleet_shard.worker_name("trend_bot"))
 
         except Exception as e:
             print(f"Trend Bot Error: {e}")
-            time.sleep(60)
+            heartbeat.sleep("trend_bot", 60)
 
 if __name__ == "__main__":
     run_trend_bot()
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Pre-open warm-up for the stock and options bots.
+
+Shortly before the bell this loads the day's watchlists (active_targets.json
+plus the shared lists in watchlists.py and held positions), batch-fetches 15m bars and
+option chains, and saves them as the "warmup" checkpoint. At the open the
+bots seed from it - bars via seed_bars(), chains via cached_chain() - so
+their first scan only fetches the last few minutes, like any other scan.
+
+Quotes are not pre-fetched: pre-market option quotes are stale by the open.
+"""
+import time
+import datetime
+import concurrent.futures
+import config
+import rate_limiter
+import instrument
+import heartbeat
+import checkpoint
+import bar_buffer
+import options_math
+import market_calendar
+import watchlists
+from alpaca.trading.client import TradingClient
+from alpaca.trading.requests import GetOptionContractsRequest
+from alpaca.trading.enums import AssetClass, ContractType
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.requests import StockBarsRequest
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+# --- CONFIGURATION ---
+CACHE_NAME = "warmup"
+WARMUP_LEAD = getattr(config, 'WARMUP_LEAD_MINUTES', 20) * 60   # Seconds before the open
+BAR_BATCH = 50             # Symbols per bars request
+CHAIN_WORKERS = 4
+MAX_AGE = 86400
+
+_loaded = {"mtime": None, "state": None}
+
+# --- WATCHLISTS ---
+def todays_watchlists(trading_client):
+    """(bar symbols, option roots, bar capacity, lookback days, (min_dte, max_dte)) for today."""
+    held = [p.symbol for p in trading_client.get_all_positions() if p.asset_class == AssetClass.US_EQUITY]
+    stocks = set(watchlists.scout_targets(watchlists.TREND_FALLBACK)) | set(watchlists.SURVIVOR_CORE) | set(held)
+    stocks = sorted(s for s in stocks if "/" not in s)   # Skip crypto
+    roots = sorted(set(watchlists.WHEEL_ROOTS) | set(watchlists.CONDOR_ROOTS))
+    capacity = max(watchlists.TREND_MAX_BARS, watchlists.SURVIVOR_MAX_BARS)
+    lookback = max(watchlists.TREND_LOOKBACK_DAYS, watchlists.SURVIVOR_LOOKBACK_DAYS)
+    dte = (min(watchlists.WHEEL_DTE[0], watchlists.CONDOR_DTE[0]), max(watchlists.WHEEL_DTE[1], watchlists.CONDOR_DTE[1]))
+    return stocks, roots, capacity, lookback, dte
+
+# --- FETCH ---
+@instrument.timed("warmup_bars")
+def fetch_bars(data_client, symbols, capacity, lookback_days):
+    store = bar_buffer.BufferStore(capacity)
+    start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=lookback_days)
+    for i in range(0, len(symbols), BAR_BATCH):
+        batch = symbols[i:i + BAR_BATCH]
+        try:
+            bars = data_client.get_stock_bars(StockBarsRequest(symbol_or_symbols=batch, timeframe=TimeFrame(15, TimeFrameUnit.Minute), start=start))
+        except Exception as e:
+            print(f"  [!] Warm-up bars failed for {batch[0]}..{batch[-1]}: {e}")
+            continue
+        for symbol in batch:
+            if bars.data.get(symbol): store.ingest(symbol, bars.data[symbol])
+    return store
+
+@instrument.timed("warmup_chains")
+def fetch_chains(trading_client, roots, min_dte, max_dte):
+    """{(root, "PUT"|"CALL"): [contracts]} for the expiry window both options bots scan."""
+    today = datetime.date.today()
+    start, end = today + datetime.timedelta(days=min_dte), today + datetime.timedelta(days=max_dte)
+
+    def one(root, kind):
+        req = GetOptionContractsRequest(underlying_symbols=[root], status="active", expiration_date_gte=start, expiration_date_lte=end,
+                                        type=ContractType.PUT if kind == "PUT" else ContractType.CALL, limit=1000)
+        return trading_client.get_option_contracts(req).option_contracts
+
+    chains = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=CHAIN_WORKERS) as pool:
+        futures = {pool.submit(one, root, kind): (root, kind) for root in roots for kind in ("PUT", "CALL")}
+        for future in concurrent.futures.as_completed(futures):
+            try: chains[futures[future]] = list(future.result() or [])
+            except Exception as e: print(f"  [!] Warm-up chain failed for {futures[future]}: {e}")
+    return chains, (start, end)
+
+def run_warmup(trading_client, data_client):
+    started = time.perf_counter()
+    stocks, roots, capacity, lookback, (min_dte, max_dte) = todays_watchlists(trading_client)
+    store = fetch_bars(data_client, stocks, capacity, lookback)
+    chains, window = fetch_chains(trading_client, roots, min_dte, max_dte)
+    checkpoint.save(CACHE_NAME, {"day": datetime.date.today().isoformat(), "bars": store.state(),
+                                 "chains": chains, "window": window})
+    print(f"  🔥 Warm-up: {len(store.buffers)}/{len(stocks)} bar series, {len(chains)} chains in {time.perf_counter() - started:.1f}s")
+
+# --- CONSUMERS (called from the bots) ---
+def load_today():
+    """Today's warm-up state, re-read only when the file changes."""
+    mtime = checkpoint.modified(CACHE_NAME)
+    if mtime is None: return None
+    if mtime != _loaded["mtime"]:
+        _loaded["mtime"], _loaded["state"] = mtime, checkpoint.load(CACHE_NAME, max_age=MAX_AGE)
+    state = _loaded["state"]
+    if not state or state.get("day") != datetime.date.today().isoformat(): return None
+    return state
+
+def seed_bars(store, symbols):
+    """Fills a bot's BufferStore from the warm-up for symbols where it is newer. Returns how many were seeded."""
+    state = load_today()
+    if not state: return 0
+    warm = state["bars"]["buffers"]
+    seeded = 0
+    for symbol in symbols:
+        src, dst = warm.get(symbol), store.get(symbol)
+        if src is None or not len(src): continue
+        if dst is not None and len(dst) and dst.last_ts >= src.last_ts: continue
+        store.seed(symbol, src)
+        seeded += 1
+    if seeded: print(f"  🔥 Seeded {seeded} symbols from the pre-open warm-up")
+    return seeded
+
+def cached_chain(root, kind, expiry_start, expiry_end):
+    """Warm-up contracts for root/kind ("PUT"|"CALL") expiring in the window, or None to fetch live."""
+    state = load_today()
+    if not state: return None
+    contracts = state["chains"].get((root, kind))
+    start, end = state["window"]
+    if contracts is None or expiry_start < start or expiry_end > end: return None
+    out = []
+    for c in contracts:
+        occ = options_math.parse_occ(c.symbol)
+        if occ and expiry_start <= occ[1] <= expiry_end: out.append(c)
+    return out
+
+# --- MAIN LOOP ---
+def run_warmup_job():
+    print("--- 🔥 PRE-OPEN WARM-UP STARTED ---")
+    trading_client = instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading")
+    data_client = instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data")
+    warmed_for = None
+
+    while True:
+        heartbeat.start("warmup", budget=900)
+        try:
+            session = market_calendar.session_date(trading_client)
+            opens = market_calendar.next_open(trading_client)
+            if market_calendar.is_open(trading_client):
+                until_open = 0
+            elif opens is None:   # Past the cached calendar horizon: nothing to warm up for yet
+                print("  [!] No upcoming session in the cached calendar. Re-checking in an hour.")
+                heartbeat.sleep("warmup", 3600)
+                continue
+            else:
+                until_open = opens - market_calendar.now()
+
+            if warmed_for != session and until_open <= WARMUP_LEAD:
+                run_warmup(trading_client, data_client)   # Also runs once on a mid-session (re)start
+                warmed_for = session
+                instrument.maybe_report("warmup")
+
+            # Sleep until the next session's warm-up window (re-checking the calendar at least hourly)
+            wait = until_open - WARMUP_LEAD if warmed_for != session else 3600
+            heartbeat.sleep("warmup", max(60, min(wait, 3600)))
+        except Exception as e:
+            print(f"[!] Warm-up Error: {e}")
+            heartbeat.sleep("warmup", 300)
+
+if __name__ == "__main__":
+    run_warmup_job()
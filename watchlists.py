@@ -0,0 +1,36 @@
+"""
+Symbol lists and data windows shared by the bots and warmup.py.
+
+The bots keep their own names for these (CORE_WATCHLIST, TARGETS, MAX_BARS,
+MIN_DTE, ...) but take the values from here. That way the pre-open warm-up
+can plan its fetches without importing every bot (and building their
+clients, thread pools and shadow books).
+"""
+import os
+import json
+
+# --- SECTOR SCOUT ---
+TARGET_FILE = "active_targets.json"      # Written by sector_scout.py
+TREND_FALLBACK = ["NVDA", "TSLA", "COIN"]
+
+# --- STOCK BOTS ---
+SURVIVOR_CORE = ["TQQQ", "SQQQ", "SOXL", "SOXS", "FNGU", "UPRO"]
+SURVIVOR_LOOKBACK_DAYS = 20              # Cold-start history
+SURVIVOR_MAX_BARS = 200                  # Bars kept per symbol (enough for SMA200)
+TREND_LOOKBACK_DAYS = 10                 # Cold-start history for EMA21 / ADX
+TREND_MAX_BARS = 150                     # Bars kept per symbol (EMA21 / ADX14 have long converged)
+
+# --- OPTION BOTS ---
+WHEEL_ROOTS = ["DIS", "PLTR", "F"]
+WHEEL_DTE = (25, 45)
+CONDOR_ROOTS = ["COIN", "MSTR", "TSLA", "NVDA", "NFLX"]
+CONDOR_DTE = (25, 45)
+
+def scout_targets(default=None):
+    """The Sector Scout's current list (`default` if the file is missing or unreadable)."""
+    default = [] if default is None else default
+    if not os.path.exists(TARGET_FILE): return default
+    try:
+        with open(TARGET_FILE, 'r') as f:
+            return json.load(f).get("targets", default)
+    except: return default
@@ -8,21 +8,32 @@ from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import LimitOrderRequest, GetOptionContractsRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, AssetClass, ContractType
 import config
-import utils
+import rate_limiter
+import instrument
+import heartbeat
+import order_registry
+import pre_trade_risk
+import market_calendar
+import options_math
+import chain_recorder
+import warmup
+import watchlists
 
 # --- CONFIGURATION ---
-WATCHLIST = ["DIS", "PLTR", "F"] 
-MIN_DTE = 25             
-MAX_DTE = 45
-TARGET_OTM_PCT = 0.05
+WATCHLIST = watchlists.WHEEL_ROOTS
+MIN_DTE, MAX_DTE = watchlists.WHEEL_DTE
+TARGET_OTM_PCT = 0.05   # Fallback when the chain has no usable quotes
+TARGET_DELTA = 0.30     # Sell ~30 delta puts/calls
+DELTA_TOLERANCE = 0.05  # Within this band, prefer the richest premium per day
 MIN_PREMIUM = 0.10      # Will not sell options for less than $10
 TAKE_PROFIT_PCT = 0.50  # Close position if we captured 50% of max profit
 
 # --- CLIENTS ---
-trading_client = TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER)
-data_client = StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
-option_data_client = OptionHistoricalDataClient(config.API_KEY, config.SECRET_KEY)
+trading_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(TradingClient(config.API_KEY, config.SECRET_KEY, paper=config.PAPER, url_override=getattr(config, 'ALPACA_URL_OVERRIDE', None))), "trading"))
+data_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(StockHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "data"))
+option_data_client = chain_recorder.recording(instrument.wrap_client(rate_limiter.govern(OptionHistoricalDataClient(config.API_KEY, config.SECRET_KEY, url_override=getattr(config, 'ALPACA_DATA_URL_OVERRIDE', None))), "option_data"))
 
+@instrument.timed("discord")
 def send_discord(msg):
     if "YOUR" in config.WEBHOOK_WHEEL: return
     try:
@@ -30,6 +41,7 @@ def send_discord(msg):
         requests.post(config.WEBHOOK_WHEEL, json=payload)
     except: pass
 
+@instrument.timed("influx_write")
 def log_to_influx(action, price, symbol, detail):
     try:
         data_str = f'wheel_trades,symbol={symbol} price={price},action="{action}",detail="{detail}",contract="{symbol}"'
@@ -59,37 +71,55 @@ def get_option_price(symbol, side="bid"):
         print(f"  [!] Error fetching option quote for {symbol}: {e}")
         return 0.0
 
+@instrument.timed("find_best_contract")
 def find_best_contract(symbol, side, current_price):
     today = datetime.date.today()
     start_date = today + datetime.timedelta(days=MIN_DTE)
     end_date = today + datetime.timedelta(days=MAX_DTE)
     
-    req = GetOptionContractsRequest(
-        underlying_symbols=[symbol], 
-        status="active",
-        expiration_date_gte=start_date,
-        expiration_date_lte=end_date,
-        type=ContractType.PUT if side == "PUT" else ContractType.CALL,
-        limit=1000
-    )
-    
-    try:
-        contracts = trading_client.get_option_contracts(req)
-        available = contracts.option_contracts
-    except Exception as e:
-        print(f"  [!] API Error fetching contracts: {e}")
-        return None
+    # Chains only change overnight: use the pre-open warm-up when it has this window
+    available = warmup.cached_chain(symbol, side, start_date, end_date)
+    if available is None:
+        req = GetOptionContractsRequest(
+            underlying_symbols=[symbol], 
+            status="active",
+            expiration_date_gte=start_date,
+            expiration_date_lte=end_date,
+            type=ContractType.PUT if side == "PUT" else ContractType.CALL,
+            limit=1000
+        )
+        
+        try:
+            contracts = trading_client.get_option_contracts(req)
+            available = contracts.option_contracts
+        except Exception as e:
+            print(f"  [!] API Error fetching contracts: {e}")
+            return None
+    else:
+        chain_recorder.record_contracts(available)
     
     if not available: return None
 
+    # Only OTM strikes are candidates
+    available = [c for c in available
+                 if (side == "PUT" and float(c.strike_price) < current_price)
+                 or (side == "CALL" and float(c.strike_price) > current_price)]
+    if not available: return None
+
+    # 1. Delta / premium-per-day selection from one batched quote pass
+    bids, asks = options_math.fetch_quotes(option_data_client, [c.symbol for c in available])
+    chain = options_math.analyze_chain(available, current_price, bids, asks)
+    idx = options_math.select_by_delta(chain, TARGET_DELTA, DELTA_TOLERANCE, MIN_PREMIUM)
+    if idx is not None:
+        print(f"    Delta pick: {available[idx].symbol} | Δ {chain['delta'][idx]:.2f} | IV {chain['iv'][idx]*100:.0f}% | ${chain['premium_per_day'][idx]:.3f}/day")
+        return available[idx]
+
+    # 2. Fallback: closest to TARGET_OTM_PCT
     best_contract = None
     best_score = 1.0 
 
     for c in available:
         strike = float(c.strike_price)
-        if side == "PUT" and strike >= current_price: continue
-        if side == "CALL" and strike <= current_price: continue
-        
         pct_otm = abs(current_price - strike) / current_price
         score = abs(pct_otm - TARGET_OTM_PCT)
         
@@ -99,25 +129,39 @@ def find_best_contract(symbol, side, current_price):
             
     return best_contract
 
+def sell_option(ticker, side, contract, limit_price, decided_at=None):
+    print(f"    [ENTRY] Selling {side} on {ticker} @ ${limit_price}")
+    req = LimitOrderRequest(
+        symbol=contract.symbol,
+        qty=1,
+        side=OrderSide.SELL,
+        time_in_force=TimeInForce.DAY,
+        limit_price=limit_price
+    )
+    if not order_registry.submit_order(trading_client, "wheel_bot", req, ref_price=limit_price, decided_at=decided_at): return
+    emoji = "🟢" if side == "CALL" else "🔴"
+    send_discord(f"{emoji} **SOLD {side} {ticker}**\nStrike: ${contract.strike_price}\nLimit: ${limit_price}")
+    log_to_influx(f"sell_{side.lower()}", limit_price, contract.symbol, "Opened Position")
+
 def run_wheel_bot():
     print(f"--- 🚜 FLEET WHEEL BOT (Harvest Mode) STARTED ---")
     send_discord(f"🚜 **Wheel Bot Online**\nTargeting 50% Profit on: {WATCHLIST}")
     
     while True:
+        cycle_start = time.perf_counter()
+        heartbeat.start("wheel_bot", budget=180)
         try:
             try:
-                clock = trading_client.get_clock()
-                if not clock.is_open:
-                    print(f"[{datetime.datetime.now().strftime('%H:%M')}] Market Closed.", end='\r')
-                    time.sleep(60)
-                    continue
+                if market_calendar.sleep_until_open(trading_client, "wheel_bot"): continue
             except: pass
 
             account = trading_client.get_account()
             buying_power = float(account.buying_power)
             all_positions = trading_client.get_all_positions()
+            order_registry.refresh(trading_client) # Resting option orders don't show up as positions
 
             print(f"\n[{datetime.datetime.now().strftime('%H:%M')}] Scanning Portfolio & Watchlist...")
+            puts = [] # Cash-secured puts, risk-checked together after the scan
 
             for ticker in WATCHLIST:
                 stock_qty = 0
@@ -161,16 +205,19 @@ def run_wheel_bot():
                                 time_in_force=TimeInForce.DAY,
                                 limit_price=close_price
                             )
-                            trading_client.submit_order(order_data=req)
-                            send_discord(f"💰 **TOOK PROFIT {ticker}**\nClosed @ ${close_price} ({capture_pct*100:.0f}% Cap)")
-                            log_to_influx("buy_close", close_price, active_option.symbol, "Take Profit")
+                            if order_registry.submit_order(trading_client, "wheel_bot", req, ref_price=close_price):
+                                send_discord(f"💰 **TOOK PROFIT {ticker}**\nClosed @ ${close_price} ({capture_pct*100:.0f}% Cap)")
+                                log_to_influx("buy_close", close_price, active_option.symbol, "Take Profit")
                             # Don't open a new one same loop
                             continue 
                     
                     # If we have an option and didn't close it, we are done with this ticker for now
                     continue
 
-                # 3. OPEN NEW POSITIONS (If no option exists)
+                # 3. OPEN NEW POSITIONS (If no option exists and none is resting)
+                if order_registry.has_open(ticker, bot="wheel_bot"):
+                    print(f"  {ticker:<4} | Order still open. Waiting for fill.")
+                    continue
                 print(f"  {ticker:<4} | ${current_stock_price:>7.2f} | No Active Option. Hunting...")
 
                 contract = None
@@ -183,10 +230,6 @@ def run_wheel_bot():
                 
                 # Cash Secured Put?
                 else:
-                    # [NEW] CFO CHECK
-                    if not utils.check_budget("wheel_bot", trading_client):
-                        print(f"    [SKIP] Wheel Budget Exceeded.")
-                        continue
                     # Basic check: do we have enough BP?
                     if buying_power < (current_stock_price * 100):
                         print(f"    [SKIP] Insufficient BP for {ticker}")
@@ -201,30 +244,27 @@ def run_wheel_bot():
                         print(f"    [SKIP] Premium too low (${limit_price})")
                         continue
                     
-                    if side == "PUT" and buying_power < (float(contract.strike_price) * 100):
-                        print(f"    [SKIP] Strike too expensive.")
-                        continue
+                    if side == "PUT":
+                        # Collateral is the strike: size the risk check on that
+                        puts.append({"symbol": ticker, "qty": 1, "price": float(contract.strike_price), "multiplier": 100,
+                                     "contract": contract, "limit": limit_price, "decided_at": time.time()})
+                    else:
+                        sell_option(ticker, side, contract, limit_price)
 
-                    print(f"    [ENTRY] Selling {side} on {ticker} @ ${limit_price}")
-                    req = LimitOrderRequest(
-                        symbol=contract.symbol,
-                        qty=1,
-                        side=OrderSide.SELL,
-                        time_in_force=TimeInForce.DAY,
-                        limit_price=limit_price
-                    )
-                    trading_client.submit_order(order_data=req)
-                    emoji = "🟢" if side == "CALL" else "🔴"
-                    send_discord(f"{emoji} **SOLD {side} {ticker}**\nStrike: ${contract.strike_price}\nLimit: ${limit_price}")
-                    log_to_influx(f"sell_{side.lower()}", limit_price, contract.symbol, "Opened Position")
-                    
-                    if side == "PUT": buying_power -= (float(contract.strike_price) * 100)
+            # 4. One risk pass over this scan's puts (allocation, buying power, concentration)
+            approved = pre_trade_risk.evaluate(pre_trade_risk.snapshot(trading_client, account, all_positions), "wheel_bot", puts)
+            pre_trade_risk.log_decisions("wheel_bot", approved)
+            for p in approved:
+                if p["qty"] > 0: sell_option(p["symbol"], "PUT", p["contract"], p["limit"], p["decided_at"])
 
-            time.sleep(900)
+            chain_recorder.flush() # This cycle's chains + quotes, for offline replay
+            instrument.record("cycle", time.perf_counter() - cycle_start)
+            instrument.maybe_report("wheel_bot")
+            heartbeat.sleep("wheel_bot", 900)
 
         except Exception as e:
             print(f"\n[!] CRITICAL ERROR: {e}")
-            time.sleep(60)
+            heartbeat.sleep("wheel_bot", 60)
 
 if __name__ == "__main__":
     run_wheel_bot()
\ No newline at end of file